@@ -7,11 +7,13 @@ control of the todo list component.
 
 import os
 from google.adk.agents import LlmAgent
-from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset, SseServerParams
+from google.adk.tools.mcp_tool.mcp_toolset import SseServerParams
 from google.adk.tools import agent_tool
 from dotenv import load_dotenv
 from google.adk.models.lite_llm import LiteLlm
 
+from .mcp_connection import MCPConnection
+
 load_dotenv()
 
 representation_agent_instruction = """
@@ -174,26 +176,26 @@ def create_agent():
     
     mcp_server_url = os.getenv("MCP_SERVER_URL", "http://mcp-server:8001")
     
-    # Main MCP toolset for todo and backlog related tools
-    mcp_toolset = MCPToolset(
-        connection_params=SseServerParams(
+    # One MCP session and tool listing, shared by both toolsets below
+    mcp_connection = MCPConnection(
+        SseServerParams(
             url=f"{mcp_server_url}/sse",
             headers={}
-        ),
-        tool_filter=["add_plan", "delete_plan", "update_plan", "toggle_plan", "list_plan", 
-                    "add_backlog", "delete_backlog", "update_backlog", "send_backlog_to_todo", "list_backlog",
-                    "ask_for_approval"]
+        )
+    )
+    
+    # Main MCP toolset for todo and backlog related tools
+    mcp_toolset = mcp_connection.toolset(
+        ["add_plan", "delete_plan", "update_plan", "toggle_plan", "list_plan", 
+         "add_backlog", "delete_backlog", "update_backlog", "send_backlog_to_todo", "list_backlog",
+         "ask_for_approval"]
     )
     
     # Software expert MCP toolset for file system and notebook tools
-    software_expert_mcp_toolset = MCPToolset(
-        connection_params=SseServerParams(
-            url=f"{mcp_server_url}/sse",
-            headers={}
-        ),
-        tool_filter=["ls", "cat_run_sh", "bash_run_sh", 
-                    "create_python_notebook", "get_notebook_state",
-                    "create_file_tool", "list_files_tool"]
+    software_expert_mcp_toolset = mcp_connection.toolset(
+        ["ls", "cat_run_sh", "bash_run_sh", 
+         "create_python_notebook", "get_notebook_state",
+         "create_file_tool", "list_files_tool"]
     )
 
     
@@ -0,0 +1,71 @@
+"""One MCP connection shared by the representation agent's toolsets.
+
+``MCPToolset`` opens its own MCP session and lists the server's tools on every
+``get_tools`` call, i.e. on every model turn. The agent and its software
+expert both talk to the same MCP server, so they share one ``MCPConnection``
+instead: a single session, a tool list fetched once and reused for
+``MCP_TOOLS_CACHE_SECONDS``, and per-agent ``tool_filter`` applied locally.
+"""
+
+import asyncio
+import os
+import time
+from typing import List, Optional, Union
+
+from google.adk.agents.readonly_context import ReadonlyContext
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.base_toolset import BaseToolset, ToolPredicate
+from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset
+
+MCP_TOOLS_CACHE_SECONDS = float(os.getenv("MCP_TOOLS_CACHE_SECONDS", "300"))
+
+
+class MCPConnection:
+    """A single MCP session and its cached tool list."""
+
+    def __init__(self, connection_params, cache_seconds: float = MCP_TOOLS_CACHE_SECONDS):
+        # Unfiltered: it holds the session; filtering happens in each FilteredMCPToolset.
+        self._toolset = MCPToolset(connection_params=connection_params)
+        self.cache_seconds = cache_seconds
+        self._tools: Optional[List[BaseTool]] = None
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def toolset(self, tool_filter: Optional[Union[ToolPredicate, List[str]]] = None) -> "FilteredMCPToolset":
+        """A toolset exposing the tools selected by ``tool_filter`` over this connection."""
+        return FilteredMCPToolset(self, tool_filter)
+
+    def _fresh(self) -> bool:
+        return self._tools is not None and time.monotonic() - self._loaded_at < self.cache_seconds
+
+    async def get_tools(self) -> List[BaseTool]:
+        """All tools of the server; concurrent callers share one listing."""
+        if self._fresh():
+            return self._tools
+        async with self._lock:
+            if not self._fresh():
+                # The MCPTool objects reconnect through the shared session
+                # manager by themselves, so cached ones survive a reconnect.
+                self._tools = await self._toolset.get_tools()
+                self._loaded_at = time.monotonic()
+            return self._tools
+
+    async def close(self):
+        """Close the session; the next ``get_tools`` reconnects. Safe to call repeatedly."""
+        self._tools = None
+        await self._toolset.close()
+
+
+class FilteredMCPToolset(BaseToolset):
+    """View of an ``MCPConnection`` limited to the tools selected by ``tool_filter``."""
+
+    def __init__(self, connection: MCPConnection, tool_filter: Optional[Union[ToolPredicate, List[str]]] = None):
+        super().__init__(tool_filter=tool_filter)
+        self.connection = connection
+
+    async def get_tools(self, readonly_context: Optional[ReadonlyContext] = None) -> List[BaseTool]:
+        return [tool for tool in await self.connection.get_tools() if self._is_tool_selected(tool, readonly_context)]
+
+    async def close(self) -> None:
+        # The runner closes every toolset it finds; the shared session closes with the first.
+        await self.connection.close()
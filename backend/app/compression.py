@@ -0,0 +1,170 @@
+"""Response compression for REST and SSE.
+
+``CompressionMiddleware`` gzip- or brotli-encodes HTTP responses above
+``COMPRESSION_MIN_SIZE`` bytes, negotiated from ``Accept-Encoding``. Brotli is
+used only when the optional ``brotli`` package is installed.
+
+``Compressor`` keeps one streaming compression context and flushes after every
+chunk, so each SSE event or streamed batch can be decoded as soon as it
+arrives while later events still benefit from the shared history.
+
+Chunks of ``OFFLOAD_THRESHOLD_BYTES`` or more are compressed in the offload
+thread pool (zlib and brotli release the GIL), keeping large list payloads
+from stalling the event loop.
+"""
+
+import os
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from . import offload
+from .metrics import COMPRESSION_BYTES
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
+# Responses that are never compressed by the middleware: SSE streams manage
+# their own (opt-in) compression, and 204/304 have no body.
+SKIP_CONTENT_TYPES = ("text/event-stream",)
+
+
+def supported_encodings() -> tuple:
+    """Encodings this process can produce, in order of preference."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick the preferred supported encoding allowed by an ``Accept-Encoding`` header."""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name] = quality
+
+    for encoding in supported_encodings():
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+class Compressor:
+    """Streaming compression context for one response."""
+
+    def __init__(self, encoding: str, transport: str = "rest"):
+        self.encoding = encoding
+        self.transport = transport
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._zlib = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def _compress(self, data: bytes, finish: bool) -> bytes:
+        if self.encoding == "br":
+            out = self._brotli.process(data)
+            return out + (self._brotli.finish() if finish else self._brotli.flush())
+        out = self._zlib.compress(data)
+        return out + self._zlib.flush(zlib.Z_FINISH if finish else zlib.Z_SYNC_FLUSH)
+
+    async def compress(self, data: bytes, finish: bool = False) -> bytes:
+        """Compress ``data`` and flush, ending the stream when ``finish`` is set."""
+        # The context is stateful, so it always goes to the thread pool.
+        out = await offload.run("compress", len(data), self._compress, data, finish,
+                                executor=offload.thread_pool())
+        COMPRESSION_BYTES.inc(len(data), transport=self.transport, encoding=self.encoding, stage="in")
+        COMPRESSION_BYTES.inc(len(out), transport=self.transport, encoding=self.encoding, stage="out")
+        return out
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing HTTP responses for clients that accept it."""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressingResponder(encoding, self.minimum_size, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressingResponder:
+    """Buffers the response start until the first body chunk decides how to send it."""
+
+    def __init__(self, encoding: str, minimum_size: int, send: Send):
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self._send = send
+        self._start: Optional[Message] = None
+        self._compressor: Optional[Compressor] = None
+        self._passthrough = False
+
+    async def send(self, message: Message):
+        if self._passthrough or message["type"] not in ("http.response.start", "http.response.body"):
+            await self._send(message)
+            return
+
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            if (
+                message["status"] in (204, 304)
+                or "content-encoding" in headers
+                or content_type.startswith(SKIP_CONTENT_TYPES)
+            ):
+                self._passthrough = True
+                await self._send(message)
+            else:
+                self._start = message
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self._start is not None:
+            start, self._start = self._start, None
+            if not more_body and len(body) < self.minimum_size:
+                self._passthrough = True
+                await self._send(start)
+                await self._send(message)
+                return
+            headers = MutableHeaders(raw=start["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            self._compressor = Compressor(self.encoding)
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                body = await self._compressor.compress(body, finish=True)
+                headers["Content-Length"] = str(len(body))
+                await self._send(start)
+                await self._send({"type": "http.response.body", "body": body})
+                return
+            await self._send(start)
+
+        body = await self._compressor.compress(body, finish=not more_body)
+        await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
@@ -2,7 +2,7 @@
 
 import aiomysql
 import os
-from typing import Optional
+from typing import AsyncIterator, List, Optional, Sequence
 from contextlib import asynccontextmanager
 
 
@@ -51,7 +51,7 @@ class Database:
             self.pool = None
     
     async def create_tables(self):
-        """Create the todos, backlog, and approvals tables if they don't exist."""
+        """Create the application tables and indexes if they don't exist."""
         if not self.pool:
             raise RuntimeError("Database not connected")
         
@@ -90,7 +90,25 @@ class Database:
                         result TEXT,
                         INDEX idx_session_id (session_id),
                         INDEX idx_function_call_id (function_call_id),
-                        INDEX idx_status (status)
+                        INDEX idx_status (status),
+                        INDEX idx_status_created_at (status, created_at)
+                    )
+                """)
+                await self._ensure_index(cursor, "approvals", "idx_status_created_at", "status, created_at")
+                
+                await cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS approvals_archive (
+                        id VARCHAR(255) PRIMARY KEY,
+                        session_id VARCHAR(255) NOT NULL,
+                        function_call_id VARCHAR(255) NOT NULL,
+                        description TEXT NOT NULL,
+                        status VARCHAR(50) NOT NULL,
+                        created_at BIGINT NOT NULL,
+                        updated_at BIGINT NOT NULL,
+                        result TEXT,
+                        archived_at BIGINT NOT NULL,
+                        INDEX idx_session_id (session_id),
+                        INDEX idx_archived_at (archived_at)
                     )
                 """)
                 
@@ -103,8 +121,54 @@ class Database:
                         status VARCHAR(50) DEFAULT 'pending',
                         result TEXT,
                         widget_url TEXT,
+                        result_size BIGINT,
+                        result_truncated BOOLEAN DEFAULT FALSE,
                         created_at BIGINT NOT NULL,
-                        updated_at BIGINT NOT NULL
+                        updated_at BIGINT NOT NULL,
+                        INDEX idx_status_created_at (status, created_at)
+                    )
+                """)
+                await self._ensure_index(cursor, "code_interpreter_states", "idx_status_created_at", "status, created_at")
+                await self._ensure_column(cursor, "code_interpreter_states", "result_size", "BIGINT")
+                await self._ensure_column(cursor, "code_interpreter_states", "result_truncated", "BOOLEAN DEFAULT FALSE")
+                
+                await cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS code_interpreter_artifacts (
+                        id VARCHAR(255) PRIMARY KEY,
+                        state_id VARCHAR(255) NOT NULL,
+                        name VARCHAR(255) NOT NULL,
+                        mime_type VARCHAR(255) NOT NULL,
+                        size BIGINT NOT NULL,
+                        chunk_count INT NOT NULL,
+                        created_at BIGINT NOT NULL,
+                        INDEX idx_state_id (state_id)
+                    )
+                """)
+                
+                await cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS code_interpreter_artifact_chunks (
+                        artifact_id VARCHAR(255) NOT NULL,
+                        seq INT NOT NULL,
+                        data MEDIUMBLOB NOT NULL,
+                        PRIMARY KEY (artifact_id, seq)
+                    )
+                """)
+                
+                await cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS agent_runs (
+                        id VARCHAR(255) PRIMARY KEY,
+                        session_id VARCHAR(255) NOT NULL,
+                        message TEXT NOT NULL,
+                        status VARCHAR(50) NOT NULL DEFAULT 'queued',
+                        output MEDIUMTEXT,
+                        events MEDIUMTEXT,
+                        event_count INT NOT NULL DEFAULT 0,
+                        error TEXT,
+                        created_at BIGINT NOT NULL,
+                        started_at BIGINT,
+                        finished_at BIGINT,
+                        INDEX idx_status_created_at (status, created_at),
+                        INDEX idx_session_created_at (session_id, created_at)
                     )
                 """)
                 
@@ -124,8 +188,62 @@ class Database:
                         INDEX idx_type (type)
                     )
                 """)
+                
+                await cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS terminal_commands (
+                        id VARCHAR(255) PRIMARY KEY,
+                        session_id VARCHAR(255) NOT NULL,
+                        command TEXT NOT NULL,
+                        tool VARCHAR(50) NOT NULL,
+                        file TEXT,
+                        start_offset BIGINT,
+                        end_offset BIGINT,
+                        exit_code INT,
+                        timed_out BOOLEAN DEFAULT FALSE,
+                        truncated BOOLEAN DEFAULT FALSE,
+                        duration_ms BIGINT,
+                        created_at BIGINT NOT NULL,
+                        finished_at BIGINT,
+                        INDEX idx_session_created (session_id, created_at)
+                    )
+                """)
+                
+                await cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS terminal_output (
+                        session_id VARCHAR(255) NOT NULL,
+                        start_offset BIGINT NOT NULL,
+                        length INT NOT NULL,
+                        command_id VARCHAR(255) NOT NULL,
+                        stream VARCHAR(10) NOT NULL,
+                        data MEDIUMTEXT NOT NULL,
+                        created_at BIGINT NOT NULL,
+                        PRIMARY KEY (session_id, start_offset)
+                    )
+                """)
                 await conn.commit()
     
+    async def _ensure_index(self, cursor, table: str, index: str, columns: str):
+        """Add an index to an existing table if it is missing (MySQL has no CREATE INDEX IF NOT EXISTS)."""
+        await cursor.execute(
+            """SELECT 1 FROM information_schema.statistics
+               WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+               LIMIT 1""",
+            (table, index)
+        )
+        if not await cursor.fetchone():
+            await cursor.execute(f"CREATE INDEX {index} ON {table} ({columns})")
+    
+    async def _ensure_column(self, cursor, table: str, column: str, definition: str):
+        """Add a column to an existing table if it is missing."""
+        await cursor.execute(
+            """SELECT 1 FROM information_schema.columns
+               WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+               LIMIT 1""",
+            (table, column)
+        )
+        if not await cursor.fetchone():
+            await cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    
     @asynccontextmanager
     async def get_connection(self):
         """Get a database connection from the pool.
@@ -145,7 +263,32 @@ class Database:
         try:
             yield conn
         finally:
-            conn.close()
+            await self.pool.release(conn)
+    
+    async def stream(self, query: str, params: Optional[Sequence] = None, batch_size: int = 500) -> AsyncIterator[List[dict]]:
+        """Yield query results as batches of dict rows from an unbuffered server-side cursor.
+        
+        Only one batch is held in memory at a time. The connection stays checked
+        out until the generator is exhausted or closed.
+        """
+        async with self.get_connection() as conn:
+            async with conn.cursor(aiomysql.SSDictCursor) as cursor:
+                await cursor.execute(query, params)
+                while True:
+                    rows = await cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield rows
+    
+    def pool_stats(self) -> dict:
+        """Current connection pool utilization."""
+        if not self.pool:
+            return {"used": 0, "free": 0, "max": 0}
+        return {
+            "used": self.pool.size - self.pool.freesize,
+            "free": self.pool.freesize,
+            "max": self.pool.maxsize,
+        }
 
 
 database = Database()
@@ -0,0 +1,19 @@
+"""Redis message handlers, registered per component."""
+
+from .agent_run_handlers import register_agent_run_handlers
+from .approval_handlers import register_approval_handlers
+from .backlog_handlers import register_backlog_handlers
+from .code_interpreter_handlers import register_code_interpreter_handlers
+from .file_handlers import register_file_handlers
+from .plan_handlers import register_plan_handlers
+from .terminal_handlers import register_terminal_handlers
+
+__all__ = [
+    "register_agent_run_handlers",
+    "register_approval_handlers",
+    "register_backlog_handlers",
+    "register_code_interpreter_handlers",
+    "register_file_handlers",
+    "register_plan_handlers",
+    "register_terminal_handlers",
+]
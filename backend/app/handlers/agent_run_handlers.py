@@ -0,0 +1,32 @@
+"""Agent run message handlers.
+
+Runs are written by the worker executing them; these handlers only relay
+their progress to each worker's SSE clients and deliver cancellations.
+"""
+
+from ..services.agent_run_service import CHANNEL, MESSAGE_TYPE, AgentRunQueue
+from ..services.message_registry import MessageHandlerRegistry
+from ..services.sse_service import SSEService
+
+
+def register_agent_run_handlers(
+    registry: MessageHandlerRegistry,
+    agent_run_queue: AgentRunQueue,
+    sse_service: SSEService,
+):
+    """Register agent run-related message handlers."""
+
+    @registry.on(CHANNEL, MESSAGE_TYPE, "updated", switch_component=False)
+    async def handle_updated(message: dict):
+        data = message.get("payload", {}).get("data", {})
+        await sse_service.send_event("agent_run_updated", {"run": data.get("run")})
+
+    @registry.on(CHANNEL, MESSAGE_TYPE, "progress", switch_component=False)
+    async def handle_progress(message: dict):
+        await sse_service.send_event("agent_run_progress", message.get("payload", {}).get("data", {}))
+
+    @registry.on(CHANNEL, MESSAGE_TYPE, "cancel", switch_component=False)
+    async def handle_cancel(message: dict):
+        run_id = message.get("payload", {}).get("data", {}).get("run_id")
+        if run_id:
+            agent_run_queue.cancel_local(run_id)
@@ -0,0 +1,46 @@
+"""Approval component message handlers."""
+
+import logging
+import time
+
+from ..models.approval import Approval
+from ..services.approval_service import ApprovalService
+from ..services.message_registry import MessageHandlerRegistry
+from ..services.sse_service import SSEService
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "approval:requests"
+MESSAGE_TYPE = "approval_request"
+
+
+def register_approval_handlers(
+    registry: MessageHandlerRegistry,
+    approval_service: ApprovalService,
+    sse_service: SSEService,
+):
+    """Register approval-related message handlers."""
+
+    @registry.on(CHANNEL, MESSAGE_TYPE, switch_component=False)
+    async def handle_approval_request(message: dict):
+        # 检查消息格式，提取 payload 数据
+        payload = message.get("payload", message)  # 如果有 payload 字段则使用，否则使用整个数据
+
+        approval = Approval(
+            id=payload.get("id", f"approval-{int(time.time())}"),
+            session_id=payload.get("session_id", "default_session"),
+            function_call_id=payload.get("function_call_id", payload.get("id", f"func-{int(time.time())}")),
+            description=payload.get("description", "Approval request"),
+            status="pending",
+            created_at=int(time.time() * 1000),
+            updated_at=int(time.time() * 1000)
+        )
+
+        await approval_service.create_approval(approval)
+
+        await sse_service.send_event("approval_request", {
+            "approval": approval.dict(),
+            "message": "New approval request received"
+        })
+
+        logger.info("Created approval request: %s", approval.id)
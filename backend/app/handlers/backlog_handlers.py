@@ -0,0 +1,57 @@
+"""Backlog component message handlers."""
+
+from ..services.backlog_service import BacklogService
+from ..services.message_registry import MessageHandlerRegistry
+from ..services.sse_service import SSEService
+
+CHANNEL = "backlog:actions"
+MESSAGE_TYPE = "backlog_action"
+
+
+def register_backlog_handlers(
+    registry: MessageHandlerRegistry,
+    backlog_service: BacklogService,
+    sse_service: SSEService,
+):
+    """Register backlog-related message handlers."""
+
+    @registry.on(CHANNEL, MESSAGE_TYPE, "add")
+    async def handle_add(message: dict):
+        data = message.get("payload", {}).get("data", {})
+        backlog = await backlog_service.create_backlog(
+            title=data.get("title", ""),
+            description=data.get("description", "")
+        )
+        await sse_service.send_event("backlog_added", {"backlog": backlog.dict()})
+
+    @registry.on(CHANNEL, MESSAGE_TYPE, "delete")
+    async def handle_delete(message: dict):
+        backlog_id = message.get("payload", {}).get("backlogId")
+        if backlog_id:
+            await backlog_service.delete_backlog(backlog_id)
+            await sse_service.send_event("backlog_deleted", {"backlogId": backlog_id})
+
+    @registry.on(CHANNEL, MESSAGE_TYPE, "update")
+    async def handle_update(message: dict):
+        payload = message.get("payload", {})
+        backlog_id = payload.get("backlogId")
+        data = payload.get("data", {})
+        if backlog_id:
+            backlog = await backlog_service.update_backlog(backlog_id, **data)
+            if backlog:
+                await sse_service.send_event("backlog_updated", {"backlog": backlog.dict()})
+
+    @registry.on(CHANNEL, MESSAGE_TYPE, "send_to_todo")
+    async def handle_send_to_todo(message: dict):
+        backlog_id = message.get("payload", {}).get("backlogId")
+        if backlog_id:
+            result = await backlog_service.send_to_todo(backlog_id)
+            if result:
+                await sse_service.send_event("backlog_sent_to_todo", result)
+                await sse_service.send_event("plan_added", {"plan": result["todo"]})
+                await sse_service.send_event("backlog_deleted", {"backlogId": backlog_id})
+
+    @registry.on(CHANNEL, MESSAGE_TYPE, "list")
+    async def handle_list(message: dict):
+        backlogs_data = await backlog_service.get_all_backlog_rows()
+        await sse_service.send_event("backlog_list", {"backlogs": backlogs_data})
@@ -0,0 +1,63 @@
+"""Code interpreter component message handlers."""
+
+from ..services.code_interpreter_service import CodeInterpreterService
+from ..services.message_registry import MessageHandlerRegistry
+from ..services.sse_service import SSEService
+
+CHANNEL = "code_interpreter:actions"
+MESSAGE_TYPE = "code_interpreter_action"
+
+
+def register_code_interpreter_handlers(
+    registry: MessageHandlerRegistry,
+    code_interpreter_service: CodeInterpreterService,
+    sse_service: SSEService,
+):
+    """Register code interpreter-related message handlers."""
+
+    @registry.on(CHANNEL, MESSAGE_TYPE, "create_python_notebook")
+    async def handle_create_python_notebook(message: dict):
+        data = message.get("payload", {}).get("data", {})
+        state = await code_interpreter_service.create_python_notebook(
+            state_id=data.get("state_id"),
+            code=data.get("code", ""),
+            description=data.get("description", ""),
+            widget_url=data.get("widget_url")
+        )
+        await sse_service.send_event("code_interpreter_state_created", {"state": state.dict()})
+
+    @registry.on(CHANNEL, MESSAGE_TYPE, "update_state", switch_component=False)
+    async def handle_update_state(message: dict):
+        data = message.get("payload", {}).get("data", {})
+        state_id = data.get("state_id")
+        if state_id:
+            state = await code_interpreter_service.update_state(
+                state_id,
+                artifacts=data.get("artifacts"),
+                status=data.get("status"),
+                result=data.get("result")
+            )
+            if state:
+                await sse_service.send_event("code_interpreter_state_updated", {"state": state.dict()})
+
+    @registry.on(CHANNEL, MESSAGE_TYPE, "states_updated", switch_component=False)
+    async def handle_states_updated(message: dict):
+        # Already written by the poller; only this worker's clients need telling.
+        for state in message.get("payload", {}).get("data", {}).get("states", []):
+            await sse_service.send_event("code_interpreter_state_updated", {"state": state})
+
+    @registry.on(CHANNEL, MESSAGE_TYPE, "get_notebook_state")
+    async def handle_get_notebook_state(message: dict):
+        state_id = message.get("payload", {}).get("state_id")
+        if state_id:
+            state = await code_interpreter_service.get_notebook_state(state_id)
+            if state:
+                await sse_service.send_event("code_interpreter_state_retrieved", {"state": state.dict()})
+
+    @registry.on(CHANNEL, MESSAGE_TYPE, "delete")
+    async def handle_delete(message: dict):
+        state_id = message.get("payload", {}).get("state_id")
+        if state_id:
+            success = await code_interpreter_service.delete_state(state_id)
+            if success:
+                await sse_service.send_event("code_interpreter_state_deleted", {"stateId": state_id})
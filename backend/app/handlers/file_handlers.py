@@ -0,0 +1,50 @@
+"""File browser component message handlers."""
+
+import time
+import uuid
+
+from ..models.file import File
+from ..services.file_service import FileService
+from ..services.message_registry import MessageHandlerRegistry
+from ..services.sse_service import SSEService
+
+CHANNEL = "file:actions"
+MESSAGE_TYPE = "file_action"
+
+
+def register_file_handlers(
+    registry: MessageHandlerRegistry,
+    file_service: FileService,
+    sse_service: SSEService,
+):
+    """Register file-related message handlers."""
+
+    @registry.on(CHANNEL, MESSAGE_TYPE, "create")
+    async def handle_create(message: dict):
+        data = message.get("payload", {}).get("data", {})
+        file = File(
+            id=data.get("id", str(uuid.uuid4())),
+            session_id=data.get("session_id", "default_session"),
+            name=data.get("name", ""),
+            type=data.get("type", "file"),
+            path=data.get("path", ""),
+            size=data.get("size"),
+            content=data.get("content"),
+            created_at=data.get("created_at", int(time.time() * 1000)),
+            updated_at=data.get("updated_at", int(time.time() * 1000))
+        )
+        created_file = await file_service.create_file(file)
+        await sse_service.send_event("file_created", {"file": created_file.dict()})
+
+    @registry.on(CHANNEL, MESSAGE_TYPE, "list")
+    async def handle_list(message: dict):
+        files_data = await file_service.get_all_file_rows()
+        await sse_service.send_event("file_list", {"files": files_data})
+
+    @registry.on(CHANNEL, MESSAGE_TYPE, "delete")
+    async def handle_delete(message: dict):
+        file_id = message.get("payload", {}).get("fileId")
+        if file_id:
+            success = await file_service.delete_file(file_id)
+            if success:
+                await sse_service.send_event("file_deleted", {"fileId": file_id})
@@ -0,0 +1,55 @@
+"""Plan component message handlers."""
+
+from ..services.message_registry import MessageHandlerRegistry
+from ..services.sse_service import SSEService
+from ..services.todo_service import TodoService
+
+CHANNEL = "plan:actions"
+MESSAGE_TYPE = "plan_action"
+
+
+def register_plan_handlers(
+    registry: MessageHandlerRegistry,
+    todo_service: TodoService,
+    sse_service: SSEService,
+):
+    """Register plan-related message handlers."""
+
+    @registry.on(CHANNEL, MESSAGE_TYPE, "add")
+    async def handle_add(message: dict):
+        data = message.get("payload", {}).get("data", {})
+        todo = await todo_service.create_todo(
+            title=data.get("title", ""),
+            description=data.get("description", "")
+        )
+        await sse_service.send_event("plan_added", {"plan": todo.dict()})
+
+    @registry.on(CHANNEL, MESSAGE_TYPE, "delete")
+    async def handle_delete(message: dict):
+        plan_id = message.get("payload", {}).get("planId")
+        if plan_id:
+            await todo_service.delete_todo(plan_id)
+            await sse_service.send_event("plan_deleted", {"planId": plan_id})
+
+    @registry.on(CHANNEL, MESSAGE_TYPE, "update")
+    async def handle_update(message: dict):
+        payload = message.get("payload", {})
+        plan_id = payload.get("planId")
+        data = payload.get("data", {})
+        if plan_id:
+            todo = await todo_service.update_todo(plan_id, **data)
+            if todo:
+                await sse_service.send_event("plan_updated", {"plan": todo.dict()})
+
+    @registry.on(CHANNEL, MESSAGE_TYPE, "toggle")
+    async def handle_toggle(message: dict):
+        plan_id = message.get("payload", {}).get("planId")
+        if plan_id:
+            todo = await todo_service.toggle_todo(plan_id)
+            if todo:
+                await sse_service.send_event("plan_updated", {"plan": todo.dict()})
+
+    @registry.on(CHANNEL, MESSAGE_TYPE, "list")
+    async def handle_list(message: dict):
+        todos_data = await todo_service.get_all_todo_rows()
+        await sse_service.send_event("plan_list", {"plans": todos_data})
@@ -0,0 +1,120 @@
+"""Terminal component message handlers.
+
+Commands and their output are written to the terminal history store before
+clients are told about them. ``terminal_output_chunk`` events carry the
+chunk's offset and length, plus the text itself only when it is at most
+``TERMINAL_SSE_DELTA_CHARS`` long; clients fetch larger chunks from
+``GET /api/terminal/{session_id}/output`` when they need them.
+"""
+
+import logging
+import os
+import time
+
+from ..services.message_registry import MessageHandlerRegistry
+from ..services.sse_service import SSEService
+from ..services.terminal_service import TerminalService
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "terminal:actions"
+MESSAGE_TYPE = "terminal_action"
+TERMINAL_SSE_DELTA_CHARS = int(os.getenv("TERMINAL_SSE_DELTA_CHARS", "1024"))
+
+
+def register_terminal_handlers(registry: MessageHandlerRegistry, terminal_service: TerminalService,
+                               sse_service: SSEService):
+    """Register terminal-related message handlers."""
+
+    async def handle_command_executed(message: dict):
+        payload = message.get("payload", {})
+        await sse_service.send_event("terminal_command_executed", {
+            "action": payload.get("action"),
+            "command": payload.get("command", ""),
+            "output": payload.get("output", ""),
+            "file": payload.get("file", ""),
+            "timestamp": payload.get("timestamp", int(time.time() * 1000))
+        })
+
+    @registry.on(CHANNEL, MESSAGE_TYPE, "start")
+    async def handle_start(message: dict):
+        payload = message.get("payload", {})
+        timestamp = message.get("timestamp", int(time.time() * 1000))
+        try:
+            await terminal_service.record_start(
+                payload.get("command_id"),
+                payload.get("session_id"),
+                payload.get("command", ""),
+                payload.get("tool", "run"),
+                payload.get("file", ""),
+                payload.get("offset"),
+                timestamp
+            )
+        except Exception as e:
+            logger.error("Error storing terminal command: %s", e)
+        await sse_service.send_event("terminal_command_started", {
+            "command_id": payload.get("command_id"),
+            "session_id": payload.get("session_id"),
+            "command": payload.get("command", ""),
+            "action": payload.get("tool", "run"),
+            "file": payload.get("file", ""),
+            "offset": payload.get("offset"),
+            "timestamp": timestamp
+        })
+
+    @registry.on(CHANNEL, MESSAGE_TYPE, "output_chunk", switch_component=False)
+    async def handle_output_chunk(message: dict):
+        payload = message.get("payload", {})
+        data = payload.get("data", "")
+        offset = payload.get("offset")
+        stored = False
+        if offset is not None:
+            try:
+                await terminal_service.append_output(
+                    payload.get("session_id"), offset, payload.get("command_id"), payload.get("stream", "stdout"), data
+                )
+                stored = True
+            except Exception as e:
+                logger.error("Error storing terminal output: %s", e)
+
+        event = {
+            "command_id": payload.get("command_id"),
+            "session_id": payload.get("session_id"),
+            "stream": payload.get("stream", "stdout"),
+            "seq": payload.get("seq", 0),
+            "offset": offset,
+            "length": len(data),
+        }
+        # Without a stored copy to fetch, the text has to travel with the event.
+        if len(data) <= TERMINAL_SSE_DELTA_CHARS or not stored:
+            event["data"] = data
+        await sse_service.send_event("terminal_output_chunk", event)
+
+    @registry.on(CHANNEL, MESSAGE_TYPE, "exit", switch_component=False)
+    async def handle_exit(message: dict):
+        payload = message.get("payload", {})
+        try:
+            await terminal_service.record_exit(
+                payload.get("command_id"),
+                payload.get("exit_code"),
+                payload.get("timed_out", False),
+                payload.get("truncated", False),
+                payload.get("duration_ms", 0),
+                payload.get("end_offset"),
+                message.get("timestamp", int(time.time() * 1000))
+            )
+        except Exception as e:
+            logger.error("Error storing terminal command result: %s", e)
+        await sse_service.send_event("terminal_command_finished", {
+            "command_id": payload.get("command_id"),
+            "session_id": payload.get("session_id"),
+            "exit_code": payload.get("exit_code"),
+            "timed_out": payload.get("timed_out", False),
+            "truncated": payload.get("truncated", False),
+            "output_bytes": payload.get("output_bytes", 0),
+            "duration_ms": payload.get("duration_ms", 0),
+            "end_offset": payload.get("end_offset")
+        })
+
+    for action in ("ls", "cat", "bash"):
+        registry.register(CHANNEL, MESSAGE_TYPE, action, handle_command_executed)
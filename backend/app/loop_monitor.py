@@ -0,0 +1,199 @@
+"""Event-loop lag sampler and slow-callback detector.
+
+The sampler sleeps for a fixed interval and records how late it wakes up in
+``event_loop_lag_seconds``; any lag means something held the loop.
+
+To find out what, ``install()`` wraps ``asyncio.Handle._run`` (the same place
+asyncio debug mode measures ``slow_callback_duration``) with a timer cheap
+enough for production. A callback running longer than the threshold is
+attributed to the coroutine chain of its task at the point it yielded again,
+e.g. ``RedisService.listen_for_messages > RedisService._process_message >
+register_file_handlers.handle_create > FileService.create_file``, and the
+innermost application coroutine becomes the ``callback`` label of
+``event_loop_slow_callback_seconds``. Recent slow callbacks and per-callback
+totals are kept for the admin endpoint.
+
+Only the pure-Python asyncio loop runs callbacks through ``Handle._run``.
+Under uvloop (uvicorn's default when it is installed) the lag sampler still
+works but callbacks cannot be timed; the report says so instead of showing an
+empty list. Run uvicorn with ``--loop asyncio`` to get per-callback timing.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from .metrics import LOOP_LAG_SECONDS, LOOP_SLOW_CALLBACK_SECONDS
+
+logger = logging.getLogger(__name__)
+
+LAG_INTERVAL_SECONDS = float(os.getenv("LOOP_LAG_INTERVAL_SECONDS", "0.5"))
+SLOW_CALLBACK_THRESHOLD_SECONDS = float(os.getenv("LOOP_SLOW_CALLBACK_SECONDS", "0.1"))
+APP_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def _clean_name(qualname: str) -> str:
+    return qualname.replace("<locals>.", "")
+
+
+def coroutine_chain(coro) -> List[Tuple[str, str]]:
+    """``(qualname, filename)`` of ``coro`` and every coroutine it is awaiting, outermost first."""
+    chain = []
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None) or getattr(coro, "ag_frame", None)
+        if frame is None:
+            break
+        chain.append((getattr(coro, "__qualname__", frame.f_code.co_name), frame.f_code.co_filename))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None) or getattr(coro, "ag_await", None)
+    return chain
+
+
+class LoopMonitor:
+    """Loop lag sampler plus slow-callback report for one process."""
+
+    def __init__(self, app_root: str = APP_ROOT, interval: float = LAG_INTERVAL_SECONDS,
+                 slow_threshold: float = SLOW_CALLBACK_THRESHOLD_SECONDS, history: int = 100):
+        self.app_root = app_root
+        self.interval = interval
+        self.slow_threshold = slow_threshold
+        self.recent: deque = deque(maxlen=history)
+        self.totals: Dict[str, Dict[str, float]] = {}
+        self.lag_last = 0.0
+        self.lag_max = 0.0
+        self._original_run = None
+        self._task: Optional[asyncio.Task] = None
+        # Why per-callback timing is off on the running loop, if it is.
+        self.callback_timing_unavailable: Optional[str] = None
+
+    def install(self):
+        """Start timing every event loop callback. Idempotent."""
+        if self._original_run is not None:
+            return
+        original_run = self._original_run = asyncio.events.Handle._run
+        monitor = self
+
+        def _run(handle):
+            start = time.perf_counter()
+            original_run(handle)
+            duration = time.perf_counter() - start
+            if duration >= monitor.slow_threshold:
+                monitor._record_slow(handle, duration)
+
+        asyncio.events.Handle._run = _run
+
+    def uninstall(self):
+        if self._original_run is not None:
+            asyncio.events.Handle._run = self._original_run
+            self._original_run = None
+
+    def start(self):
+        """Install the callback timer and start the lag sampler on the running loop."""
+        loop = asyncio.get_running_loop()
+        if isinstance(loop, asyncio.BaseEventLoop):
+            self.callback_timing_unavailable = None
+            self.install()
+        else:
+            loop_type = f"{type(loop).__module__}.{type(loop).__qualname__}"
+            self.callback_timing_unavailable = (
+                f"{loop_type} does not run callbacks through asyncio.Handle._run; "
+                "start uvicorn with --loop asyncio for per-callback timing"
+            )
+            logger.warning("Slow-callback timing unavailable: %s. Only loop lag is sampled.",
+                           self.callback_timing_unavailable)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._sample_lag())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.uninstall()
+
+    async def _sample_lag(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(loop.time() - expected, 0.0)
+            LOOP_LAG_SECONDS.observe(lag)
+            self.lag_last = lag
+            self.lag_max = max(self.lag_max, lag)
+
+    def _describe(self, handle) -> Tuple[str, List[str], Optional[str]]:
+        """``(callback, chain, task name)`` for a handle that just ran."""
+        callback = handle._callback
+        task = getattr(callback, "__self__", None)
+        if not isinstance(task, asyncio.Task):
+            name = getattr(callback, "__qualname__", None) or repr(callback)
+            return _clean_name(name), [], None
+
+        coro = task.get_coro()
+        chain = [
+            (_clean_name(name), filename) for name, filename in coroutine_chain(coro)
+            if not name.endswith("<locals>.wrapper")
+        ]
+        if not chain:
+            # The task finished during this step, so only its entry point is known.
+            return _clean_name(getattr(coro, "__qualname__", repr(coro))), [], task.get_name()
+
+        app_frames = [name for name, filename in chain if filename.startswith(self.app_root)]
+        names = [name for name, _ in chain]
+        return (app_frames or names)[-1], app_frames or names, task.get_name()
+
+    def _record_slow(self, handle, duration: float):
+        try:
+            callback, chain, task_name = self._describe(handle)
+        except Exception:
+            callback, chain, task_name = "unknown", [], None
+        LOOP_SLOW_CALLBACK_SECONDS.observe(duration, callback=callback)
+
+        totals = self.totals.setdefault(callback, {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+        totals["count"] += 1
+        totals["total_seconds"] += duration
+        totals["max_seconds"] = max(totals["max_seconds"], duration)
+        self.recent.append({
+            "timestamp": int(time.time() * 1000),
+            "duration_seconds": round(duration, 6),
+            "callback": callback,
+            "chain": " > ".join(chain),
+            "task": task_name,
+        })
+        logger.warning("Slow event loop callback %s took %.3fs (%s)", callback, duration, " > ".join(chain) or task_name)
+
+    def report(self) -> Dict[str, Any]:
+        """Lag figures, per-callback totals (worst first) and the most recent slow callbacks."""
+        top = sorted(self.totals.items(), key=lambda item: item[1]["total_seconds"], reverse=True)
+        return {
+            "lag": {
+                "interval_seconds": self.interval,
+                "last_seconds": round(self.lag_last, 6),
+                "max_seconds": round(self.lag_max, 6),
+            },
+            "slow_callbacks": {
+                "available": self.callback_timing_unavailable is None,
+                "unavailable_reason": self.callback_timing_unavailable,
+                "threshold_seconds": self.slow_threshold,
+                "by_callback": [
+                    {"callback": name, "count": int(stats["count"]),
+                     "total_seconds": round(stats["total_seconds"], 6),
+                     "max_seconds": round(stats["max_seconds"], 6)}
+                    for name, stats in top
+                ],
+                "recent": list(reversed(self.recent)),
+            },
+        }
+
+    def reset(self):
+        self.recent.clear()
+        self.totals.clear()
+        self.lag_max = 0.0
+
+
+loop_monitor = LoopMonitor()
@@ -5,51 +5,103 @@ Handles business logic, manages component state, and provides SSE events.
 """
 
 import asyncio
+import logging
 import os
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from .compression import CompressionMiddleware
 from .database import database
+from . import offload
+from .logging_config import setup_logging
+from .loop_monitor import loop_monitor
+from .tracing import setup_tracing
+from .versions import collection_versions
+from .services.message_registry import MessageHandlerRegistry
 from .services.redis_service import RedisService
 from .services.sse_service import SSEService
 from .services.todo_service import TodoService
 from .services.backlog_service import BacklogService
-from .services.code_interpreter_service import CodeInterpreterService
-from .routers import todos, approvals, backlogs, events, health, agent, code_interpreter, files
+from .services.code_interpreter_service import CodeInterpreterService, CodeInterpreterPoller
+from .services.approval_service import approval_service, ApprovalSweeper
+from .services.file_service import file_service
+from .services.terminal_service import terminal_service
+from .services.agent_run_service import agent_run_service, AgentRunQueue
+from .handlers import (
+    register_agent_run_handlers,
+    register_approval_handlers,
+    register_backlog_handlers,
+    register_code_interpreter_handlers,
+    register_file_handlers,
+    register_plan_handlers,
+    register_terminal_handlers,
+)
+from .routers import todos, approvals, backlogs, events, health, metrics, admin, agent, code_interpreter, files, terminal
+
+setup_logging()
+setup_tracing("ui-component-backend")
+logger = logging.getLogger(__name__)
 
 
-redis_service = RedisService()
 sse_service = SSEService()
 todo_service = TodoService()
 backlog_service = BacklogService()
 code_interpreter_service = CodeInterpreterService()
 
+message_registry = MessageHandlerRegistry()
+register_plan_handlers(message_registry, todo_service, sse_service)
+register_backlog_handlers(message_registry, backlog_service, sse_service)
+register_terminal_handlers(message_registry, terminal_service, sse_service)
+register_approval_handlers(message_registry, approval_service, sse_service)
+register_code_interpreter_handlers(message_registry, code_interpreter_service, sse_service)
+register_file_handlers(message_registry, file_service, sse_service)
+
+redis_service = RedisService(message_registry, sse_service)
+approval_sweeper = ApprovalSweeper(approval_service, sse_service, redis_service)
+code_interpreter_poller = CodeInterpreterPoller(code_interpreter_service, redis_service)
+agent_run_queue = AgentRunQueue(agent_run_service, redis_service)
+register_agent_run_handlers(message_registry, agent_run_queue, sse_service)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager with proper cleanup."""
+    loop_monitor.start()
     await database.connect()
     
     redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
     await redis_service.connect(redis_url)
+    collection_versions.connect(redis_service.redis)
     
     redis_task = asyncio.create_task(redis_service.listen_for_messages())
     app.state.redis_task = redis_task
     
+    sweeper_task = asyncio.create_task(approval_sweeper.run())
+    app.state.sweeper_task = sweeper_task
+    
+    poller_task = asyncio.create_task(code_interpreter_poller.run())
+    app.state.poller_task = poller_task
+    
+    agent_run_task = asyncio.create_task(agent_run_queue.run())
+    app.state.agent_run_task = agent_run_task
+    
     yield
     
-    print("Shutting down services...")
-    redis_task.cancel()
-    try:
-        await redis_task
-    except asyncio.CancelledError:
-        pass
+    logger.info("Shutting down services...")
+    for task in (agent_run_task, poller_task, sweeper_task, redis_task):
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
         
     await redis_service.disconnect()
     await database.disconnect()
-    print("Services shut down complete")
+    offload.shutdown()
+    await loop_monitor.stop()
+    logger.info("Services shut down complete")
 
 
 app = FastAPI(
@@ -59,6 +111,8 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+app.add_middleware(CompressionMiddleware)
+
 cors_origins = os.getenv("CORS_ORIGINS", "http://localhost:3000,http://localhost:3001,http://localhost:5173").split(",")
 app.add_middleware(
     CORSMiddleware,
@@ -69,12 +123,15 @@ app.add_middleware(
 )
 
 app.include_router(health.router)
+app.include_router(metrics.router)
+app.include_router(admin.router)
 app.include_router(events.router)
 app.include_router(todos.router, prefix="/api")
 app.include_router(approvals.router, prefix="/api")
 app.include_router(backlogs.router, prefix="/api")
 app.include_router(code_interpreter.router, prefix="/api")
 app.include_router(files.router, prefix="/api")
+app.include_router(terminal.router, prefix="/api")
 app.include_router(agent.router, prefix="/api")
 
 app.state.redis_service = redis_service
@@ -82,6 +139,7 @@ app.state.sse_service = sse_service
 app.state.todo_service = todo_service
 app.state.backlog_service = backlog_service
 app.state.code_interpreter_service = code_interpreter_service
+app.state.agent_run_queue = agent_run_queue
 
 
 @app.get("/")
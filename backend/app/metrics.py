@@ -0,0 +1,256 @@
+"""Minimal Prometheus-style metrics.
+
+Counters, gauges and histograms with labels, rendered in the Prometheus text
+exposition format by ``render()``. Updates are plain dict operations on the
+event loop thread, so they are cheap enough for per-message hot paths.
+"""
+
+import functools
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from . import tracing
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """Base class holding name, help text and label names."""
+
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), registry: Optional["Registry"] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        (registry or REGISTRY).register(self)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        """Yield ``(suffix, formatted_labels, value)`` triples."""
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.metric_type}",
+        ]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    """Monotonically increasing counter."""
+
+    metric_type = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        for key, value in self._values.items():
+            yield "_total", _format_labels(self.labelnames, key), value
+
+
+class Gauge(Metric):
+    """Value that can go up and down."""
+
+    metric_type = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels):
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def samples(self):
+        for key, value in self._values.items():
+            yield "", _format_labels(self.labelnames, key), value
+
+
+class Histogram(Metric):
+    """Cumulative histogram with fixed upper bounds."""
+
+    metric_type = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        counts = self._counts.get(key)
+        if counts is None:
+            counts = self._counts[key] = [0] * len(self.buckets)
+            self._sums[key] = 0.0
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        self._sums[key] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall-clock duration of the ``with`` block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        for key, counts in self._counts.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield "_bucket", _format_labels(self.labelnames, key, le), cumulative
+            labels = _format_labels(self.labelnames, key)
+            yield "_sum", labels, self._sums[key]
+            yield "_count", labels, cumulative
+
+
+class Registry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: List[Metric] = []
+
+    def register(self, metric: Metric):
+        self._metrics.append(metric)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def render() -> str:
+    """Render every registered metric in Prometheus text format."""
+    return REGISTRY.render()
+
+
+REDIS_MESSAGES_RECEIVED = Counter(
+    "redis_messages_received", "Redis messages received", ["channel", "type"]
+)
+REDIS_MESSAGES_PROCESSED = Counter(
+    "redis_messages_processed", "Redis messages processed, by outcome", ["channel", "type", "status"]
+)
+REDIS_HANDLER_SECONDS = Histogram(
+    "redis_handler_duration_seconds", "Time spent in Redis message handlers", ["channel", "type", "action"]
+)
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds", "Database latency by service method", ["method"]
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections", "Database pool connections by state", ["state"]
+)
+SSE_CONNECTIONS = Gauge(
+    "sse_connections", "Open SSE connections"
+)
+TOOL_TO_UI_SECONDS = Histogram(
+    "tool_to_ui_latency_seconds",
+    "Time from MCP tool message creation to SSE delivery",
+    ["type", "action"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+SSE_QUEUE_DEPTH = Gauge(
+    "sse_queue_depth", "Pending events across SSE connection queues", ["stat"]
+)
+LOOP_BLOCKING_SECONDS = Histogram(
+    "event_loop_blocking_seconds",
+    "Time CPU-bound payload work ran inline on the event loop",
+    ["operation"],
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+)
+LOOP_LAG_SECONDS = Histogram(
+    "event_loop_lag_seconds",
+    "How late the loop lag sampler woke up",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+LOOP_SLOW_CALLBACK_SECONDS = Histogram(
+    "event_loop_slow_callback_seconds",
+    "Duration of event loop callbacks over the slow threshold, by innermost application coroutine",
+    ["callback"],
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+OFFLOAD_SECONDS = Histogram(
+    "offload_duration_seconds", "Time payload work took in the offload executor, including queueing", ["operation"]
+)
+COMPRESSION_BYTES = Counter(
+    "compression_bytes", "Response bytes before (in) and after (out) compression", ["transport", "encoding", "stage"]
+)
+CODE_INTERPRETER_POLLS = Counter(
+    "code_interpreter_polls", "Remote code interpreter state requests made by the poller, by outcome", ["outcome"]
+)
+AGENT_RUNS = Counter("agent_runs", "Agent runs finished by this worker, by final status", ["status"])
+AGENT_RUN_SECONDS = Histogram(
+    "agent_run_duration_seconds", "Time from start to finish of agent runs executed by this worker",
+    buckets=(1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0),
+)
+AGENT_RUNS_ACTIVE = Gauge("agent_runs_active", "Agent runs executing in this worker")
+
+
+def db_timed(func):
+    """Record the latency of an async service method in ``db_query_duration_seconds``.
+
+    The call is also traced as a ``db <method>`` span.
+    """
+    method = func.__qualname__
+    span_name = f"db {method}"
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            with tracing.start_span(span_name, attributes={"db.method": method}):
+                return await func(*args, **kwargs)
+        finally:
+            DB_QUERY_SECONDS.observe(time.perf_counter() - start, method=method)
+
+    return wrapper
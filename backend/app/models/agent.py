@@ -35,3 +35,22 @@ class AgentResponse(BaseModel):
     success: bool
     response: Any
     error: Optional[str] = None
+
+
+class AgentRun(BaseModel):
+    """Agent run job; ``output`` is the text of the last event that has any."""
+    id: str
+    session_id: str
+    message: str
+    status: str  # queued, running, completed, error, cancelled
+    output: Optional[str] = None
+    event_count: int = 0
+    error: Optional[str] = None
+    created_at: int
+    started_at: Optional[int] = None
+    finished_at: Optional[int] = None
+
+
+class AgentRunDetail(AgentRun):
+    """Agent run with every ADK event it produced."""
+    events: List[Any] = []
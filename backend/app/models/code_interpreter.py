@@ -7,11 +7,21 @@ class CodeInterpreterState(BaseModel):
     code: str
     description: Optional[str] = ""
     status: str = "pending"  # pending, running, completed, error
-    result: Optional[str] = None
+    result: Optional[str] = None  # summary; the full result is kept as artifacts
     widget_url: Optional[str] = None
+    result_size: Optional[int] = None  # bytes of the full result
+    result_truncated: bool = False
     created_at: int
     updated_at: int
 
+class CodeInterpreterArtifact(BaseModel):
+    id: str
+    state_id: str
+    name: str
+    mime_type: str
+    size: int
+    created_at: int
+
 class CodeInterpreterCreateRequest(BaseModel):
     code: str
     description: Optional[str] = ""
@@ -0,0 +1,32 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+class TerminalChunk(BaseModel):
+    offset: int
+    length: int  # characters (code points), the unit offsets are counted in
+    command_id: str
+    stream: str  # stdout, stderr
+    data: str
+
+class TerminalOutputPage(BaseModel):
+    session_id: str
+    offset: int
+    next_offset: int
+    length: int
+    has_more: bool
+    chunks: List[TerminalChunk]
+
+class TerminalCommandRecord(BaseModel):
+    id: str
+    session_id: str
+    command: str
+    tool: str
+    file: Optional[str] = ""
+    start_offset: Optional[int] = None
+    end_offset: Optional[int] = None
+    exit_code: Optional[int] = None
+    timed_out: bool = False
+    truncated: bool = False
+    duration_ms: Optional[int] = None
+    created_at: int
+    finished_at: Optional[int] = None
@@ -0,0 +1,122 @@
+"""Executor offload for CPU-heavy payload work.
+
+JSON encode/decode and UTF-8 sizing of large payloads (file contents, list
+broadcasts) run in an executor once the payload reaches
+``OFFLOAD_THRESHOLD_BYTES``; smaller payloads are handled inline, where a pool
+round trip would cost more than the work itself.
+
+``OFFLOAD_EXECUTOR`` selects the pool for stateless work. ``thread`` (default)
+helps for operations that release the GIL (compression, hashing, bytes
+copies); the C JSON encoder holds the GIL, so ``process`` is the setting that
+truly frees the loop for JSON-heavy workloads, at the cost of pickling the
+payload across. Stateful work such as a per-connection compression context
+always uses the thread pool.
+
+Time spent inline is recorded in ``event_loop_blocking_seconds`` and time spent
+in the pools in ``offload_duration_seconds``, both labelled by operation.
+"""
+
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional, Union
+
+from .metrics import LOOP_BLOCKING_SECONDS, OFFLOAD_SECONDS
+
+OFFLOAD_THRESHOLD_BYTES = int(os.getenv("OFFLOAD_THRESHOLD_BYTES", "65536"))
+OFFLOAD_WORKERS = int(os.getenv("OFFLOAD_WORKERS", "4"))
+OFFLOAD_EXECUTOR = os.getenv("OFFLOAD_EXECUTOR", "thread")
+
+_thread_pool: Optional[ThreadPoolExecutor] = None
+_cpu_pool: Optional[Executor] = None
+
+
+def thread_pool() -> ThreadPoolExecutor:
+    """Shared thread pool, created on first use."""
+    global _thread_pool
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(max_workers=OFFLOAD_WORKERS, thread_name_prefix="offload")
+    return _thread_pool
+
+
+def cpu_pool() -> Executor:
+    """Pool for stateless work: the thread pool, or a process pool if configured."""
+    global _cpu_pool
+    if _cpu_pool is None:
+        if OFFLOAD_EXECUTOR == "process":
+            _cpu_pool = ProcessPoolExecutor(max_workers=OFFLOAD_WORKERS)
+        else:
+            _cpu_pool = thread_pool()
+    return _cpu_pool
+
+
+def shutdown():
+    """Shut the pools down; called from the application lifespan."""
+    global _thread_pool, _cpu_pool
+    for pool in {id(p): p for p in (_cpu_pool, _thread_pool) if p is not None}.values():
+        pool.shutdown(wait=False, cancel_futures=True)
+    _thread_pool = _cpu_pool = None
+
+
+async def run(operation: str, size: int, func: Callable, *args, executor: Optional[Executor] = None) -> Any:
+    """Run ``func(*args)`` inline or, for payloads of ``size`` >= the threshold, in an executor."""
+    start = time.perf_counter()
+    if size < OFFLOAD_THRESHOLD_BYTES:
+        try:
+            return func(*args)
+        finally:
+            LOOP_BLOCKING_SECONDS.observe(time.perf_counter() - start, operation=operation)
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(executor or cpu_pool(), func, *args)
+    finally:
+        OFFLOAD_SECONDS.observe(time.perf_counter() - start, operation=operation)
+
+
+def _utf8_size(text: str) -> int:
+    return len(text.encode("utf-8"))
+
+
+async def utf8_size(text: str) -> int:
+    """Size of ``text`` in UTF-8 bytes."""
+    # ASCII-only strings are flagged by CPython, so this check is O(1) and
+    # the common case needs no encoding at all.
+    if text.isascii():
+        return len(text)
+    return await run("utf8_size", len(text), _utf8_size, text)
+
+
+async def dumps(obj: Any, size_hint: int = 0) -> str:
+    """``json.dumps(obj)``, offloaded when ``size_hint`` reaches the threshold."""
+    return await run("json_encode", size_hint, json.dumps, obj)
+
+
+async def loads(data: Union[str, bytes]) -> Any:
+    """``json.loads(data)``, offloaded for large inputs."""
+    return await run("json_decode", len(data), json.loads, data)
+
+
+def estimate_size(obj: Any, limit: int = OFFLOAD_THRESHOLD_BYTES) -> int:
+    """Cheap lower bound of the JSON size of ``obj``, summing string lengths.
+
+    Walks containers until the running total reaches ``limit`` so payloads
+    that are obviously large stop the walk early.
+    """
+    total = 0
+    stack = [obj]
+    while stack and total < limit:
+        value = stack.pop()
+        if isinstance(value, str):
+            total += len(value) + 2
+        elif isinstance(value, dict):
+            total += 2 * len(value)
+            stack.extend(value.keys())
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            total += len(value)
+            stack.extend(value)
+        else:
+            total += 8
+    return total
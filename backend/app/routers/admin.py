@@ -0,0 +1,20 @@
+"""Admin diagnostics router."""
+
+from fastapi import APIRouter
+
+from ..loop_monitor import loop_monitor
+
+router = APIRouter()
+
+
+@router.get("/admin/loop")
+async def loop_report():
+    """Event loop lag and the slow-callback report for this worker."""
+    return loop_monitor.report()
+
+
+@router.post("/admin/loop/reset")
+async def reset_loop_report():
+    """Clear the slow-callback history and the maximum lag."""
+    loop_monitor.reset()
+    return {"success": True}
@@ -1,33 +1,48 @@
 """Agent API router."""
 
+import json
+import logging
 import os
+from typing import AsyncIterator, List, Optional
 import httpx
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 
-from ..models.agent import AgentMessageRequest, AgentResponse, AgentRequest, NewMessage, MessagePart
+from ..models.agent import AgentMessageRequest, AgentResponse, AgentRun, AgentRunDetail
+from ..services.agent_run_service import AGENT_URL, agent_request, agent_run_service
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+AGENT_CONNECT_TIMEOUT_SECONDS = float(os.getenv("AGENT_CONNECT_TIMEOUT_SECONDS", "10"))
+# Between two events of a streamed run; sub-agents and tool calls can be silent for a while.
+AGENT_STREAM_IDLE_TIMEOUT_SECONDS = float(os.getenv("AGENT_STREAM_IDLE_TIMEOUT_SECONDS", "300"))
+
+
+async def _relay(client: httpx.AsyncClient, response: httpx.Response) -> AsyncIterator[bytes]:
+    # Bytes are passed on as they arrive. When the client disconnects the
+    # response task is cancelled, and closing the upstream response here drops
+    # the connection to the agent, which ends the run there too.
+    try:
+        async for chunk in response.aiter_raw():
+            yield chunk
+    except httpx.HTTPError as e:
+        logger.error("Agent stream interrupted: %s", e)
+        yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n".encode()
+    finally:
+        await response.aclose()
+        await client.aclose()
+
 
 @router.post("/agent/message", response_model=AgentResponse)
 async def send_message_to_agent(message_data: AgentMessageRequest, request: Request):
     """Send message to Google ADK Agent."""
     try:
-        agent_request = AgentRequest(
-            appName="agent",
-            userId="user",
-            sessionId=message_data.sessionId or os.getenv("SESSION_ID", "demo"),
-            newMessage=NewMessage(
-                parts=[MessagePart(text=message_data.message)],
-                role="user"
-            ),
-            streaming=False
-        )
-        
         async with httpx.AsyncClient() as client:
             response = await client.post(
-                "http://ui-mcp-agent:8002/run",
-                json=agent_request.dict(),
+                f"{AGENT_URL}/run",
+                json=agent_request(message_data, streaming=False).dict(),
                 timeout=30.0
             )
             response.raise_for_status()
@@ -50,13 +65,104 @@ async def send_message_to_agent(message_data: AgentMessageRequest, request: Requ
         )
 
 
+@router.post("/agent/message/stream")
+async def stream_message_to_agent(message_data: AgentMessageRequest):
+    """Run the agent in SSE mode and relay its events to the client as they are produced.
+    
+    The agent's ``/run_sse`` stream is passed through unchanged: one ``data:``
+    line per ADK event, with partial text events as tokens are generated.
+    """
+    client = httpx.AsyncClient(timeout=httpx.Timeout(AGENT_STREAM_IDLE_TIMEOUT_SECONDS, connect=AGENT_CONNECT_TIMEOUT_SECONDS))
+    try:
+        response = await client.send(
+            client.build_request(
+                "POST",
+                f"{AGENT_URL}/run_sse",
+                json=agent_request(message_data, streaming=True).dict(),
+                headers={"Accept": "text/event-stream"}
+            ),
+            stream=True
+        )
+        if response.is_error:
+            detail = (await response.aread()).decode(errors="replace")
+            await response.aclose()
+            raise HTTPException(status_code=502, detail=f"Agent returned {response.status_code}: {detail}")
+    except httpx.HTTPError as e:
+        await client.aclose()
+        raise HTTPException(
+            status_code=502,
+            detail=f"Failed to communicate with agent: {str(e)}"
+        )
+    except BaseException:
+        await client.aclose()
+        raise
+    
+    return StreamingResponse(
+        _relay(client, response),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            # Tell proxies such as nginx not to buffer the stream.
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
+@router.post("/agent/runs", response_model=AgentRun, status_code=202)
+async def submit_agent_run(message_data: AgentMessageRequest, request: Request):
+    """Queue an agent run and return its id without waiting for it.
+    
+    Progress arrives as ``agent_run_updated`` / ``agent_run_progress`` SSE
+    events; the result is read from ``GET /agent/runs/{run_id}``.
+    """
+    agent_run_queue = request.app.state.agent_run_queue
+    session_id = agent_request(message_data, streaming=False).sessionId
+    return await agent_run_queue.submit(session_id, message_data.message)
+
+
+@router.get("/agent/runs", response_model=List[AgentRun])
+async def get_agent_runs(
+    session_id: Optional[str] = Query(None, alias="sessionId"),
+    limit: int = Query(50, ge=1, le=500)
+):
+    """Most recent agent runs, optionally of one session."""
+    return await agent_run_service.get_runs(session_id, limit)
+
+
+@router.get("/agent/runs/{run_id}", response_model=AgentRunDetail)
+async def get_agent_run(run_id: str):
+    """An agent run with its status, output and events."""
+    run = await agent_run_service.get_run(run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Run not found")
+    return run
+
+
+@router.post("/agent/runs/{run_id}/cancel", response_model=AgentRun)
+async def cancel_agent_run(run_id: str, request: Request):
+    """Cancel a queued or running agent run.
+    
+    A running run stops asynchronously; its ``cancelled`` status arrives as an
+    ``agent_run_updated`` event.
+    """
+    agent_run_queue = request.app.state.agent_run_queue
+    run = await agent_run_service.get_run(run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Run not found")
+    if run.status not in ("queued", "running"):
+        raise HTTPException(status_code=409, detail=f"Run already {run.status}")
+    cancelled = await agent_run_queue.cancel(run_id)
+    return cancelled or run
+
+
 @router.get("/agent/health")
 async def check_agent_health():
     """Check agent health status."""
     try:
         async with httpx.AsyncClient() as client:
             response = await client.get(
-                "http://ui-mcp-agent:8002/health",
+                f"{AGENT_URL}/health",
                 timeout=5.0
             )
             return {"status": "healthy", "agent_status": response.status_code}
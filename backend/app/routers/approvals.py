@@ -1,21 +1,38 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
+import logging
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import JSONResponse
+from typing import List, Optional
 from ..models.approval import Approval, ApprovalRequest, ApprovalResponse
-from ..services.approval_service import approval_service
+from ..services.approval_service import approval_service, publish_approval_result
+from ..streaming import stream_query, stream_rows
+from ..versions import APPROVALS, CacheValidators, cache_validators, with_validators
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 @router.get("/approvals", response_model=List[Approval])
-async def get_approvals():
-    """Get all approval requests."""
+async def get_approvals(
+    status: Optional[str] = Query(None, description="Only return approvals with this status, e.g. pending"),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    stream: Optional[str] = stream_query(),
+    validators: Optional[CacheValidators] = cache_validators(APPROVALS)
+):
+    """Get approval requests, optionally filtered by status."""
+    if stream:
+        return with_validators(
+            stream_rows(approval_service.stream_approval_rows(status=status, limit=limit), stream, "approvals"),
+            validators
+        )
     try:
-        approvals = await approval_service.get_all_approvals()
-        return approvals
+        return with_validators(
+            JSONResponse(await approval_service.get_approval_rows(status=status, limit=limit)), validators
+        )
     except Exception as e:
-        print(f"Error getting approvals: {str(e)}")
+        logger.exception("Error getting approvals: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/approvals/{approval_id}", response_model=Approval)
+@router.get("/approvals/{approval_id}", response_model=Approval, dependencies=[cache_validators(APPROVALS)])
 async def get_approval(approval_id: str):
     """Get a specific approval request."""
     approval = await approval_service.get_approval(approval_id)
@@ -27,13 +44,16 @@ async def get_approval(approval_id: str):
 async def approve_request(approval_id: str):
     """Approve an approval request."""
     try:
-        from ..main import sse_service
+        from ..main import redis_service, sse_service
         
         # Update approval status in the database
         approval = await approval_service.update_approval_status(approval_id, "approved", "Request approved by human")
         if not approval:
             raise HTTPException(status_code=404, detail="Approval not found")
         
+        # Notify the agent waiting on this approval
+        await publish_approval_result(redis_service, approval)
+        
         # Send SSE event for real-time updates
         await sse_service.send_event("approval_updated", {
             "approval": approval.dict(),
@@ -48,20 +68,23 @@ async def approve_request(approval_id: str):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error approving request: {str(e)}")
+        logger.exception("Error approving request: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/approvals/{approval_id}/reject", response_model=ApprovalResponse)
 async def reject_request(approval_id: str):
     """Reject an approval request."""
     try:
-        from ..main import sse_service
+        from ..main import redis_service, sse_service
         
         # Update approval status in the database
         approval = await approval_service.update_approval_status(approval_id, "rejected", "Request rejected by human")
         if not approval:
             raise HTTPException(status_code=404, detail="Approval not found")
         
+        # Notify the agent waiting on this approval
+        await publish_approval_result(redis_service, approval)
+        
         # Send SSE event for real-time updates
         await sse_service.send_event("approval_updated", {
             "approval": approval.dict(),
@@ -76,7 +99,7 @@ async def reject_request(approval_id: str):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error rejecting request: {str(e)}")
+        logger.exception("Error rejecting request: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.delete("/approvals/{approval_id}")
@@ -95,5 +118,5 @@ async def delete_approval(approval_id: str):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error deleting approval: {str(e)}")
+        logger.exception("Error deleting approval: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,18 +1,27 @@
 """Backlog API router."""
 
-from typing import List
+from typing import List, Optional
 from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse
 
 from ..models.backlog import Backlog, BacklogCreate, BacklogUpdate
+from ..streaming import stream_query, stream_rows
+from ..versions import BACKLOGS, CacheValidators, cache_validators, with_validators
 
 router = APIRouter()
 
 
 @router.get("/backlogs", response_model=List[Backlog])
-async def get_backlogs(request: Request):
+async def get_backlogs(
+    request: Request,
+    stream: Optional[str] = stream_query(),
+    validators: Optional[CacheValidators] = cache_validators(BACKLOGS)
+):
     """Get all backlog items."""
     backlog_service = request.app.state.backlog_service
-    return await backlog_service.get_all_backlogs()
+    if stream:
+        return with_validators(stream_rows(backlog_service.stream_backlog_rows(), stream, "backlogs"), validators)
+    return with_validators(JSONResponse(await backlog_service.get_all_backlog_rows()), validators)
 
 
 @router.post("/backlogs", response_model=Backlog)
@@ -70,7 +79,6 @@ async def send_backlog_to_todo(backlog_id: str, request: Request):
     sse_service = request.app.state.sse_service
     
     result = await backlog_service.send_to_todo(backlog_id)
-    print(f"send_backlog_to_todo 0000000000: {result}")
     if not result:
         raise HTTPException(status_code=404, detail="Backlog not found")
     
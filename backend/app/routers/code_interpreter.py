@@ -1,20 +1,49 @@
 """Code interpreter API router."""
 
-from typing import List
+from typing import List, Optional
 from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse
 
-from ..models.code_interpreter import CodeInterpreterState, CodeInterpreterCreateRequest, CodeInterpreterUpdateRequest
+from ..models.code_interpreter import (
+    CodeInterpreterArtifact, CodeInterpreterState, CodeInterpreterCreateRequest, CodeInterpreterUpdateRequest
+)
+from ..streaming import stream_bytes, stream_query, stream_rows
+from ..versions import CODE_INTERPRETER_STATES, CacheValidators, cache_validators, with_validators
 
 router = APIRouter()
 
+# Artifacts come from executed code. Only raster images are served as-is;
+# anything else (HTML, SVG, ...) is sandboxed so its scripts cannot reach
+# the API with the page's origin.
+RASTER_MIME_TYPES = {"image/png", "image/jpeg", "image/gif", "image/webp"}
+
+
+def _artifact_headers(mime_type: str) -> dict:
+    """Security headers for serving an artifact of ``mime_type`` inline."""
+    headers = {"X-Content-Type-Options": "nosniff"}
+    if mime_type.split(";")[0].strip().lower() not in RASTER_MIME_TYPES:
+        headers["Content-Security-Policy"] = "sandbox"
+    return headers
+
 @router.get("/code-interpreter/states", response_model=List[CodeInterpreterState])
-async def get_all_states(request: Request):
+async def get_all_states(
+    request: Request,
+    stream: Optional[str] = stream_query(),
+    validators: Optional[CacheValidators] = cache_validators(CODE_INTERPRETER_STATES)
+):
     """Get all code interpreter states."""
     code_interpreter_service = request.app.state.code_interpreter_service
-    states = await code_interpreter_service.get_all_states()
-    return states
+    if stream:
+        return with_validators(
+            stream_rows(code_interpreter_service.stream_state_rows(), stream, "code interpreter states"), validators
+        )
+    return with_validators(JSONResponse(await code_interpreter_service.get_all_state_rows()), validators)
 
-@router.get("/code-interpreter/states/{state_id}", response_model=CodeInterpreterState)
+@router.get(
+    "/code-interpreter/states/{state_id}",
+    response_model=CodeInterpreterState,
+    dependencies=[cache_validators(CODE_INTERPRETER_STATES)]
+)
 async def get_notebook_state(state_id: str, request: Request):
     """Get a specific code interpreter state."""
     code_interpreter_service = request.app.state.code_interpreter_service
@@ -23,6 +52,27 @@ async def get_notebook_state(state_id: str, request: Request):
         raise HTTPException(status_code=404, detail="State not found")
     return state
 
+@router.get("/code-interpreter/states/{state_id}/artifacts", response_model=List[CodeInterpreterArtifact])
+async def get_artifacts(state_id: str, request: Request):
+    """List a state's stored outputs (full result, stdout, images, rich outputs)."""
+    code_interpreter_service = request.app.state.code_interpreter_service
+    return await code_interpreter_service.get_artifacts(state_id)
+
+@router.get("/code-interpreter/states/{state_id}/artifacts/{artifact_id}")
+async def get_artifact_content(state_id: str, artifact_id: str, request: Request):
+    """Stream one artifact's content with its stored media type."""
+    code_interpreter_service = request.app.state.code_interpreter_service
+    artifact = await code_interpreter_service.get_artifact(state_id, artifact_id)
+    if not artifact:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    return stream_bytes(
+        code_interpreter_service.stream_artifact(artifact_id),
+        artifact.mime_type,
+        f"code interpreter artifact {artifact_id}",
+        size=artifact.size,
+        headers=_artifact_headers(artifact.mime_type)
+    )
+
 @router.post("/code-interpreter/states", response_model=CodeInterpreterState)
 async def create_python_notebook(state_data: CodeInterpreterCreateRequest, request: Request):
     """Create a new code interpreter state."""
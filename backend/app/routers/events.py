@@ -1,24 +1,35 @@
 """SSE events router."""
 
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Query, Request
 from fastapi.responses import StreamingResponse
 
+from ..compression import negotiate_encoding
+
 router = APIRouter()
 
 
 @router.get("/events")
-async def stream_events(request: Request):
+async def stream_events(
+    request: Request,
+    compress: bool = Query(False, description="Compress the stream if the client accepts gzip or br")
+):
     """Stream SSE events to clients."""
 
     sse_service = request.app.state.sse_service
+    headers = {
+        "Cache-Control": "no-cache",
+        "Connection": "keep-alive",
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Allow-Headers": "Cache-Control"
+    }
+    
+    encoding = negotiate_encoding(request.headers.get("accept-encoding", "")) if compress else None
+    if encoding:
+        headers["Content-Encoding"] = encoding
+        headers["Vary"] = "Accept-Encoding"
     
     return StreamingResponse(
-        sse_service.event_stream(request),
+        sse_service.event_stream(request, encoding),
         media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Headers": "Cache-Control"
-        }
+        headers=headers
     )
@@ -1,29 +1,32 @@
+import logging
 from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi.responses import JSONResponse
+from typing import List, Optional
 import uuid
 import time
 import os
+from .. import offload
 from ..models.file import File, FileCreate, FileResponse
 from ..services.file_service import file_service
+from ..streaming import stream_query, stream_rows
+from ..versions import FILES, CacheValidators, cache_validators, with_validators
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 @router.get("/files", response_model=List[FileResponse])
-async def get_files():
+async def get_files(
+    stream: Optional[str] = stream_query(),
+    validators: Optional[CacheValidators] = cache_validators(FILES)
+):
     """Get all files."""
+    if stream:
+        return with_validators(stream_rows(file_service.stream_file_rows(), stream, "files"), validators)
     try:
-        files = await file_service.get_all_files()
-        return [FileResponse(
-            id=f.id,
-            name=f.name,
-            type=f.type,
-            path=f.path,
-            size=f.size,
-            created_at=f.created_at,
-            updated_at=f.updated_at
-        ) for f in files]
+        return with_validators(JSONResponse(await file_service.get_all_file_rows(include_content=False)), validators)
     except Exception as e:
-        print(f"Error getting files: {str(e)}")
+        logger.exception("Error getting files: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/files", response_model=FileResponse)
@@ -38,7 +41,7 @@ async def create_file(file_data: FileCreate):
             name=file_data.name,
             type=file_data.type,
             path=file_data.path,
-            size=len(file_data.content.encode('utf-8')) if file_data.content else None,
+            size=await offload.utf8_size(file_data.content) if file_data.content else None,
             content=file_data.content,
             created_at=int(time.time() * 1000),
             updated_at=int(time.time() * 1000)
@@ -58,10 +61,10 @@ async def create_file(file_data: FileCreate):
             updated_at=created_file.updated_at
         )
     except Exception as e:
-        print(f"Error creating file: {str(e)}")
+        logger.exception("Error creating file: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/files/{file_id}", response_model=File)
+@router.get("/files/{file_id}", response_model=File, dependencies=[cache_validators(FILES)])
 async def get_file(file_id: str):
     """Get a specific file."""
     file = await file_service.get_file(file_id)
@@ -85,5 +88,5 @@ async def delete_file(file_id: str):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error deleting file: {str(e)}")
+        logger.exception("Error deleting file: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
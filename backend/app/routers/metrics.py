@@ -0,0 +1,23 @@
+"""Prometheus metrics router."""
+
+from fastapi import APIRouter, Request
+from fastapi.responses import PlainTextResponse
+
+from ..database import database
+from ..metrics import CONTENT_TYPE, DB_POOL_CONNECTIONS, SSE_CONNECTIONS, SSE_QUEUE_DEPTH, render
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics(request: Request):
+    """Expose pipeline metrics in Prometheus text format."""
+    for state, value in database.pool_stats().items():
+        DB_POOL_CONNECTIONS.set(value, state=state)
+    
+    sse_stats = request.app.state.sse_service.stats()
+    SSE_CONNECTIONS.set(sse_stats["connections"])
+    SSE_QUEUE_DEPTH.set(sse_stats["queue_depth_total"], stat="total")
+    SSE_QUEUE_DEPTH.set(sse_stats["queue_depth_max"], stat="max")
+    
+    return PlainTextResponse(render(), media_type=CONTENT_TYPE)
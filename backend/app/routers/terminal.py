@@ -0,0 +1,37 @@
+"""Terminal history API router."""
+
+import logging
+from typing import List
+
+from fastapi import APIRouter, HTTPException, Query
+
+from ..models.terminal import TerminalCommandRecord, TerminalOutputPage
+from ..services.terminal_service import MAX_PAGE_CHUNKS, terminal_service
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@router.get("/terminal/{session_id}/output", response_model=TerminalOutputPage)
+async def get_terminal_output(
+    session_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(200, ge=1, le=MAX_PAGE_CHUNKS)
+):
+    """Page through a terminal session's output from ``offset``; continue from ``next_offset``."""
+    try:
+        return await terminal_service.get_output(session_id, offset, limit)
+    except Exception as e:
+        logger.exception("Error getting terminal output: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/terminal/{session_id}/commands", response_model=List[TerminalCommandRecord])
+async def get_terminal_commands(session_id: str, limit: int = Query(100, ge=1, le=MAX_PAGE_CHUNKS)):
+    """The session's most recent commands, oldest first, with the offsets of their output."""
+    try:
+        return await terminal_service.get_commands(session_id, limit)
+    except Exception as e:
+        logger.exception("Error getting terminal commands: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
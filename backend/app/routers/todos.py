@@ -1,19 +1,27 @@
 """Todo API router."""
 
-from typing import List
+from typing import List, Optional
 from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse
 
 from ..models.todo import Todo, TodoCreate, TodoUpdate
+from ..streaming import stream_query, stream_rows
+from ..versions import TODOS, CacheValidators, cache_validators, with_validators
 
 router = APIRouter()
 
 
 @router.get("/todos", response_model=List[Todo])
-async def get_todos(request: Request):
+async def get_todos(
+    request: Request,
+    stream: Optional[str] = stream_query(),
+    validators: Optional[CacheValidators] = cache_validators(TODOS)
+):
     """Get all todo items."""
     todo_service = request.app.state.todo_service
-    todos = await todo_service.get_all_todos()
-    return todos
+    if stream:
+        return with_validators(stream_rows(todo_service.stream_todo_rows(), stream, "todos"), validators)
+    return with_validators(JSONResponse(await todo_service.get_all_todo_rows()), validators)
 
 
 @router.post("/todos", response_model=Todo)
@@ -0,0 +1,377 @@
+"""Agent run jobs.
+
+``POST /api/agent/runs`` stores a run as ``queued`` in ``agent_runs`` and
+returns at once. Every backend worker runs an ``AgentRunQueue`` that claims
+queued runs and executes up to ``AGENT_RUN_WORKERS`` of them at a time against
+the agent's ``/run_sse`` endpoint, so long LLM calls never hold an HTTP request
+or a request slot.
+
+Runs of one session execute one at a time, in submission order, across all
+workers: a worker only claims a run while holding the session's Redis lease
+(``agent_runs:session:<session_id>``), renewed for as long as the run lasts.
+Renewal and release only succeed for the worker that holds the lease; a run
+whose lease lapses anyway is stopped, since another worker may already be
+running the session's next one.
+A ``running`` run whose session has no lease was left behind by a worker that
+died, and is failed by the next dispatch pass.
+
+Progress is published on ``agent:runs`` so every worker pushes it to its own
+SSE clients: ``agent_run_updated`` on each status change and
+``agent_run_progress`` for each ADK event.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+import aiomysql
+import httpx
+
+from ..database import database
+from ..metrics import AGENT_RUN_SECONDS, AGENT_RUNS, AGENT_RUNS_ACTIVE, db_timed
+from ..models.agent import AgentMessageRequest, AgentRequest, AgentRun, AgentRunDetail, MessagePart, NewMessage
+
+logger = logging.getLogger(__name__)
+
+AGENT_URL = os.getenv("AGENT_URL", "http://ui-mcp-agent:8002")
+CHANNEL = "agent:runs"
+MESSAGE_TYPE = "agent_run_action"
+# Error recorded for a run stopped for each ``cancel_local`` reason.
+CANCEL_ERRORS = {
+    "cancelled": None,
+    "shutdown": "Backend worker shut down during the run",
+    "lease_lost": "Backend worker lost the session lease during the run",
+}
+RUN_COLUMNS = "id, session_id, message, status, output, event_count, error, created_at, started_at, finished_at"
+FINISHED_STATUSES = ("completed", "error", "cancelled")
+
+
+def agent_request(message_data: AgentMessageRequest, streaming: bool) -> AgentRequest:
+    """Request body for the agent's ``/run`` and ``/run_sse`` endpoints."""
+    return AgentRequest(
+        appName="agent",
+        userId="user",
+        sessionId=message_data.sessionId or os.getenv("SESSION_ID", "demo"),
+        newMessage=NewMessage(
+            parts=[MessagePart(text=message_data.message)],
+            role="user"
+        ),
+        streaming=streaming
+    )
+
+
+def agent_run_message(action: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Wrap ``data`` in the envelope the ``agent:runs`` handlers expect."""
+    return {
+        "id": str(uuid.uuid4()),
+        "type": MESSAGE_TYPE,
+        "timestamp": int(time.time() * 1000),
+        "source": "backend",
+        "payload": {"action": action, "data": data},
+    }
+
+
+def event_text(event: Any) -> str:
+    """Concatenated text parts of an ADK event."""
+    if not isinstance(event, dict):
+        return ""
+    parts = (event.get("content") or {}).get("parts") or []
+    return "".join(part.get("text") or "" for part in parts if isinstance(part, dict))
+
+
+class AgentRunService:
+    """Agent run store, in MySQL."""
+
+    @db_timed
+    async def create_run(self, session_id: str, message: str) -> AgentRun:
+        run = AgentRun(
+            id=str(uuid.uuid4()),
+            session_id=session_id,
+            message=message,
+            status="queued",
+            created_at=int(time.time() * 1000)
+        )
+        async with database.get_connection() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(
+                    """INSERT INTO agent_runs (id, session_id, message, status, created_at)
+                       VALUES (%s, %s, %s, %s, %s)""",
+                    (run.id, run.session_id, run.message, run.status, run.created_at)
+                )
+                await conn.commit()
+        return run
+
+    @db_timed
+    async def get_run(self, run_id: str) -> Optional[AgentRunDetail]:
+        async with database.get_connection() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(f"SELECT {RUN_COLUMNS}, events FROM agent_runs WHERE id = %s", (run_id,))
+                row = await cursor.fetchone()
+        if not row:
+            return None
+        events = row.pop("events")
+        return AgentRunDetail(**row, events=json.loads(events) if events else [])
+
+    @db_timed
+    async def get_runs(self, session_id: Optional[str] = None, limit: int = 50) -> List[AgentRun]:
+        """Most recent runs first, optionally of one session."""
+        where, params = ("WHERE session_id = %s", [session_id]) if session_id else ("", [])
+        async with database.get_connection() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(
+                    f"SELECT {RUN_COLUMNS} FROM agent_runs {where} ORDER BY created_at DESC LIMIT %s",
+                    params + [limit]
+                )
+                return [AgentRun(**row) for row in await cursor.fetchall()]
+
+    @db_timed
+    async def get_runs_by_status(self, status: str, limit: int) -> List[AgentRun]:
+        """Oldest first, so queued runs are claimed in submission order."""
+        async with database.get_connection() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(
+                    f"SELECT {RUN_COLUMNS} FROM agent_runs WHERE status = %s ORDER BY created_at LIMIT %s",
+                    (status, limit)
+                )
+                return [AgentRun(**row) for row in await cursor.fetchall()]
+
+    @db_timed
+    async def start_run(self, run_id: str) -> Optional[AgentRun]:
+        """Move a queued run to ``running``; None if it is no longer queued."""
+        started_at = int(time.time() * 1000)
+        async with database.get_connection() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(
+                    "UPDATE agent_runs SET status = 'running', started_at = %s WHERE id = %s AND status = 'queued'",
+                    (started_at, run_id)
+                )
+                await conn.commit()
+                if not cursor.rowcount:
+                    return None
+                await cursor.execute(f"SELECT {RUN_COLUMNS} FROM agent_runs WHERE id = %s", (run_id,))
+                return AgentRun(**await cursor.fetchone())
+
+    @db_timed
+    async def finish_run(self, run_id: str, status: str, events: List[Any], output: Optional[str] = None,
+                         error: Optional[str] = None, from_statuses=("queued", "running")) -> Optional[AgentRun]:
+        """Record the outcome of a run that is still in one of ``from_statuses``."""
+        finished_at = int(time.time() * 1000)
+        placeholders = ", ".join(["%s"] * len(from_statuses))
+        async with database.get_connection() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(
+                    f"""UPDATE agent_runs
+                        SET status = %s, output = %s, events = %s, event_count = %s, error = %s, finished_at = %s
+                        WHERE id = %s AND status IN ({placeholders})""",
+                    (status, output, json.dumps(events, ensure_ascii=False), len(events), error, finished_at,
+                     run_id, *from_statuses)
+                )
+                await conn.commit()
+                if not cursor.rowcount:
+                    return None
+                await cursor.execute(f"SELECT {RUN_COLUMNS} FROM agent_runs WHERE id = %s", (run_id,))
+                return AgentRun(**await cursor.fetchone())
+
+
+class AgentRunQueue:
+    """Claims queued agent runs and executes them in this worker."""
+
+    LEASE_PREFIX = "agent_runs:session:"
+
+    def __init__(self, agent_run_service: AgentRunService, redis_service):
+        self.agent_run_service = agent_run_service
+        self.redis_service = redis_service
+        self.workers = int(os.getenv("AGENT_RUN_WORKERS", "2"))
+        self.poll_interval = float(os.getenv("AGENT_RUN_POLL_INTERVAL_SECONDS", "1"))
+        self.timeout = float(os.getenv("AGENT_RUN_TIMEOUT_SECONDS", "1800"))
+        self.lease_ttl = int(os.getenv("AGENT_RUN_LEASE_SECONDS", "60"))
+        self.lease_id = uuid.uuid4().hex
+        # run id -> task executing it in this worker
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self._cancel_reasons: Dict[str, str] = {}
+        self._wake = asyncio.Event()
+
+    async def run(self):
+        """Dispatch forever; woken early by ``notify`` when a run is submitted here."""
+        try:
+            while True:
+                try:
+                    await self.dispatch()
+                except Exception as e:
+                    logger.exception("Error in agent run queue: %s", e)
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+        finally:
+            await self.close()
+
+    def notify(self):
+        self._wake.set()
+
+    async def submit(self, session_id: str, message: str) -> AgentRun:
+        """Store a queued run and announce it."""
+        run = await self.agent_run_service.create_run(session_id, message)
+        await self._publish_status(run)
+        self.notify()
+        return run
+
+    async def cancel(self, run_id: str) -> Optional[AgentRun]:
+        """Cancel a queued run here, or ask the worker executing it to stop.
+
+        Returns the cancelled run, or None if it is running (it is announced
+        once its worker has stopped it) or already finished.
+        """
+        run = await self.agent_run_service.finish_run(run_id, "cancelled", [], from_statuses=("queued",))
+        if run:
+            await self._publish_status(run)
+            return run
+        await self.redis_service.publish_message(CHANNEL, agent_run_message("cancel", {"run_id": run_id}))
+        return None
+
+    def cancel_local(self, run_id: str, reason: str = "cancelled") -> bool:
+        """Stop a run if this worker is executing it."""
+        task = self.tasks.get(run_id)
+        if task is None:
+            return False
+        self._cancel_reasons[run_id] = reason
+        task.cancel()
+        return True
+
+    async def dispatch(self):
+        """Fail orphaned runs and claim queued runs while there are free slots."""
+        await self._fail_orphans()
+        free = self.workers - len(self.tasks)
+        if free <= 0:
+            return
+        claimed_sessions = set()
+        for run in await self.agent_run_service.get_runs_by_status("queued", free * 10):
+            if free <= 0:
+                break
+            # Only the oldest queued run of a session may start.
+            if run.session_id in claimed_sessions:
+                continue
+            claimed_sessions.add(run.session_id)
+            if not await self._acquire_lease(run.session_id):
+                continue
+            started = await self.agent_run_service.start_run(run.id)
+            if started is None:
+                await self._release_lease(run.session_id)
+                continue
+            free -= 1
+            task = asyncio.create_task(self._execute(started))
+            self.tasks[run.id] = task
+            task.add_done_callback(lambda _, run_id=run.id: self.tasks.pop(run_id, None))
+
+    async def close(self):
+        """Stop the runs executing here; they are recorded as failed."""
+        for run_id in list(self.tasks):
+            self.cancel_local(run_id, "shutdown")
+        if self.tasks:
+            await asyncio.gather(*self.tasks.values(), return_exceptions=True)
+
+    async def _fail_orphans(self):
+        redis = self.redis_service.redis
+        if redis is None:
+            return
+        for run in await self.agent_run_service.get_runs_by_status("running", 100):
+            if run.id in self.tasks or await redis.exists(self.LEASE_PREFIX + run.session_id):
+                continue
+            failed = await self.agent_run_service.finish_run(
+                run.id, "error", [], error="Worker executing the run stopped", from_statuses=("running",)
+            )
+            if failed:
+                logger.warning("Failed orphaned agent run %s", run.id)
+                await self._publish_status(failed)
+
+    async def _acquire_lease(self, session_id: str) -> bool:
+        redis = self.redis_service.redis
+        if redis is None:
+            return False
+        return bool(await redis.set(self.LEASE_PREFIX + session_id, self.lease_id, nx=True, ex=self.lease_ttl))
+
+    async def _renew_lease(self, run: AgentRun):
+        """Keep the session's lease while ``run`` executes; stop the run once it is lost."""
+        key = self.LEASE_PREFIX + run.session_id
+        while True:
+            await asyncio.sleep(self.lease_ttl / 3)
+            try:
+                renewed = await self.redis_service.renew_lock(key, self.lease_id, self.lease_ttl)
+            except Exception as e:
+                logger.error("Error renewing agent run lease for %s: %s", run.session_id, e)
+                continue
+            if not renewed:
+                # The lease lapsed: another worker may already have failed this
+                # run or started the session's next one.
+                logger.warning("Lost the lease of session %s, stopping agent run %s", run.session_id, run.id)
+                self.cancel_local(run.id, "lease_lost")
+                return
+
+    async def _release_lease(self, session_id: str):
+        await self.redis_service.release_lock(self.LEASE_PREFIX + session_id, self.lease_id)
+        # The session's next run can start now.
+        self.notify()
+
+    async def _execute(self, run: AgentRun):
+        AGENT_RUNS_ACTIVE.inc()
+        start = time.perf_counter()
+        renew = asyncio.create_task(self._renew_lease(run))
+        events: List[Any] = []
+        status, error = "completed", None
+        await self._publish_status(run)
+        try:
+            await asyncio.wait_for(self._stream(run, events), self.timeout)
+        except asyncio.CancelledError:
+            reason = self._cancel_reasons.pop(run.id, "shutdown")
+            status = "cancelled" if reason == "cancelled" else "error"
+            error = CANCEL_ERRORS.get(reason)
+        except asyncio.TimeoutError:
+            status, error = "error", f"Run exceeded {self.timeout:g} seconds"
+        except Exception as e:
+            logger.exception("Agent run %s failed: %s", run.id, e)
+            status, error = "error", str(e)
+        finally:
+            renew.cancel()
+            AGENT_RUNS_ACTIVE.dec()
+
+        output = next((text for text in map(event_text, reversed(events)) if text), None)
+        try:
+            finished = await self.agent_run_service.finish_run(run.id, status, events, output=output, error=error)
+            if finished:
+                await self._publish_status(finished)
+        finally:
+            await self._release_lease(run.session_id)
+        AGENT_RUNS.inc(status=status)
+        AGENT_RUN_SECONDS.observe(time.perf_counter() - start)
+
+    async def _stream(self, run: AgentRun, events: List[Any]):
+        # Whole events only: progress is reported per step, not per token.
+        request = agent_request(AgentMessageRequest(message=run.message, sessionId=run.session_id), streaming=False)
+        async with httpx.AsyncClient(timeout=httpx.Timeout(self.timeout, connect=10.0)) as client:
+            async with client.stream("POST", f"{AGENT_URL}/run_sse", json=request.dict(),
+                                     headers={"Accept": "text/event-stream"}) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    event = json.loads(line[5:].strip())
+                    if isinstance(event, dict) and event.get("error"):
+                        raise RuntimeError(event["error"])
+                    events.append(event)
+                    await self.redis_service.publish_message(CHANNEL, agent_run_message("progress", {
+                        "run_id": run.id,
+                        "session_id": run.session_id,
+                        "index": len(events) - 1,
+                        "event": event,
+                    }))
+
+    async def _publish_status(self, run: AgentRun):
+        await self.redis_service.publish_message(CHANNEL, agent_run_message("updated", {"run": run.dict()}))
+
+
+agent_run_service = AgentRunService()
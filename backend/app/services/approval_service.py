@@ -1,58 +1,111 @@
 import asyncio
+import logging
+import os
 import time
-from typing import List, Optional
+import uuid
+from typing import AsyncIterator, List, Optional, Tuple
+import aiomysql
 from ..models.approval import Approval
 from ..database import database
+from ..metrics import db_timed
+from ..versions import APPROVALS, collection_versions
+
+logger = logging.getLogger(__name__)
+
+APPROVAL_COLUMNS = "id, session_id, function_call_id, description, status, created_at, updated_at, result"
+APPROVAL_RESULTS_CHANNEL = "approval:results"
+APPROVAL_TTL_SECONDS = int(os.getenv("APPROVAL_TTL_SECONDS", "86400"))
+RESOLVED_STATUSES = ("approved", "rejected", "expired")
+
+
+def _row_to_approval(row) -> Approval:
+    return Approval(
+        id=row[0],
+        session_id=row[1],
+        function_call_id=row[2],
+        description=row[3],
+        status=row[4],
+        created_at=row[5],
+        updated_at=row[6],
+        result=row[7]
+    )
+
+
+def _approvals_query(status: Optional[str], limit: Optional[int]):
+    query = f"SELECT {APPROVAL_COLUMNS} FROM approvals"
+    params: list = []
+    if status:
+        query += " WHERE status = %s"
+        params.append(status)
+    query += " ORDER BY created_at DESC"
+    if limit:
+        query += " LIMIT %s"
+        params.append(limit)
+    return query, params
+
+
+async def publish_approval_result(redis_service, approval: Approval):
+    """Record a decision in the shared approval hash and notify waiting MCP tools."""
+    await redis_service.set_hash(
+        f"approval:{approval.id}",
+        {"status": approval.status, "result": approval.result or ""},
+        ttl=APPROVAL_TTL_SECONDS
+    )
+    await redis_service.publish_message(APPROVAL_RESULTS_CHANNEL, {
+        "id": str(uuid.uuid4()),
+        "type": "approval_result",
+        "timestamp": int(time.time() * 1000),
+        "source": "backend",
+        "target": "mcp",
+        "payload": {
+            "ticket_id": approval.id,
+            "status": approval.status,
+            "result": approval.result
+        }
+    })
+
 
 class ApprovalService:
     def __init__(self):
         pass
-    
+
+    @db_timed
     async def create_approval(self, approval: Approval) -> Approval:
         """Create a new approval request."""
-        print(f"DEBUG: create_approval called with approval: {approval}")
-        
         async with database.get_connection() as conn:
             async with conn.cursor() as cursor:
                 await cursor.execute(
-                    """INSERT INTO approvals 
+                    """INSERT INTO approvals
                        (id, session_id, function_call_id, description, status, created_at, updated_at, result)
                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)""",
-                    (approval.id, approval.session_id, approval.function_call_id, 
-                     approval.description, approval.status, approval.created_at, 
+                    (approval.id, approval.session_id, approval.function_call_id,
+                     approval.description, approval.status, approval.created_at,
                      approval.updated_at, approval.result)
                 )
                 await conn.commit()
-                print(f"DEBUG: Approval created successfully: {approval.id}")
+                await collection_versions.bump(APPROVALS)
                 return approval
-    
+
+    @db_timed
     async def get_approval(self, approval_id: str) -> Optional[Approval]:
         """Get an approval request by ID."""
         async with database.get_connection() as conn:
             async with conn.cursor() as cursor:
                 await cursor.execute(
-                    "SELECT id, session_id, function_call_id, description, status, created_at, updated_at, result FROM approvals WHERE id = %s",
+                    f"SELECT {APPROVAL_COLUMNS} FROM approvals WHERE id = %s",
                     (approval_id,)
                 )
                 row = await cursor.fetchone()
-                
-                if row and len(row) >= 8:
-                    return Approval(
-                        id=row[0],
-                        session_id=row[1],
-                        function_call_id=row[2],
-                        description=row[3],
-                        status=row[4],
-                        created_at=row[5],
-                        updated_at=row[6],
-                        result=row[7]
-                    )
+
+                if row:
+                    return _row_to_approval(row)
                 return None
-    
+
+    @db_timed
     async def update_approval_status(self, approval_id: str, status: str, result: Optional[str] = None) -> Optional[Approval]:
         """Update the status of an approval request."""
         updated_at = int(time.time() * 1000)
-        
+
         async with database.get_connection() as conn:
             async with conn.cursor() as cursor:
                 await cursor.execute(
@@ -60,51 +113,180 @@ class ApprovalService:
                     (status, result, updated_at, approval_id)
                 )
                 await conn.commit()
-                
+                await collection_versions.bump(APPROVALS)
+
                 if cursor.rowcount > 0:
                     return await self.get_approval(approval_id)
                 return None
-    
+
+    @db_timed
+    async def get_approval_rows(self, status: Optional[str] = None, limit: Optional[int] = None) -> List[dict]:
+        """Get approval requests as plain dicts, newest first, optionally filtered by status.
+
+        Filtering by status is served by the (status, created_at) index.
+        """
+        query, params = _approvals_query(status, limit)
+        async with database.get_connection() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(query, params)
+                return await cursor.fetchall()
+
+    def stream_approval_rows(
+        self, status: Optional[str] = None, limit: Optional[int] = None, batch_size: int = 500
+    ) -> AsyncIterator[List[dict]]:
+        """Stream approval requests as batches of dict rows from a server-side cursor."""
+        query, params = _approvals_query(status, limit)
+        return database.stream(query, params, batch_size=batch_size)
+
+    async def get_approvals(self, status: Optional[str] = None, limit: Optional[int] = None) -> List[Approval]:
+        """Get approval requests, newest first, optionally filtered by status."""
+        return [Approval.model_construct(**row) for row in await self.get_approval_rows(status, limit)]
+
     async def get_all_approvals(self) -> List[Approval]:
         """Get all approval requests."""
-        print(f"DEBUG: get_all_approvals called")
-        
+        return await self.get_approvals()
+
+    @db_timed
+    async def expire_pending(self, created_before: int, limit: int) -> Tuple[int, List[Approval]]:
+        """Mark up to ``limit`` pending approvals created before ``created_before`` as expired.
+
+        Returns how many pending approvals were selected and the ones that
+        were actually expired; requests decided concurrently by a human are
+        left untouched, so the second can be shorter than the first.
+        """
+        updated_at = int(time.time() * 1000)
+
         async with database.get_connection() as conn:
             async with conn.cursor() as cursor:
                 await cursor.execute(
-                    "SELECT id, session_id, function_call_id, description, status, created_at, updated_at, result FROM approvals ORDER BY created_at DESC"
+                    """SELECT id FROM approvals
+                       WHERE status = 'pending' AND created_at < %s
+                       ORDER BY created_at ASC LIMIT %s""",
+                    (created_before, limit)
+                )
+                ids = [row[0] for row in await cursor.fetchall()]
+                if not ids:
+                    return 0, []
+
+                placeholders = ", ".join(["%s"] * len(ids))
+                await cursor.execute(
+                    f"""UPDATE approvals SET status = 'expired', result = %s, updated_at = %s
+                        WHERE id IN ({placeholders}) AND status = 'pending'""",
+                    ("Request expired without a decision", updated_at, *ids)
+                )
+                await cursor.execute(
+                    f"""SELECT {APPROVAL_COLUMNS} FROM approvals
+                        WHERE id IN ({placeholders}) AND status = 'expired' AND updated_at = %s""",
+                    (*ids, updated_at)
                 )
                 rows = await cursor.fetchall()
-                print(f"DEBUG: Query executed, found {len(rows)} rows")
-                
-                approvals = []
-                for row in rows:
-                    try:
-                        print(f"DEBUG: Processing row with {len(row)} columns: {row}")
-                        approval = Approval(
-                            id=row[0] if len(row) > 0 else "",
-                            session_id=row[1] if len(row) > 1 else "",
-                            function_call_id=row[2] if len(row) > 2 else "",
-                            description=row[3] if len(row) > 3 else "",
-                            status=row[4] if len(row) > 4 else "pending",
-                            created_at=row[5] if len(row) > 5 else 0,
-                            updated_at=row[6] if len(row) > 6 else 0,
-                            result=row[7] if len(row) > 7 else None
-                        )
-                        approvals.append(approval)
-                    except Exception as e:
-                        print(f"DEBUG: Error processing row {row}: {str(e)}")
-                        continue
-                
-                return approvals
-    
+                await conn.commit()
+                await collection_versions.bump(APPROVALS)
+                return len(ids), [_row_to_approval(row) for row in rows]
+
+    @db_timed
+    async def archive_resolved(self, updated_before: int, limit: int) -> int:
+        """Move up to ``limit`` resolved approvals last updated before ``updated_before`` to approvals_archive."""
+        archived_at = int(time.time() * 1000)
+
+        async with database.get_connection() as conn:
+            async with conn.cursor() as cursor:
+                status_placeholders = ", ".join(["%s"] * len(RESOLVED_STATUSES))
+                await cursor.execute(
+                    f"""SELECT id FROM approvals
+                        WHERE status IN ({status_placeholders}) AND updated_at < %s
+                        LIMIT %s""",
+                    (*RESOLVED_STATUSES, updated_before, limit)
+                )
+                ids = [row[0] for row in await cursor.fetchall()]
+                if not ids:
+                    return 0
+
+                placeholders = ", ".join(["%s"] * len(ids))
+                try:
+                    await cursor.execute(
+                        f"""INSERT INTO approvals_archive ({APPROVAL_COLUMNS}, archived_at)
+                            SELECT {APPROVAL_COLUMNS}, %s FROM approvals WHERE id IN ({placeholders})""",
+                        (archived_at, *ids)
+                    )
+                    await cursor.execute(
+                        f"DELETE FROM approvals WHERE id IN ({placeholders})",
+                        ids
+                    )
+                    archived = cursor.rowcount
+                    await conn.commit()
+                    await collection_versions.bump(APPROVALS)
+                except Exception:
+                    await conn.rollback()
+                    raise
+                return archived
+
+    @db_timed
     async def delete_approval(self, approval_id: str) -> bool:
         """Delete an approval request."""
         async with database.get_connection() as conn:
             async with conn.cursor() as cursor:
                 await cursor.execute("DELETE FROM approvals WHERE id = %s", (approval_id,))
                 await conn.commit()
-                
+                await collection_versions.bump(APPROVALS)
+
                 return cursor.rowcount > 0
 
+
+class ApprovalSweeper:
+    """Background task that expires stale pending approvals and archives resolved ones.
+
+    Expired approvals are announced with one ``approval_updated`` SSE event per
+    batch and published to ``approval:results`` so waiting agents resume.
+    """
+
+    def __init__(self, approval_service: ApprovalService, sse_service, redis_service):
+        self.approval_service = approval_service
+        self.sse_service = sse_service
+        self.redis_service = redis_service
+        self.interval = float(os.getenv("APPROVAL_SWEEP_INTERVAL_SECONDS", "60"))
+        self.batch_size = int(os.getenv("APPROVAL_SWEEP_BATCH_SIZE", "100"))
+        self.pending_ttl = int(os.getenv("APPROVAL_PENDING_TTL_SECONDS", str(APPROVAL_TTL_SECONDS)))
+        self.archive_after = int(os.getenv("APPROVAL_ARCHIVE_AFTER_SECONDS", str(7 * 24 * 3600)))
+
+    async def run(self):
+        """Sweep forever at the configured interval."""
+        while True:
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.exception("Error in approval sweeper: %s", e)
+            await asyncio.sleep(self.interval)
+
+    async def sweep(self):
+        """Run one expiry + archive pass, draining full batches."""
+        now = int(time.time() * 1000)
+
+        while True:
+            selected, expired = await self.approval_service.expire_pending(
+                now - self.pending_ttl * 1000, self.batch_size
+            )
+            if expired:
+                for approval in expired:
+                    await publish_approval_result(self.redis_service, approval)
+                await self.sse_service.send_event("approval_updated", {
+                    "approvals": [approval.dict() for approval in expired],
+                    "action": "expired"
+                })
+                logger.info("Expired %d pending approvals", len(expired))
+            # A batch decided concurrently expires nothing but older rows may
+            # still be pending; only a short selection means none are left.
+            if selected < self.batch_size:
+                break
+
+        while True:
+            archived = await self.approval_service.archive_resolved(
+                now - self.archive_after * 1000, self.batch_size
+            )
+            if archived:
+                logger.info("Archived %d resolved approvals", archived)
+            if archived < self.batch_size:
+                break
+
+
 approval_service = ApprovalService()
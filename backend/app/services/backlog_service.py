@@ -1,12 +1,21 @@
 """Backlog business logic service."""
 
+import logging
 import time
 import uuid
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
+
+import aiomysql
 
 from ..database import database
+from ..metrics import db_timed
+from ..versions import BACKLOGS, collection_versions
 from ..models.backlog import Backlog, BacklogCreate, BacklogUpdate
 
+logger = logging.getLogger(__name__)
+
+BACKLOG_LIST_COLUMNS = "id, title, COALESCE(description, '') AS description, created_at, updated_at"
+
 
 class BacklogService:
     """Backlog service for managing backlog items with SQLite storage."""
@@ -14,28 +23,27 @@ class BacklogService:
     def __init__(self):
         pass
         
-    async def get_all_backlogs(self) -> List[Backlog]:
-        """Get all backlog items."""
+    @db_timed
+    async def get_all_backlog_rows(self) -> List[dict]:
+        """Get all backlog items as plain dicts, ready for JSON encoding."""
         async with database.get_connection() as conn:
-            async with conn.cursor() as cursor:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
                 await cursor.execute(
-                    "SELECT id, title, description, created_at, updated_at FROM backlog ORDER BY created_at DESC"
+                    f"SELECT {BACKLOG_LIST_COLUMNS} FROM backlog ORDER BY created_at DESC"
                 )
-                rows = await cursor.fetchall()
-                
-                backlogs = []
-                for row in rows:
-                    backlog = Backlog(
-                        id=row[0],
-                        title=row[1],
-                        description=row[2] or "",
-                        created_at=row[3],
-                        updated_at=row[4]
-                    )
-                    backlogs.append(backlog)
-                
-                return backlogs
+                return await cursor.fetchall()
+        
+    def stream_backlog_rows(self, batch_size: int = 500) -> AsyncIterator[List[dict]]:
+        """Stream all backlog items as batches of dict rows from a server-side cursor."""
+        return database.stream(
+            f"SELECT {BACKLOG_LIST_COLUMNS} FROM backlog ORDER BY created_at DESC", batch_size=batch_size
+        )
+        
+    async def get_all_backlogs(self) -> List[Backlog]:
+        """Get all backlog items."""
+        return [Backlog.model_construct(**row) for row in await self.get_all_backlog_rows()]
         
+    @db_timed
     async def get_backlog(self, backlog_id: str) -> Optional[Backlog]:
         """Get a specific backlog item."""
         async with database.get_connection() as conn:
@@ -57,6 +65,7 @@ class BacklogService:
                     updated_at=row[4]
                 )
         
+    @db_timed
     async def create_backlog(self, title: str, description: str = "") -> Backlog:
         """Create a new backlog item."""
         backlog_id = str(uuid.uuid4())
@@ -69,6 +78,7 @@ class BacklogService:
                     (backlog_id, title, description, timestamp, timestamp)
                 )
                 await conn.commit()
+                await collection_versions.bump(BACKLOGS)
         
         backlog = Backlog(
             id=backlog_id,
@@ -80,6 +90,7 @@ class BacklogService:
         
         return backlog
         
+    @db_timed
     async def update_backlog(self, backlog_id: str, **kwargs) -> Optional[Backlog]:
         """Update a backlog item."""
         backlog = await self.get_backlog(backlog_id)
@@ -109,11 +120,13 @@ class BacklogService:
                         tuple(update_values)
                     )
                     await conn.commit()
+                    await collection_versions.bump(BACKLOGS)
             
             backlog.updated_at = timestamp
         
         return backlog
         
+    @db_timed
     async def delete_backlog(self, backlog_id: str) -> bool:
         """Delete a backlog item."""
         async with database.get_connection() as conn:
@@ -121,17 +134,18 @@ class BacklogService:
                 await cursor.execute("DELETE FROM backlog WHERE id = %s", (backlog_id,))
                 rowcount = cursor.rowcount
                 await conn.commit()
+                await collection_versions.bump(BACKLOGS)
         
         return rowcount > 0
         
+    @db_timed
     async def send_to_todo(self, backlog_id: str) -> Optional[dict]:
         """Move backlog item to todo and delete from backlog."""
         from .todo_service import TodoService
         
         backlog = await self.get_backlog(backlog_id)
-        print(f"send_to_todo : get_backlog {backlog}")
         if not backlog:
-            print(f"send_to_todo : backlog not found")
+            logger.debug("send_to_todo: backlog %s not found", backlog_id)
             return None
             
         todo_service = TodoService()
@@ -139,7 +153,7 @@ class BacklogService:
             title=backlog.title,
             description=backlog.description
         )
-        print(f"send_to_todo : create_todo {todo}")
+        logger.debug("send_to_todo: backlog %s -> todo %s", backlog_id, todo.id)
         
         await self.delete_backlog(backlog_id)
         
@@ -1,18 +1,73 @@
+import asyncio
+import base64
+import json
+import logging
+import os
 import time
 import uuid
-from typing import List, Optional
-from ..models.code_interpreter import CodeInterpreterState
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import aiomysql
+import httpx
+from .. import offload
+from ..models.code_interpreter import CodeInterpreterArtifact, CodeInterpreterState
 from ..database import database
+from ..metrics import CODE_INTERPRETER_POLLS, db_timed
+from ..versions import CODE_INTERPRETER_STATES, collection_versions
+
+logger = logging.getLogger(__name__)
+
+STATE_COLUMNS = (
+    "id, ticket_id, code, description, status, result, widget_url, result_size, result_truncated, "
+    "created_at, updated_at"
+)
+ARTIFACT_COLUMNS = "id, state_id, name, mime_type, size, created_at"
+ACTIVE_STATUSES = ("pending", "running")
+CODE_INTERPRETER_API_URL = os.getenv("CODE_INTERPRETER_API_URL", "https://uni-interpreter.mlops.dp.tech")
+RESULT_SUMMARY_CHARS = int(os.getenv("CODE_INTERPRETER_RESULT_SUMMARY_CHARS", "1000"))
+ARTIFACT_CHUNK_BYTES = 256 * 1024
+RESULT_MIME_TYPE = "text/plain; charset=utf-8"
+
+
+async def summarize_result(result: str) -> Dict[str, Any]:
+    """State columns for a full result: a leading summary, its size and whether it was cut."""
+    size = await offload.utf8_size(result)
+    truncated = len(result) > RESULT_SUMMARY_CHARS
+    return {
+        "result": result[:RESULT_SUMMARY_CHARS] if truncated else result,
+        "result_size": size,
+        "result_truncated": truncated,
+    }
+
+
+def artifact_id(state_id: str, name: str) -> str:
+    """Artifact ids derive from the state and name, so rewriting an artifact is idempotent."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"code-interpreter/{state_id}/{name}"))
+
+
+def artifact_bytes(artifact: Dict[str, Any]) -> bytes:
+    """Content of an artifact given as ``{"data", "encoding"}`` (``utf-8`` or ``base64``)."""
+    data = artifact.get("data") or ""
+    if artifact.get("encoding") == "base64":
+        return base64.b64decode(data)
+    return data.encode("utf-8")
+
 
 class CodeInterpreterService:
     def __init__(self):
         pass
     
-    async def create_python_notebook(self, state_id: str, code: str, description: str = "") -> CodeInterpreterState:
-        """Create a new code interpreter state."""
+    @db_timed
+    async def create_python_notebook(self, state_id: str, code: str, description: str = "",
+                                     widget_url: Optional[str] = None) -> CodeInterpreterState:
+        """Create a new code interpreter state.
+        
+        ``widget_url`` defaults to the remote interpreter's widget; notebooks
+        run by the local backend pass an empty one.
+        """
         ticket_id = f"code-interpreter-{uuid.uuid4().hex[:8]}"
         timestamp = int(time.time() * 1000)
-        widget_url = f"https://uni-interpreter.mlops.dp.tech/widget?instance_id={state_id}"
+        if widget_url is None:
+            widget_url = f"https://uni-interpreter.mlops.dp.tech/widget?instance_id={state_id}"
         
         state = CodeInterpreterState(
             id=state_id,
@@ -36,71 +91,73 @@ class CodeInterpreterService:
                      state.created_at, state.updated_at)
                 )
                 await conn.commit()
+                await collection_versions.bump(CODE_INTERPRETER_STATES)
                 return state
     
+    @db_timed
     async def get_notebook_state(self, state_id: str) -> Optional[CodeInterpreterState]:
         """Get a code interpreter state by ID."""
         async with database.get_connection() as conn:
-            async with conn.cursor() as cursor:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
                 await cursor.execute(
-                    """SELECT id, ticket_id, code, description, status, 
-                              result, widget_url, created_at, updated_at 
-                       FROM code_interpreter_states WHERE id = %s""",
+                    f"SELECT {STATE_COLUMNS} FROM code_interpreter_states WHERE id = %s",
                     (state_id,)
                 )
                 row = await cursor.fetchone()
                 
-                if row and len(row) >= 9:
-                    return CodeInterpreterState(
-                        id=row[0],
-                        ticket_id=row[1],
-                        code=row[2],
-                        description=row[3],
-                        status=row[4],
-                        result=row[5],
-                        widget_url=row[6],
-                        created_at=row[7],
-                        updated_at=row[8]
-                    )
+                if row:
+                    return self._state(row)
                 return None
     
-    async def get_all_states(self) -> List[CodeInterpreterState]:
-        """Get all code interpreter states."""
+    @staticmethod
+    def _state(row: dict) -> CodeInterpreterState:
+        return CodeInterpreterState(**dict(row, result_truncated=bool(row.get("result_truncated"))))
+    
+    @db_timed
+    async def get_all_state_rows(self) -> List[dict]:
+        """Get all code interpreter states as plain dicts, newest first."""
         async with database.get_connection() as conn:
-            async with conn.cursor() as cursor:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
                 await cursor.execute(
-                    """SELECT id, ticket_id, code, description, status, 
-                              result, widget_url, created_at, updated_at 
-                       FROM code_interpreter_states 
-                       ORDER BY created_at DESC"""
+                    f"SELECT {STATE_COLUMNS} FROM code_interpreter_states ORDER BY created_at DESC"
                 )
                 rows = await cursor.fetchall()
-                
-                states = []
                 for row in rows:
-                    if len(row) >= 9:
-                        state = CodeInterpreterState(
-                            id=row[0],
-                            ticket_id=row[1],
-                            code=row[2],
-                            description=row[3],
-                            status=row[4],
-                            result=row[5],
-                            widget_url=row[6],
-                            created_at=row[7],
-                            updated_at=row[8]
-                        )
-                        states.append(state)
-                
-                return states
+                    row["result_truncated"] = bool(row["result_truncated"])
+                return rows
     
-    async def update_state(self, state_id: str, **kwargs) -> Optional[CodeInterpreterState]:
-        """Update a code interpreter state."""
+    async def stream_state_rows(self, batch_size: int = 500) -> AsyncIterator[List[dict]]:
+        """Stream all code interpreter states as batches of dict rows from a server-side cursor."""
+        query = f"SELECT {STATE_COLUMNS} FROM code_interpreter_states ORDER BY created_at DESC"
+        async for rows in database.stream(query, batch_size=batch_size):
+            for row in rows:
+                row["result_truncated"] = bool(row["result_truncated"])
+            yield rows
+    
+    async def get_all_states(self) -> List[CodeInterpreterState]:
+        """Get all code interpreter states."""
+        return [CodeInterpreterState.model_construct(**row) for row in await self.get_all_state_rows()]
+    
+    @db_timed
+    async def update_state(self, state_id: str, artifacts: Optional[List[Dict[str, Any]]] = None,
+                           **kwargs) -> Optional[CodeInterpreterState]:
+        """Update a code interpreter state.
+        
+        A ``result`` is stored in full as the ``result`` artifact and only its
+        summary is kept on the state. When ``artifacts`` are given (stdout,
+        images, rich outputs, as ``{"name", "mime_type", "data", "encoding"}``)
+        they are stored instead, and ``result`` only provides the summary.
+        """
         state = await self.get_notebook_state(state_id)
         if not state:
             return None
             
         timestamp = int(time.time() * 1000)
+        result = kwargs.pop("result", None)
+        if result is not None:
+            kwargs.update(await summarize_result(result))
+            if artifacts is None:
+                artifacts = [{"name": "result", "mime_type": RESULT_MIME_TYPE, "data": result}]
         
         update_fields = []
         update_values = []
@@ -111,30 +168,306 @@ class CodeInterpreterService:
                 update_values.append(value)
                 setattr(state, field, value)
         
-        if update_fields:
+        if update_fields or artifacts:
             update_fields.append("updated_at = %s")
             update_values.append(timestamp)
             update_values.append(state_id)
             
             async with database.get_connection() as conn:
                 async with conn.cursor() as cursor:
+                    await self._write_artifacts(cursor, state_id, artifacts or [], timestamp)
                     await cursor.execute(
                         f"UPDATE code_interpreter_states SET {', '.join(update_fields)} WHERE id = %s",
                         update_values
                     )
                     await conn.commit()
+                    await collection_versions.bump(CODE_INTERPRETER_STATES)
             
             state.updated_at = timestamp
         
         return state
     
+    async def _write_artifacts(self, cursor, state_id: str, artifacts: List[Dict[str, Any]], timestamp: int):
+        """Store artifacts in ``ARTIFACT_CHUNK_BYTES`` chunks, replacing any of the same name."""
+        for artifact in artifacts:
+            content = artifact_bytes(artifact)
+            chunks = [content[i:i + ARTIFACT_CHUNK_BYTES] for i in range(0, len(content), ARTIFACT_CHUNK_BYTES)] or [b""]
+            identifier = artifact_id(state_id, artifact["name"])
+            await cursor.execute(
+                """INSERT INTO code_interpreter_artifacts
+                   (id, state_id, name, mime_type, size, chunk_count, created_at)
+                   VALUES (%s, %s, %s, %s, %s, %s, %s)
+                   ON DUPLICATE KEY UPDATE mime_type = VALUES(mime_type), size = VALUES(size),
+                                           chunk_count = VALUES(chunk_count), created_at = VALUES(created_at)""",
+                (identifier, state_id, artifact["name"], artifact.get("mime_type") or RESULT_MIME_TYPE,
+                 len(content), len(chunks), timestamp)
+            )
+            await cursor.execute(
+                "DELETE FROM code_interpreter_artifact_chunks WHERE artifact_id = %s AND seq >= %s",
+                (identifier, len(chunks))
+            )
+            await cursor.executemany(
+                """INSERT INTO code_interpreter_artifact_chunks (artifact_id, seq, data) VALUES (%s, %s, %s)
+                   ON DUPLICATE KEY UPDATE data = VALUES(data)""",
+                [(identifier, seq, chunk) for seq, chunk in enumerate(chunks)]
+            )
+    
+    @db_timed
+    async def get_artifacts(self, state_id: str) -> List[CodeInterpreterArtifact]:
+        """Metadata of a state's artifacts, in the order they were written."""
+        async with database.get_connection() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(
+                    f"""SELECT {ARTIFACT_COLUMNS} FROM code_interpreter_artifacts
+                        WHERE state_id = %s ORDER BY created_at, name""",
+                    (state_id,)
+                )
+                return [CodeInterpreterArtifact(**row) for row in await cursor.fetchall()]
+    
+    @db_timed
+    async def get_artifact(self, state_id: str, artifact_id: str) -> Optional[CodeInterpreterArtifact]:
+        """Metadata of one artifact of a state."""
+        async with database.get_connection() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(
+                    f"SELECT {ARTIFACT_COLUMNS} FROM code_interpreter_artifacts WHERE id = %s AND state_id = %s",
+                    (artifact_id, state_id)
+                )
+                row = await cursor.fetchone()
+                return CodeInterpreterArtifact(**row) if row else None
+    
+    async def stream_artifact(self, artifact_id: str) -> AsyncIterator[bytes]:
+        """An artifact's content, one stored chunk at a time, from a server-side cursor."""
+        async for rows in database.stream(
+            "SELECT data FROM code_interpreter_artifact_chunks WHERE artifact_id = %s ORDER BY seq",
+            (artifact_id,),
+            batch_size=1
+        ):
+            for row in rows:
+                yield bytes(row["data"])
+    
+    @db_timed
+    async def get_active_state_rows(self, created_after: int, limit: int) -> List[dict]:
+        """Pending or running states of the remote interpreter created after ``created_after``, oldest first.
+        
+        States run by the local backend have no widget and report their own
+        progress, so they are left out.
+        """
+        async with database.get_connection() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(
+                    """SELECT id, status, result, result_size FROM code_interpreter_states
+                       WHERE status IN (%s, %s) AND created_at > %s AND widget_url <> ''
+                       ORDER BY created_at ASC LIMIT %s""",
+                    (*ACTIVE_STATUSES, created_after, limit)
+                )
+                return await cursor.fetchall()
+    
+    @db_timed
+    async def update_states(self, updates: List[Dict[str, Any]]) -> List[CodeInterpreterState]:
+        """Write ``{"id", "status", "result"}`` changes in one transaction and return the updated states.
+        
+        Results are stored as ``result`` artifacts with a summary on the state,
+        as in ``update_state``. A ``None`` result leaves the stored one untouched.
+        """
+        if not updates:
+            return []
+        timestamp = int(time.time() * 1000)
+        ids = [update["id"] for update in updates]
+        placeholders = ", ".join(["%s"] * len(ids))
+        
+        rows = []
+        for update in updates:
+            summary = await summarize_result(update["result"]) if update.get("result") is not None else {}
+            rows.append((update["status"], summary.get("result"), summary.get("result_size"),
+                         summary.get("result_truncated"), timestamp, update["id"]))
+        
+        async with database.get_connection() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                for update in updates:
+                    if update.get("result") is not None:
+                        await self._write_artifacts(cursor, update["id"], [
+                            {"name": "result", "mime_type": RESULT_MIME_TYPE, "data": update["result"]}
+                        ], timestamp)
+                await cursor.executemany(
+                    """UPDATE code_interpreter_states
+                       SET status = %s, result = COALESCE(%s, result), result_size = COALESCE(%s, result_size),
+                           result_truncated = COALESCE(%s, result_truncated), updated_at = %s
+                       WHERE id = %s""",
+                    rows
+                )
+                await conn.commit()
+                await collection_versions.bump(CODE_INTERPRETER_STATES)
+                await cursor.execute(
+                    f"SELECT {STATE_COLUMNS} FROM code_interpreter_states WHERE id IN ({placeholders})", ids
+                )
+                return [self._state(row) for row in await cursor.fetchall()]
+    
+    @db_timed
     async def delete_state(self, state_id: str) -> bool:
         """Delete a code interpreter state."""
         async with database.get_connection() as conn:
             async with conn.cursor() as cursor:
                 await cursor.execute("DELETE FROM code_interpreter_states WHERE id = %s", (state_id,))
+                deleted = cursor.rowcount > 0
+                await cursor.execute(
+                    """DELETE c FROM code_interpreter_artifact_chunks c
+                       JOIN code_interpreter_artifacts a ON c.artifact_id = a.id
+                       WHERE a.state_id = %s""",
+                    (state_id,)
+                )
+                await cursor.execute("DELETE FROM code_interpreter_artifacts WHERE state_id = %s", (state_id,))
                 await conn.commit()
+                await collection_versions.bump(CODE_INTERPRETER_STATES)
                 
-                return cursor.rowcount > 0
+                return deleted
+
+
+def parse_remote_state(data: Any) -> Tuple[str, Optional[str]]:
+    """``(status, result)`` from a remote interpreter state document.
+    
+    The remote status vocabulary is mapped onto pending/running/completed/error;
+    a non-string result is stored as JSON.
+    """
+    if not isinstance(data, dict):
+        return "pending", None
+    raw = str(data.get("status") or data.get("state") or "").lower()
+    if raw in ("completed", "complete", "success", "succeeded", "done", "finished"):
+        status = "completed"
+    elif raw in ("error", "failed", "failure", "cancelled", "canceled"):
+        status = "error"
+    elif raw in ("running", "executing", "busy", "started"):
+        status = "running"
+    else:
+        status = "pending"
+    result = next((data[key] for key in ("result", "output", "outputs") if data.get(key) is not None), None)
+    if result is not None and not isinstance(result, str):
+        result = json.dumps(result, ensure_ascii=False)
+    return status, result
+
+
+class CodeInterpreterPoller:
+    """Background task that polls the remote interpreter for pending and running states.
+    
+    Only one backend worker polls at a time: the holder of a Redis lock,
+    renewed every cycle. Each state is polled on its own schedule, starting at
+    the minimum interval and doubling up to the maximum while nothing changes;
+    a change resets it. Due states are fetched in batches with bounded
+    concurrency, changes are written in one transaction, and the changed
+    states are published as a ``states_updated`` message so every worker
+    pushes ``code_interpreter_state_updated`` to its own SSE clients.
+    """
+    
+    LOCK_KEY = "code_interpreter:poller"
+    
+    def __init__(self, code_interpreter_service: CodeInterpreterService, redis_service):
+        self.code_interpreter_service = code_interpreter_service
+        self.redis_service = redis_service
+        self.enabled = os.getenv("CODE_INTERPRETER_POLL_ENABLED", "true").lower() == "true"
+        self.min_interval = float(os.getenv("CODE_INTERPRETER_POLL_MIN_INTERVAL_SECONDS", "2"))
+        self.max_interval = float(os.getenv("CODE_INTERPRETER_POLL_MAX_INTERVAL_SECONDS", "60"))
+        self.batch_size = int(os.getenv("CODE_INTERPRETER_POLL_BATCH_SIZE", "50"))
+        self.concurrency = int(os.getenv("CODE_INTERPRETER_POLL_CONCURRENCY", "8"))
+        self.max_age = int(os.getenv("CODE_INTERPRETER_POLL_MAX_AGE_SECONDS", str(24 * 3600)))
+        self.token = os.getenv("CODE_INTERPRETER_TOKEN", "1234")
+        self.lock_id = uuid.uuid4().hex
+        # state id -> (monotonic time it is due, current delay)
+        self.schedule: Dict[str, Tuple[float, float]] = {}
+        self.client: Optional[httpx.AsyncClient] = None
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+    
+    async def run(self):
+        """Poll forever, sleeping until the next state is due."""
+        if not self.enabled:
+            return
+        self.client = httpx.AsyncClient(base_url=CODE_INTERPRETER_API_URL, timeout=10.0)
+        try:
+            while True:
+                delay = self.min_interval
+                try:
+                    if await self._hold_lock():
+                        delay = await self.poll()
+                    else:
+                        self.schedule.clear()
+                except Exception as e:
+                    logger.exception("Error in code interpreter poller: %s", e)
+                await asyncio.sleep(delay)
+        finally:
+            await self.client.aclose()
+    
+    async def _hold_lock(self) -> bool:
+        redis = self.redis_service.redis
+        if redis is None:
+            return False
+        ttl = int(max(self.max_interval * 2, 30))
+        if await redis.set(self.LOCK_KEY, self.lock_id, nx=True, ex=ttl):
+            return True
+        # Compare-and-expire, so a lock that lapsed and went to another worker is not extended.
+        return await self.redis_service.renew_lock(self.LOCK_KEY, self.lock_id, ttl)
+    
+    async def poll(self) -> float:
+        """Poll the states that are due; returns how long to sleep before the next pass."""
+        created_after = int(time.time() * 1000) - self.max_age * 1000
+        rows = await self.code_interpreter_service.get_active_state_rows(created_after, self.batch_size * 20)
+        now = time.monotonic()
+        active = {row["id"] for row in rows}
+        for state_id in list(self.schedule):
+            if state_id not in active:
+                del self.schedule[state_id]
+        
+        due = [row for row in rows if self.schedule.get(row["id"], (0.0, 0.0))[0] <= now][:self.batch_size]
+        fetched = await asyncio.gather(*(self._fetch(row["id"]) for row in due))
+        
+        updates = []
+        for row, remote in zip(due, fetched):
+            _, delay = self.schedule.get(row["id"], (0.0, self.min_interval / 2))
+            if remote is not None:
+                status, result = remote
+                if status != row["status"] or (result is not None and not await self._same_result(result, row)):
+                    updates.append({"id": row["id"], "status": status, "result": result})
+                    delay = self.min_interval / 2
+            delay = min(delay * 2, self.max_interval)
+            self.schedule[row["id"]] = (now + delay, delay)
+        
+        if updates:
+            states = await self.code_interpreter_service.update_states(updates)
+            await self.redis_service.publish_message("code_interpreter:actions", {
+                "id": str(uuid.uuid4()),
+                "type": "code_interpreter_action",
+                "timestamp": int(time.time() * 1000),
+                "source": "backend",
+                "target": "code_interpreter_component",
+                "component": "code_interpreter",
+                "payload": {
+                    "action": "states_updated",
+                    "data": {"states": [state.dict() for state in states]}
+                }
+            })
+            logger.info("Updated %d code interpreter states from the remote interpreter", len(states))
+        
+        if not self.schedule:
+            return self.min_interval
+        next_due = min(due_at for due_at, _ in self.schedule.values())
+        return min(max(next_due - time.monotonic(), self.min_interval / 2), self.max_interval)
+    
+    @staticmethod
+    async def _same_result(result: str, row: dict) -> bool:
+        # Rows only carry the stored summary; its size tells a longer result apart.
+        summary = result[:RESULT_SUMMARY_CHARS]
+        return summary == row["result"] and await offload.utf8_size(result) == row["result_size"]
+    
+    async def _fetch(self, state_id: str) -> Optional[Tuple[str, Optional[str]]]:
+        async with self._semaphore:
+            try:
+                response = await self.client.get(
+                    f"/state/{state_id}", headers={"Authorization": f"Bearer {self.token}"}
+                )
+                response.raise_for_status()
+                CODE_INTERPRETER_POLLS.inc(outcome="ok")
+                return parse_remote_state(response.json())
+            except Exception as e:
+                CODE_INTERPRETER_POLLS.inc(outcome="error")
+                logger.warning("Error polling code interpreter state %s: %s", state_id, e)
+                return None
 
 code_interpreter_service = CodeInterpreterService()
@@ -1,13 +1,20 @@
 import time
 import uuid
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
+import aiomysql
 from ..models.file import File
 from ..database import database
+from ..metrics import db_timed
+from ..versions import FILES, collection_versions
+
+FILE_COLUMNS = "id, session_id, name, type, path, size, content, created_at, updated_at"
+FILE_SUMMARY_COLUMNS = "id, name, type, path, size, created_at, updated_at"
 
 class FileService:
     def __init__(self):
         pass
     
+    @db_timed
     async def create_file(self, file: File) -> File:
         """Create a new file."""
         async with database.get_connection() as conn:
@@ -20,33 +27,32 @@ class FileService:
                      file.path, file.size, file.content, file.created_at, file.updated_at)
                 )
                 await conn.commit()
+                await collection_versions.bump(FILES)
                 return file
     
+    @db_timed
+    async def get_all_file_rows(self, include_content: bool = True) -> List[dict]:
+        """Get all files as plain dicts, ordered by path.
+        
+        With ``include_content=False`` only the ``FileResponse`` fields are
+        selected, so file contents are never read from the database.
+        """
+        columns = FILE_COLUMNS if include_content else FILE_SUMMARY_COLUMNS
+        async with database.get_connection() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(f"SELECT {columns} FROM files ORDER BY path ASC")
+                return await cursor.fetchall()
+    
+    def stream_file_rows(self, include_content: bool = False, batch_size: int = 500) -> AsyncIterator[List[dict]]:
+        """Stream all files, ordered by path, as batches of dict rows from a server-side cursor."""
+        columns = FILE_COLUMNS if include_content else FILE_SUMMARY_COLUMNS
+        return database.stream(f"SELECT {columns} FROM files ORDER BY path ASC", batch_size=batch_size)
+    
     async def get_all_files(self) -> List[File]:
         """Get all files (not filtered by session_id as per user requirement)."""
-        async with database.get_connection() as conn:
-            async with conn.cursor() as cursor:
-                await cursor.execute(
-                    "SELECT id, session_id, name, type, path, size, content, created_at, updated_at FROM files ORDER BY path ASC"
-                )
-                rows = await cursor.fetchall()
-                
-                files = []
-                for row in rows:
-                    file = File(
-                        id=row[0],
-                        session_id=row[1],
-                        name=row[2],
-                        type=row[3],
-                        path=row[4],
-                        size=row[5],
-                        content=row[6],
-                        created_at=row[7],
-                        updated_at=row[8]
-                    )
-                    files.append(file)
-                return files
+        return [File.model_construct(**row) for row in await self.get_all_file_rows()]
     
+    @db_timed
     async def get_file(self, file_id: str) -> Optional[File]:
         """Get a file by ID."""
         async with database.get_connection() as conn:
@@ -71,12 +77,14 @@ class FileService:
                     )
                 return None
     
+    @db_timed
     async def delete_file(self, file_id: str) -> bool:
         """Delete a file."""
         async with database.get_connection() as conn:
             async with conn.cursor() as cursor:
                 await cursor.execute("DELETE FROM files WHERE id = %s", (file_id,))
                 await conn.commit()
+                await collection_versions.bump(FILES)
                 return cursor.rowcount > 0
 
 file_service = FileService()
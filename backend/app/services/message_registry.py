@@ -0,0 +1,69 @@
+"""Registry mapping Redis messages to their handlers."""
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+MessageHandler = Callable[[dict], Awaitable[Any]]
+HandlerKey = Tuple[str, str, Optional[str]]
+
+
+class MessageHandlerRegistry:
+    """Dispatch table keyed by ``(channel, type, action)``.
+
+    Components register their handlers once at startup; ``resolve`` is then a
+    constant-time dict lookup per message. Handlers registered with
+    ``action=None`` receive every action of that channel/type pair that has no
+    more specific handler.
+    """
+
+    def __init__(self):
+        self._handlers: Dict[HandlerKey, MessageHandler] = {}
+        self._component_switch: Dict[HandlerKey, bool] = {}
+        self._channels: List[str] = []
+
+    def register(
+        self,
+        channel: str,
+        message_type: str,
+        action: Optional[str],
+        handler: MessageHandler,
+        switch_component: bool = True,
+    ):
+        """Register a handler for a channel/type/action triple."""
+        key = (channel, message_type, action)
+        if key in self._handlers:
+            raise ValueError(f"Handler already registered for {key}")
+        self._handlers[key] = handler
+        self._component_switch[key] = switch_component
+        if channel not in self._channels:
+            self._channels.append(channel)
+
+    def on(
+        self,
+        channel: str,
+        message_type: str,
+        action: Optional[str] = None,
+        switch_component: bool = True,
+    ) -> Callable[[MessageHandler], MessageHandler]:
+        """Decorator form of ``register``."""
+        def decorator(handler: MessageHandler) -> MessageHandler:
+            self.register(channel, message_type, action, handler, switch_component)
+            return handler
+        return decorator
+
+    def resolve(
+        self, channel: str, message_type: Optional[str], action: Optional[str]
+    ) -> Tuple[Optional[MessageHandler], bool]:
+        """Return the handler for a message and whether it triggers a component switch."""
+        key = (channel, message_type, action)
+        handler = self._handlers.get(key)
+        if handler is None:
+            key = (channel, message_type, None)
+            handler = self._handlers.get(key)
+        if handler is None:
+            return None, False
+        return handler, self._component_switch[key]
+
+    @property
+    def channels(self) -> List[str]:
+        """Channels that have at least one registered handler."""
+        return list(self._channels)
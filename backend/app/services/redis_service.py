@@ -1,19 +1,42 @@
 """Redis service for message handling."""
 
 import asyncio
-import json
+import logging
 import time
-import uuid
 from typing import Optional
 
 from redis.asyncio import Redis
 
+from .message_registry import MessageHandlerRegistry
+from .sse_service import SSEService
+from .. import offload, tracing
+from ..logging_config import truncate
+from ..metrics import REDIS_HANDLER_SECONDS, REDIS_MESSAGES_PROCESSED, REDIS_MESSAGES_RECEIVED
+
+logger = logging.getLogger(__name__)
+
+# Lock keys hold their owner's token; only the owner may extend or drop them.
+RENEW_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("expire", KEYS[1], ARGV[2])
+end
+return 0
+"""
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
 
 class RedisService:
     """Redis service for handling pub/sub messages."""
     # TODO 封装成 BaseRedisService 放到 dp.agent.ui.mq.redis.consumer
     
-    def __init__(self):
+    def __init__(self, registry: MessageHandlerRegistry, sse_service: SSEService):
+        self.registry = registry
+        self.sse_service = sse_service
         self.redis: Optional[Redis] = None
         self.pubsub = None
         self._reconnect_attempts = 0
@@ -22,7 +45,7 @@ class RedisService:
         
     async def connect(self, redis_url: str):
         """Connect to Redis with connection pooling."""
-        print(f"Connecting to Redis at: {redis_url}")
+        logger.info("Connecting to Redis at %s", redis_url)
         self.redis = Redis.from_url(
             redis_url,
             max_connections=10,
@@ -37,17 +60,13 @@ class RedisService:
         """Setup pubsub with proper error handling."""
         try:
             self.pubsub = self.redis.pubsub()
-            print("Subscribing to Redis channels...")
-            await self.pubsub.subscribe("plan:actions")
-            await self.pubsub.subscribe("backlog:actions")
-            await self.pubsub.subscribe("terminal:actions")
-            await self.pubsub.subscribe("approval:requests")
-            await self.pubsub.subscribe("code_interpreter:actions")
-            await self.pubsub.subscribe("file:actions")
-            print("Successfully subscribed to all channels")
+            channels = self.registry.channels
+            logger.info("Subscribing to Redis channels: %s", channels)
+            await self.pubsub.subscribe(*channels)
+            logger.info("Successfully subscribed to all channels")
             self._reconnect_attempts = 0
         except Exception as e:
-            print(f"Error setting up pubsub: {e}")
+            logger.error("Error setting up pubsub: %s", e)
             raise
         
     async def disconnect(self):
@@ -70,15 +89,74 @@ class RedisService:
             True if the message was published successfully, False otherwise
         """
         if not self.redis:
-            print("No Redis connection available")
+            logger.warning("No Redis connection available")
+            return False
+            
+        try:
+            with tracing.start_span("redis.publish", attributes={"messaging.channel": channel}):
+                tracing.inject(message)
+                message_str = await offload.dumps(message, offload.estimate_size(message))
+                await self.redis.publish(channel, message_str)
+            return True
+        except Exception as e:
+            logger.error("Error publishing message to %s: %s", channel, e)
+            return False
+            
+    async def set_hash(self, key: str, mapping: dict, ttl: Optional[int] = None) -> bool:
+        """
+        Write fields to a Redis hash, optionally (re)setting its TTL.
+        
+        Args:
+            key: The Redis hash key
+            mapping: Field/value pairs to write
+            ttl: Expiry in seconds, or None to leave the TTL untouched
+            
+        Returns:
+            True if the hash was written successfully, False otherwise
+        """
+        if not self.redis:
+            logger.warning("No Redis connection available")
             return False
             
         try:
-            message_str = json.dumps(message)
-            await self.redis.publish(channel, message_str)
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.hset(key, mapping=mapping)
+                if ttl:
+                    pipe.expire(key, ttl)
+                await pipe.execute()
             return True
         except Exception as e:
-            print(f"Error publishing message to {channel}: {str(e)}")
+            logger.error("Error writing hash %s: %s", key, e)
+            return False
+
+    async def renew_lock(self, key: str, token: str, ttl: int) -> bool:
+        """
+        Extend a lock's TTL if it is still held with ``token``.
+        
+        Args:
+            key: The lock key
+            token: The value the holder set the lock to
+            ttl: New expiry in seconds
+            
+        Returns:
+            True if the lock was renewed, False if it expired or another holder took it.
+            Redis errors are raised, since they say nothing about who holds the lock.
+        """
+        return bool(await self.redis.eval(RENEW_LOCK_SCRIPT, 1, key, token, ttl))
+    
+    async def release_lock(self, key: str, token: str) -> bool:
+        """
+        Delete a lock if it is still held with ``token``.
+        
+        Returns:
+            True if the lock was released, False if it was not held or on error
+        """
+        if not self.redis:
+            return False
+        try:
+            return bool(await self.redis.eval(RELEASE_LOCK_SCRIPT, 1, key, token))
+        except Exception as e:
+            logger.error("Error releasing lock %s: %s", key, e)
             return False
             
     async def listen_for_messages(self):
@@ -86,292 +164,71 @@ class RedisService:
         while True:
             try:
                 if not self.pubsub:
-                    print("No pubsub connection available, attempting to reconnect...")
+                    logger.warning("No pubsub connection available, attempting to reconnect...")
                     await self._reconnect()
                     continue
                     
-                print("Starting to listen for Redis messages...")
+                logger.info("Starting to listen for Redis messages...")
                 async for message in self.pubsub.listen():
                     if message["type"] == "message":
                         try:
-                            print(f"Received Redis message: {message}")
+                            logger.debug("Received Redis message on %s: %s", message["channel"], truncate(message["data"]), extra={"sampled": True})
                             channel = message["channel"].decode() if isinstance(message["channel"], bytes) else message["channel"]
-                            
-                            if channel == "approval:requests":
-                                data = json.loads(message["data"])
-                                await self._handle_approval_request(data)
-                            else:
-                                data = json.loads(message["data"])
-                                await self._process_message(data)
+                            data = await offload.loads(message["data"])
+                            await self._process_message(channel, data)
                         except Exception as e:
-                            print(f"Error processing message: {e}")
+                            logger.exception("Error processing message: %s", e)
             except Exception as e:
-                print(f"Redis connection error: {e}")
+                logger.error("Redis connection error: %s", e)
                 await self._reconnect()
                 await asyncio.sleep(self._reconnect_delay)
                     
-    async def _process_message(self, message: dict):
-        """Process a received message."""
-        # TODO class BaseRedisService 中把这个作为 abstractmethod,然后让子类实现
+    async def _process_message(self, channel: str, message: dict):
+        """Dispatch a received message to its registered handler."""
         message_type = message.get("type")
-        component = message.get("component")
+        payload = message.get("payload")
+        action = payload.get("action") if isinstance(payload, dict) else None
         
-        if component:
-            await self._send_component_switch(component)
-        
-        if message_type == "plan_action":
-            await self._handle_plan_action(message)
-        elif message_type == "backlog_action":
-            await self._handle_backlog_action(message)
-        elif message_type == "terminal_action":
-            await self._handle_terminal_action(message)
-        elif message_type == "code_interpreter_action":
-            await self._handle_code_interpreter_action(message)
-        elif message_type == "file_action":
-            await self._handle_file_action(message)
-        else:
-            print(f"Unknown message type: {message_type}")
-    
-    async def _handle_approval_request(self, data: dict):
-        """Handle approval requests from MCP server."""
-        try:
-            import time
-            from ..models.approval import Approval
-            from ..services.approval_service import approval_service
-            from ..main import sse_service
-            
-            # 检查消息格式，提取 payload 数据
-            payload = data.get("payload", data)  # 如果有 payload 字段则使用，否则使用整个数据
-            
-            approval = Approval(
-                id=payload.get("id", f"approval-{int(time.time())}"),
-                session_id=payload.get("session_id", "default_session"),
-                function_call_id=payload.get("function_call_id", payload.get("id", f"func-{int(time.time())}")),
-                description=payload.get("description", "Approval request"),
-                status="pending",
-                created_at=int(time.time() * 1000),
-                updated_at=int(time.time() * 1000)
-            )
-            
-            await approval_service.create_approval(approval)
-            
-            await sse_service.send_event("approval_request", {
-                "approval": approval.dict(),
-                "message": "New approval request received"
-            })
-            
-            print(f"Created approval request: {approval.id}")
-            
-        except Exception as e:
-            print(f"Error handling approval request: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            
-    async def _handle_plan_action(self, message: dict):
-        """Handle plan action messages."""
-        from ..main import todo_service, sse_service
+        REDIS_MESSAGES_RECEIVED.inc(channel=channel, type=message_type)
         
-        payload = message.get("payload", {})
-        action = payload.get("action")
+        handler, switch_component = self.registry.resolve(channel, message_type, action)
+        if handler is None:
+            logger.warning("No handler for message on %s: type=%s action=%s", channel, message_type, action)
+            REDIS_MESSAGES_PROCESSED.inc(channel=channel, type=message_type, status="unhandled")
+            return
         
-        try:
-            if action == "add":
-                data = payload.get("data", {})
-                todo = await todo_service.create_todo(
-                    title=data.get("title", ""),
-                    description=data.get("description", "")
-                )
-                await sse_service.send_event("plan_added", {"plan": todo.dict()})
-                
-            elif action == "delete":
-                plan_id = payload.get("planId")
-                if plan_id:
-                    await todo_service.delete_todo(plan_id)
-                    await sse_service.send_event("plan_deleted", {"planId": plan_id})
-                    
-            elif action == "update":
-                plan_id = payload.get("planId")
-                data = payload.get("data", {})
-                if plan_id:
-                    todo = await todo_service.update_todo(plan_id, **data)
-                    if todo:
-                        await sse_service.send_event("plan_updated", {"plan": todo.dict()})
-                        
-            elif action == "toggle":
-                plan_id = payload.get("planId")
-                if plan_id:
-                    todo = await todo_service.toggle_todo(plan_id)
-                    if todo:
-                        await sse_service.send_event("plan_updated", {"plan": todo.dict()})
-                        
-            elif action == "list":
-                todos = await todo_service.get_all_todos()
-                todos_data = [todo.dict() for todo in todos]
-                await sse_service.send_event("plan_list", {"plans": todos_data})
-                        
-        except Exception as e:
-            print(f"Error handling plan action: {e}")
+        receive_attributes = {"messaging.channel": channel, "message.type": message_type, "message.action": action}
+        with tracing.start_span("redis.receive", parent=tracing.extract(message), attributes=receive_attributes), \
+                tracing.message_origin(message.get("timestamp"), message_type, action):
+            component = message.get("component")
+            if component and switch_component:
+                await self._send_component_switch(component)
             
-    async def _handle_backlog_action(self, message: dict):
-        """Handle backlog action messages."""
-        from ..main import backlog_service, sse_service
-        
-        payload = message.get("payload", {})
-        action = payload.get("action")
-        
-        try:
-            if action == "add":
-                data = payload.get("data", {})
-                backlog = await backlog_service.create_backlog(
-                    title=data.get("title", ""),
-                    description=data.get("description", "")
-                )
-                await sse_service.send_event("backlog_added", {"backlog": backlog.dict()})
-                
-            elif action == "delete":
-                backlog_id = payload.get("backlogId")
-                if backlog_id:
-                    await backlog_service.delete_backlog(backlog_id)
-                    await sse_service.send_event("backlog_deleted", {"backlogId": backlog_id})
-                    
-            elif action == "update":
-                backlog_id = payload.get("backlogId")
-                data = payload.get("data", {})
-                if backlog_id:
-                    backlog = await backlog_service.update_backlog(backlog_id, **data)
-                    if backlog:
-                        await sse_service.send_event("backlog_updated", {"backlog": backlog.dict()})
-                        
-            elif action == "send_to_todo":
-                backlog_id = payload.get("backlogId")
-                if backlog_id:
-                    result = await backlog_service.send_to_todo(backlog_id)
-                    if result:
-                        await sse_service.send_event("backlog_sent_to_todo", result)
-                        await sse_service.send_event("plan_added", {"plan": result["todo"]})
-                        await sse_service.send_event("backlog_deleted", {"backlogId": backlog_id})
-                        
-            elif action == "list":
-                backlogs = await backlog_service.get_all_backlogs()
-                backlogs_data = [backlog.dict() for backlog in backlogs]
-                await sse_service.send_event("backlog_list", {"backlogs": backlogs_data})
-                        
-        except Exception as e:
-            print(f"Error handling backlog action: {e}")
+            status = "ok"
+            try:
+                with REDIS_HANDLER_SECONDS.time(channel=channel, type=message_type, action=action):
+                    await handler(message)
+            except Exception as e:
+                status = "error"
+                logger.exception("Error handling %s action %s: %s", message_type, action, e)
+            REDIS_MESSAGES_PROCESSED.inc(channel=channel, type=message_type, status=status)
             
     async def _send_component_switch(self, component: str):
         """Send component switch event via SSE."""
-        from ..main import sse_service
-        
-        await sse_service.send_event("component_switch", {
+        await self.sse_service.send_event("component_switch", {
             "component": component,
             "timestamp": int(time.time() * 1000)
         })
             
-    async def _handle_terminal_action(self, message: dict):
-        """Handle terminal action messages."""
-        from ..main import sse_service
-        
-        payload = message.get("payload", {})
-        action = payload.get("action")
-        
-        try:
-            if action in ["ls", "cat", "bash"]:
-                await sse_service.send_event("terminal_command_executed", {
-                    "action": action,
-                    "command": payload.get("command", ""),
-                    "output": payload.get("output", ""),
-                    "file": payload.get("file", ""),
-                    "timestamp": payload.get("timestamp", int(time.time() * 1000))
-                })
-                        
-        except Exception as e:
-            print(f"Error handling terminal action: {e}")
-            
-    async def _handle_code_interpreter_action(self, message: dict):
-        """Handle code interpreter action messages."""
-        from ..main import code_interpreter_service, sse_service
-        
-        payload = message.get("payload", {})
-        action = payload.get("action")
-        
-        try:
-            if action == "create_python_notebook":
-                data = payload.get("data", {})
-                state = await code_interpreter_service.create_python_notebook(
-                    state_id=data.get("state_id"),
-                    code=data.get("code", ""),
-                    description=data.get("description", "")
-                )
-                await sse_service.send_event("code_interpreter_state_created", {"state": state.dict()})
-                
-            elif action == "get_notebook_state":
-                state_id = payload.get("state_id")
-                if state_id:
-                    state = await code_interpreter_service.get_notebook_state(state_id)
-                    if state:
-                        await sse_service.send_event("code_interpreter_state_retrieved", {"state": state.dict()})
-                        
-            elif action == "delete":
-                state_id = payload.get("state_id")
-                if state_id:
-                    success = await code_interpreter_service.delete_state(state_id)
-                    if success:
-                        await sse_service.send_event("code_interpreter_state_deleted", {"stateId": state_id})
-                        
-        except Exception as e:
-            print(f"Error handling code interpreter action: {e}")
-    
-    async def _handle_file_action(self, message: dict):
-        """Handle file action messages."""
-        from ..main import sse_service
-        from ..models.file import File
-        from ..services.file_service import file_service
-        
-        payload = message.get("payload", {})
-        action = payload.get("action")
-        
-        try:
-            if action == "create":
-                data = payload.get("data", {})
-                file = File(
-                    id=data.get("id", str(uuid.uuid4())),
-                    session_id=data.get("session_id", "default_session"),
-                    name=data.get("name", ""),
-                    type=data.get("type", "file"),
-                    path=data.get("path", ""),
-                    size=data.get("size"),
-                    content=data.get("content"),
-                    created_at=data.get("created_at", int(time.time() * 1000)),
-                    updated_at=data.get("updated_at", int(time.time() * 1000))
-                )
-                created_file = await file_service.create_file(file)
-                await sse_service.send_event("file_created", {"file": created_file.dict()})
-                
-            elif action == "list":
-                files = await file_service.get_all_files()
-                files_data = [file.dict() for file in files]
-                await sse_service.send_event("file_list", {"files": files_data})
-                
-            elif action == "delete":
-                file_id = payload.get("fileId")
-                if file_id:
-                    success = await file_service.delete_file(file_id)
-                    if success:
-                        await sse_service.send_event("file_deleted", {"fileId": file_id})
-                        
-        except Exception as e:
-            print(f"Error handling file action: {e}")
-            
     async def _reconnect(self):
         """Reconnect to Redis with exponential backoff."""
         if self._reconnect_attempts >= self._max_reconnect_attempts:
-            print(f"Max reconnection attempts ({self._max_reconnect_attempts}) reached")
+            logger.error("Max reconnection attempts (%d) reached", self._max_reconnect_attempts)
             return
             
         self._reconnect_attempts += 1
         delay = self._reconnect_delay * (2 ** (self._reconnect_attempts - 1))
-        print(f"Reconnecting to Redis (attempt {self._reconnect_attempts}/{self._max_reconnect_attempts}) in {delay}s...")
+        logger.warning("Reconnecting to Redis (attempt %d/%d) in %ss...", self._reconnect_attempts, self._max_reconnect_attempts, delay)
         
         try:
             await asyncio.sleep(delay)
@@ -379,4 +236,4 @@ class RedisService:
                 await self.pubsub.close()
             await self._setup_pubsub()
         except Exception as e:
-            print(f"Reconnection failed: {e}")
+            logger.error("Reconnection failed: %s", e)
@@ -1,11 +1,19 @@
 """SSE service for real-time events."""
 
 import asyncio
-import json
-from typing import Any, Dict, Set
+import logging
+import time
+from typing import Any, Dict, Optional, Set
 from fastapi import Request
 from fastapi.responses import StreamingResponse
 
+from .. import tracing
+from .. import offload
+from ..compression import Compressor
+from ..metrics import TOOL_TO_UI_SECONDS
+
+logger = logging.getLogger(__name__)
+
 
 class SSEService:
     """Server-Sent Events service."""
@@ -25,8 +33,22 @@ class SSEService:
         """Remove an SSE connection."""
         self.connections.discard(queue)
         
+    def stats(self) -> Dict[str, int]:
+        """Connection count and queue depths of the open SSE streams."""
+        depths = [queue.qsize() for queue in self.connections]
+        return {
+            "connections": len(depths),
+            "queue_depth_total": sum(depths),
+            "queue_depth_max": max(depths, default=0),
+        }
+        
     async def send_event(self, event: str, data: Dict[str, Any]):
-        """Send an event to all connected clients."""
+        """Send an event to all connected clients.
+        
+        The event is encoded once for all connections. Each queued item also
+        carries the enqueue span and the originating message (if any), so the
+        stream can record delivery spans and tool-to-UI latency.
+        """
         if not self.connections:
             return
             
@@ -35,19 +57,32 @@ class SSEService:
             "data": data
         }
         
-        disconnected = set()
-        for queue in self.connections:
-            try:
-                await queue.put(event_data)
-            except Exception:
-                disconnected.add(queue)
-                
-        for queue in disconnected:
-            self.connections.discard(queue)
+        with tracing.start_span("sse.enqueue", attributes={"sse.event": event}) as span:
+            encoded = await offload.dumps(event_data, offload.estimate_size(data))
+            chunk = f"data: {encoded}\n\n"
+            delivery = (span.context if span else None, time.time_ns(), tracing.current_origin())
+            if span:
+                span.set_attribute("sse.connections", len(self.connections))
+            
+            disconnected = set()
+            for queue in self.connections:
+                try:
+                    await queue.put((event, chunk, delivery))
+                except Exception:
+                    disconnected.add(queue)
+                    
+            for queue in disconnected:
+                self.connections.discard(queue)
             
-    async def event_stream(self, request: Request):
-        """Generate SSE event stream."""
+    async def event_stream(self, request: Request, encoding: Optional[str] = None):
+        """Generate SSE event stream.
+        
+        With ``encoding`` ("gzip" or "br") the stream is compressed through one
+        context per connection, flushed after every event so the client can
+        dispatch it immediately.
+        """
         queue = await self.add_connection()
+        compressor = Compressor(encoding, transport="sse") if encoding else None
         
         try:
             while True:
@@ -55,16 +90,26 @@ class SSEService:
                     break
                     
                 try:
-                    event_data = await asyncio.wait_for(queue.get(), timeout=30.0)
-                    yield f"data: {json.dumps(event_data)}\n\n"
+                    event, chunk, delivery = await asyncio.wait_for(queue.get(), timeout=30.0)
+                    yield await compressor.compress(chunk.encode()) if compressor else chunk
+                    self._record_delivery(event, delivery)
                 except asyncio.TimeoutError:
-                    yield "data: {\"event\": \"heartbeat\"}\n\n"
+                    chunk = "data: {\"event\": \"heartbeat\"}\n\n"
+                    yield await compressor.compress(chunk.encode()) if compressor else chunk
                     
         except Exception as e:
-            print(f"SSE stream error: {e}")
+            logger.error("SSE stream error: %s", e)
         finally:
             await self.remove_connection(queue)
             
+    def _record_delivery(self, event: str, delivery: tuple):
+        """Record the flush span and tool-to-UI latency once an event was written to a client."""
+        parent, enqueued_ns, origin = delivery
+        tracing.record_span("sse.flush", parent, enqueued_ns, {"sse.event": event})
+        if origin and origin.get("timestamp"):
+            latency = time.time() - origin["timestamp"] / 1000
+            TOOL_TO_UI_SECONDS.observe(max(latency, 0.0), type=origin["type"], action=origin["action"])
+            
     def _start_cleanup_task(self):
         """Start background task to clean up dead connections."""
         if self._cleanup_task is None or self._cleanup_task.done():
@@ -88,7 +133,7 @@ class SSEService:
                     self.connections.discard(queue)
                     
                 if dead_connections:
-                    print(f"Cleaned up {len(dead_connections)} dead SSE connections")
+                    logger.info("Cleaned up %d dead SSE connections", len(dead_connections))
                     
             except Exception as e:
-                print(f"Error in SSE cleanup task: {e}")
+                logger.error("Error in SSE cleanup task: %s", e)
@@ -0,0 +1,157 @@
+"""Terminal history store.
+
+Each terminal session's output is an append-only character stream. The MCP
+server assigns every chunk its ``offset`` in that stream, so a chunk is
+stored under ``(session_id, start_offset)`` and every backend worker that
+receives the same pub/sub message can insert it: the first insert wins and
+the rest are ignored. Reads page through the stream by offset using the
+primary key, and commands are kept alongside with the offsets where their
+output starts and ends.
+"""
+
+import time
+from typing import List, Optional
+
+import aiomysql
+
+from ..database import database
+from ..metrics import db_timed
+
+MAX_PAGE_CHUNKS = 1000
+
+CHUNK_COLUMNS = "start_offset, length, command_id, stream, data"
+COMMAND_COLUMNS = (
+    "id, session_id, command, tool, file, start_offset, end_offset, exit_code, "
+    "timed_out, truncated, duration_ms, created_at, finished_at"
+)
+
+
+def _chunk(row: dict, offset: Optional[int] = None) -> dict:
+    """API shape of a stored chunk, optionally trimmed to start at ``offset``."""
+    data = row["data"]
+    start = row["start_offset"]
+    if offset is not None and offset > start:
+        data = data[offset - start:]
+        start = offset
+    return {"offset": start, "length": len(data), "command_id": row["command_id"], "stream": row["stream"], "data": data}
+
+
+class TerminalService:
+    """Terminal command and output history, stored in MySQL."""
+
+    def __init__(self):
+        pass
+
+    @db_timed
+    async def append_output(self, session_id: str, offset: int, command_id: str, stream: str, data: str) -> bool:
+        """Store a chunk at ``offset``. Returns False if it was already stored."""
+        async with database.get_connection() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(
+                    """INSERT IGNORE INTO terminal_output
+                       (session_id, start_offset, length, command_id, stream, data, created_at)
+                       VALUES (%s, %s, %s, %s, %s, %s, %s)""",
+                    (session_id, offset, len(data), command_id, stream, data, int(time.time() * 1000))
+                )
+                await conn.commit()
+                return cursor.rowcount > 0
+
+    @db_timed
+    async def get_output(self, session_id: str, offset: int = 0, limit: int = 200) -> dict:
+        """Up to ``limit`` chunks of the session's output from ``offset`` on.
+
+        A chunk that straddles ``offset`` is trimmed to start there. Pass the
+        returned ``next_offset`` back to read the following page.
+        """
+        offset = max(offset, 0)
+        limit = min(max(limit, 1), MAX_PAGE_CHUNKS)
+        chunks = []
+        async with database.get_connection() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                if offset > 0:
+                    await cursor.execute(
+                        f"""SELECT {CHUNK_COLUMNS} FROM terminal_output
+                            WHERE session_id = %s AND start_offset < %s
+                            ORDER BY start_offset DESC LIMIT 1""",
+                        (session_id, offset)
+                    )
+                    row = await cursor.fetchone()
+                    if row and row["start_offset"] + row["length"] > offset:
+                        chunks.append(_chunk(row, offset))
+
+                if len(chunks) < limit:
+                    await cursor.execute(
+                        f"""SELECT {CHUNK_COLUMNS} FROM terminal_output
+                            WHERE session_id = %s AND start_offset >= %s
+                            ORDER BY start_offset LIMIT %s""",
+                        (session_id, offset, limit - len(chunks))
+                    )
+                    chunks.extend(_chunk(row) for row in await cursor.fetchall())
+
+                await cursor.execute(
+                    """SELECT start_offset + length AS end_offset FROM terminal_output
+                       WHERE session_id = %s ORDER BY start_offset DESC LIMIT 1""",
+                    (session_id,)
+                )
+                last = await cursor.fetchone()
+
+        length = int(last["end_offset"]) if last else 0
+        next_offset = chunks[-1]["offset"] + chunks[-1]["length"] if chunks else max(offset, length)
+        return {
+            "session_id": session_id,
+            "offset": offset,
+            "next_offset": next_offset,
+            "length": length,
+            "has_more": next_offset < length,
+            "chunks": chunks,
+        }
+
+    @db_timed
+    async def record_start(self, command_id: str, session_id: str, command: str, tool: str,
+                           file: Optional[str], start_offset: Optional[int], created_at: int) -> bool:
+        """Record a command that has started. Returns False if it was already recorded."""
+        async with database.get_connection() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(
+                    """INSERT IGNORE INTO terminal_commands
+                       (id, session_id, command, tool, file, start_offset, created_at)
+                       VALUES (%s, %s, %s, %s, %s, %s, %s)""",
+                    (command_id, session_id, command, tool, file, start_offset, created_at)
+                )
+                await conn.commit()
+                return cursor.rowcount > 0
+
+    @db_timed
+    async def record_exit(self, command_id: str, exit_code: Optional[int], timed_out: bool, truncated: bool,
+                          duration_ms: int, end_offset: Optional[int], finished_at: int) -> bool:
+        """Record how a command finished."""
+        async with database.get_connection() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(
+                    """UPDATE terminal_commands
+                       SET exit_code = %s, timed_out = %s, truncated = %s, duration_ms = %s,
+                           end_offset = %s, finished_at = %s
+                       WHERE id = %s""",
+                    (exit_code, timed_out, truncated, duration_ms, end_offset, finished_at, command_id)
+                )
+                await conn.commit()
+                return cursor.rowcount > 0
+
+    @db_timed
+    async def get_commands(self, session_id: str, limit: int = 100) -> List[dict]:
+        """The session's most recent ``limit`` commands, oldest first."""
+        limit = min(max(limit, 1), MAX_PAGE_CHUNKS)
+        async with database.get_connection() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(
+                    f"""SELECT {COMMAND_COLUMNS} FROM terminal_commands
+                        WHERE session_id = %s ORDER BY created_at DESC LIMIT %s""",
+                    (session_id, limit)
+                )
+                rows = await cursor.fetchall()
+        for row in rows:
+            row["timed_out"] = bool(row["timed_out"])
+            row["truncated"] = bool(row["truncated"])
+        return list(reversed(rows))
+
+terminal_service = TerminalService()
@@ -2,11 +2,17 @@
 
 import time
 import uuid
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
+
+import aiomysql
 
 from ..database import database
+from ..metrics import db_timed
+from ..versions import TODOS, collection_versions
 from ..models.todo import Todo, TodoCreate, TodoUpdate
 
+TODO_LIST_COLUMNS = "id, title, COALESCE(description, '') AS description, completed, created_at, updated_at"
+
 
 class TodoService:
     """Todo service for managing todo items with SQLite storage."""
@@ -14,29 +20,36 @@ class TodoService:
     def __init__(self):
         pass
         
-    async def get_all_todos(self) -> List[Todo]:
-        """Get all todo items."""
+    @db_timed
+    async def get_all_todo_rows(self) -> List[dict]:
+        """Get all todo items as plain dicts, ready for JSON encoding.
+        
+        Skips pydantic validation; list endpoints and SSE broadcasts use this
+        directly instead of converting models back to dicts.
+        """
         async with database.get_connection() as conn:
-            async with conn.cursor() as cursor:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
                 await cursor.execute(
-                    "SELECT id, title, description, completed, created_at, updated_at FROM todos ORDER BY created_at DESC"
+                    f"SELECT {TODO_LIST_COLUMNS} FROM todos ORDER BY created_at DESC"
                 )
                 rows = await cursor.fetchall()
-                
-                todos = []
                 for row in rows:
-                    todo = Todo(
-                        id=row[0],
-                        title=row[1],
-                        description=row[2] or "",
-                        completed=bool(row[3]),
-                        created_at=row[4],
-                        updated_at=row[5]
-                    )
-                    todos.append(todo)
-                
-                return todos
+                    row["completed"] = bool(row["completed"])
+                return rows
+        
+    async def stream_todo_rows(self, batch_size: int = 500) -> AsyncIterator[List[dict]]:
+        """Stream all todo items as batches of dict rows from a server-side cursor."""
+        query = f"SELECT {TODO_LIST_COLUMNS} FROM todos ORDER BY created_at DESC"
+        async for rows in database.stream(query, batch_size=batch_size):
+            for row in rows:
+                row["completed"] = bool(row["completed"])
+            yield rows
+        
+    async def get_all_todos(self) -> List[Todo]:
+        """Get all todo items."""
+        return [Todo.model_construct(**row) for row in await self.get_all_todo_rows()]
         
+    @db_timed
     async def get_todo(self, todo_id: str) -> Optional[Todo]:
         """Get a specific todo item."""
         async with database.get_connection() as conn:
@@ -59,6 +72,7 @@ class TodoService:
                     updated_at=row[5]
                 )
         
+    @db_timed
     async def create_todo(self, title: str, description: str = "") -> Todo:
         """Create a new todo item."""
         todo_id = str(uuid.uuid4())
@@ -71,6 +85,7 @@ class TodoService:
                     (todo_id, title, description, False, timestamp, timestamp)
                 )
                 await conn.commit()
+                await collection_versions.bump(TODOS)
         
         todo = Todo(
             id=todo_id,
@@ -83,6 +98,7 @@ class TodoService:
         
         return todo
         
+    @db_timed
     async def update_todo(self, todo_id: str, **kwargs) -> Optional[Todo]:
         """Update a todo item."""
         todo = await self.get_todo(todo_id)
@@ -112,20 +128,24 @@ class TodoService:
                         update_values
                     )
                     await conn.commit()
+                    await collection_versions.bump(TODOS)
             
             todo.updated_at = timestamp
         
         return todo
         
+    @db_timed
     async def delete_todo(self, todo_id: str) -> bool:
         """Delete a todo item."""
         async with database.get_connection() as conn:
             async with conn.cursor() as cursor:
                 await cursor.execute("DELETE FROM todos WHERE id = %s", (todo_id,))
                 await conn.commit()
+                await collection_versions.bump(TODOS)
                 
                 return cursor.rowcount > 0
         
+    @db_timed
     async def toggle_todo(self, todo_id: str) -> Optional[Todo]:
         """Toggle todo completion status."""
         todo = await self.get_todo(todo_id)
@@ -142,6 +162,7 @@ class TodoService:
                     (new_completed, timestamp, todo_id)
                 )
                 await conn.commit()
+                await collection_versions.bump(TODOS)
         
         todo.completed = new_completed
         todo.updated_at = timestamp
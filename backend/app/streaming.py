@@ -0,0 +1,78 @@
+"""Streaming JSON responses for large list endpoints.
+
+Rows arrive in batches from ``Database.stream`` and are encoded one batch at a
+time, so memory stays bounded by the batch size and the first bytes are sent
+as soon as the first batch is read.
+"""
+
+import json
+import logging
+from typing import AsyncIterator, List, Optional
+
+from fastapi import Query
+from fastapi.responses import StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+JSON_MEDIA_TYPE = "application/json"
+
+
+
+def stream_query():
+    """Optional ``stream`` query parameter selecting a streaming format for list routes."""
+    return Query(
+        None,
+        pattern="^(ndjson|json)$",
+        description="Stream the result: 'ndjson' for one JSON object per line, 'json' for a chunked JSON array",
+    )
+
+
+def _dumps(row: dict) -> str:
+    return json.dumps(row, ensure_ascii=False, separators=(",", ":"))
+
+
+async def ndjson_chunks(batches: AsyncIterator[List[dict]]) -> AsyncIterator[bytes]:
+    """Encode each batch as newline-delimited JSON."""
+    async for rows in batches:
+        yield "".join(_dumps(row) + "\n" for row in rows).encode()
+
+
+async def json_array_chunks(batches: AsyncIterator[List[dict]]) -> AsyncIterator[bytes]:
+    """Encode the batches as a single JSON array, one chunk per batch."""
+    yield b"["
+    first = True
+    async for rows in batches:
+        chunk = ",".join(_dumps(row) for row in rows)
+        yield (chunk if first else "," + chunk).encode()
+        first = False
+    yield b"]"
+
+
+async def _logged(chunks: AsyncIterator[bytes], name: str) -> AsyncIterator[bytes]:
+    # The status line is already sent once streaming starts, so a failure can
+    # only cut the response short; make sure it is at least logged.
+    try:
+        async for chunk in chunks:
+            yield chunk
+    except Exception as e:
+        logger.exception("Error streaming %s: %s", name, e)
+        raise
+
+
+def stream_bytes(
+    chunks: AsyncIterator[bytes], media_type: str, name: str, size: Optional[int] = None,
+    headers: Optional[dict] = None
+) -> StreamingResponse:
+    """Build a streaming response passing ``chunks`` through as they are read."""
+    headers = dict(headers or {})
+    if size is not None:
+        headers["Content-Length"] = str(size)
+    return StreamingResponse(_logged(chunks, name), media_type=media_type, headers=headers)
+
+
+def stream_rows(batches: AsyncIterator[List[dict]], stream_format: str, name: str) -> StreamingResponse:
+    """Build a streaming response for ``batches`` in the requested format."""
+    if stream_format == "ndjson":
+        return StreamingResponse(_logged(ndjson_chunks(batches), name), media_type=NDJSON_MEDIA_TYPE)
+    return StreamingResponse(_logged(json_array_chunks(batches), name), media_type=JSON_MEDIA_TYPE)
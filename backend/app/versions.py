@@ -0,0 +1,163 @@
+"""Per-collection version counters for conditional GET.
+
+Every service write bumps its collection's counter in a Redis hash after the
+transaction commits, so all backend workers share one view. GET routes read
+the counter first (one Redis round trip), derive an ``ETag`` and
+``Last-Modified`` from it, and answer ``304 Not Modified`` without touching
+the database when the client already has that version.
+
+The hash also holds a random epoch, so counters restarting from zero after a
+Redis reset never reproduce an ETag a client saw before.
+"""
+
+import logging
+import secrets
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Request, Response
+from redis.asyncio import Redis
+
+logger = logging.getLogger(__name__)
+
+VERSIONS_KEY = "collection_versions"
+EPOCH_FIELD = "epoch"
+
+TODOS = "todos"
+BACKLOGS = "backlogs"
+FILES = "files"
+APPROVALS = "approvals"
+CODE_INTERPRETER_STATES = "code_interpreter_states"
+
+
+def _decode(value) -> Optional[str]:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class CacheValidators:
+    """ETag / Last-Modified pair for one version of a collection."""
+
+    def __init__(self, etag: str, last_modified_ms: Optional[int]):
+        self.etag = etag
+        self.last_modified_ms = last_modified_ms
+
+    @property
+    def headers(self) -> dict:
+        # no-cache: browsers may store the response but must revalidate it,
+        # which is what turns repeat fetches into cheap 304s.
+        headers = {"ETag": self.etag, "Cache-Control": "no-cache"}
+        if self.last_modified_ms:
+            headers["Last-Modified"] = formatdate(self.last_modified_ms / 1000, usegmt=True)
+        return headers
+
+    def is_fresh(self, request: Request) -> bool:
+        """Whether the client's cached copy (If-None-Match / If-Modified-Since) is current."""
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            return "*" in tags or self.etag.removeprefix("W/") in tags
+
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since and self.last_modified_ms:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(self.last_modified_ms / 1000) <= since
+        return False
+
+
+class CollectionVersions:
+    """Redis-backed version counters, one per collection."""
+
+    def __init__(self):
+        self.redis: Optional[Redis] = None
+        # Set when a write could not be recorded in Redis at all; until the
+        # hash has been dropped this worker serves no validators.
+        self.invalidation_pending = False
+
+    def connect(self, redis: Redis):
+        self.redis = redis
+
+    async def bump(self, collection: str):
+        """Record a committed write to ``collection``. Never raises.
+
+        If the counter cannot be incremented the whole hash is dropped, so the
+        next read starts a new epoch and no ETag a client holds matches any
+        more. If even that fails, this worker stops answering 304 until the
+        hash is dropped by a later bump or read.
+        """
+        if not self.redis:
+            return
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                if self.invalidation_pending:
+                    pipe.delete(VERSIONS_KEY)
+                pipe.hsetnx(VERSIONS_KEY, EPOCH_FIELD, secrets.token_hex(4))
+                pipe.hincrby(VERSIONS_KEY, collection, 1)
+                pipe.hset(VERSIONS_KEY, f"{collection}:modified", int(time.time() * 1000))
+                await pipe.execute()
+            self.invalidation_pending = False
+        except Exception as e:
+            logger.error("Error bumping %s version, invalidating all versions: %s", collection, e)
+            await self._invalidate()
+
+    async def _invalidate(self) -> bool:
+        """Drop every counter so existing ETags stop matching; remember the failure."""
+        try:
+            await self.redis.delete(VERSIONS_KEY)
+        except Exception as e:
+            logger.error("Error invalidating collection versions: %s", e)
+            self.invalidation_pending = True
+            return False
+        self.invalidation_pending = False
+        return True
+
+    async def validators(self, collection: str) -> Optional[CacheValidators]:
+        """Validators for the current version of ``collection``, or None if unavailable."""
+        if not self.redis:
+            return None
+        if self.invalidation_pending and not await self._invalidate():
+            return None
+        try:
+            epoch, version, modified = await self.redis.hmget(
+                VERSIONS_KEY, EPOCH_FIELD, collection, f"{collection}:modified"
+            )
+            if epoch is None:
+                await self.redis.hsetnx(VERSIONS_KEY, EPOCH_FIELD, secrets.token_hex(4))
+                epoch = await self.redis.hget(VERSIONS_KEY, EPOCH_FIELD)
+        except Exception as e:
+            logger.error("Error reading %s version: %s", collection, e)
+            return None
+        etag = f'W/"{_decode(epoch)}.{collection}.{_decode(version) or 0}"'
+        return CacheValidators(etag, int(modified) if modified else None)
+
+
+collection_versions = CollectionVersions()
+
+
+def cache_validators(collection: str):
+    """Route dependency implementing conditional GET for ``collection``.
+
+    Raises a 304 before the route body runs when the client's copy is current.
+    Otherwise the validators are added to the route's response; routes that
+    build their own ``Response`` pass it through ``with_validators``.
+    """
+    async def dependency(request: Request, response: Response) -> Optional[CacheValidators]:
+        validators = await collection_versions.validators(collection)
+        if validators is None:
+            return None
+        if validators.is_fresh(request):
+            raise HTTPException(status_code=304, headers=validators.headers)
+        response.headers.update(validators.headers)
+        return validators
+
+    return Depends(dependency)
+
+
+def with_validators(response: Response, validators: Optional[CacheValidators]) -> Response:
+    """Add ETag / Last-Modified headers to a response built by the route itself."""
+    if validators is not None:
+        response.headers.update(validators.headers)
+    return response
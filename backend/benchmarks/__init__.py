@@ -0,0 +1,6 @@
+"""Benchmarks for the backend message pipeline and services.
+
+Run a benchmark as a module from the ``backend`` directory, e.g.::
+
+    python -m benchmarks.pipeline --publishers 4 --clients 8
+"""
@@ -0,0 +1,269 @@
+"""End-to-end benchmark of the Redis -> backend -> SSE pipeline.
+
+N simulated MCP publishers push ``plan_action`` and ``terminal_action``
+messages through Redis (fakeredis by default) into ``RedisService``, whose
+handlers fan events out to M SSE clients reading ``SSEService.event_stream``.
+Plans live in an in-memory store so the run measures the pipeline rather than
+MySQL.
+
+Usage (from the ``backend`` directory)::
+
+    python -m benchmarks.pipeline --publishers 4 --clients 8 --messages 500
+    python -m benchmarks.pipeline --compare benchmarks/results/baseline.json
+
+Everything runs in one process, so RSS and CPU include the publishers and the
+fakeredis server; compare runs made with the same configuration.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+import uuid
+from typing import Dict, List, Optional
+
+import fakeredis
+from redis.asyncio import Redis
+
+from app.handlers import register_plan_handlers, register_terminal_handlers
+from app.models.todo import Todo
+from app.services.message_registry import MessageHandlerRegistry
+from app.services.redis_service import RedisService
+from app.services.sse_service import SSEService
+from app.services.terminal_service import terminal_service
+
+from .common import ResourceMeter, compare_results, summarize_latencies, write_results
+
+MIXES = {
+    "plan": ("plan",),
+    "terminal": ("terminal",),
+    "mixed": ("plan", "terminal"),
+}
+
+
+class InMemoryTodoService:
+    """Dict-backed stand-in for ``TodoService`` with the same async interface."""
+
+    def __init__(self):
+        self.todos: Dict[str, Todo] = {}
+
+    async def get_all_todos(self) -> List[Todo]:
+        return sorted(self.todos.values(), key=lambda todo: todo.created_at, reverse=True)
+
+    async def get_todo(self, todo_id: str) -> Optional[Todo]:
+        return self.todos.get(todo_id)
+
+    async def create_todo(self, title: str, description: str = "") -> Todo:
+        timestamp = int(time.time() * 1000)
+        todo = Todo(
+            id=str(uuid.uuid4()),
+            title=title,
+            description=description,
+            completed=False,
+            created_at=timestamp,
+            updated_at=timestamp
+        )
+        self.todos[todo.id] = todo
+        return todo
+
+    async def update_todo(self, todo_id: str, **kwargs) -> Optional[Todo]:
+        todo = self.todos.get(todo_id)
+        if not todo:
+            return None
+        for field, value in kwargs.items():
+            if hasattr(todo, field) and value is not None:
+                setattr(todo, field, value)
+        todo.updated_at = int(time.time() * 1000)
+        return todo
+
+    async def delete_todo(self, todo_id: str) -> bool:
+        return self.todos.pop(todo_id, None) is not None
+
+    async def toggle_todo(self, todo_id: str) -> Optional[Todo]:
+        todo = self.todos.get(todo_id)
+        if not todo:
+            return None
+        todo.completed = not todo.completed
+        todo.updated_at = int(time.time() * 1000)
+        return todo
+
+
+class BenchRequest:
+    """Minimal stand-in for the Starlette request consumed by ``event_stream``."""
+
+    async def is_disconnected(self) -> bool:
+        return False
+
+
+def build_message(kind: str, token: str, plan_id: str) -> tuple:
+    """Return ``(channel, message)`` shaped like the MCP server's messages, tagged with ``token``."""
+    envelope = {
+        "id": str(uuid.uuid4()),
+        "timestamp": int(time.time() * 1000),
+        "source": "mcp",
+    }
+    if kind == "plan":
+        envelope.update({
+            "type": "plan_action",
+            "target": "plan_component",
+            "component": "plan",
+            "payload": {"action": "update", "planId": plan_id, "data": {"description": token}},
+        })
+        return "plan:actions", envelope
+    envelope.update({
+        "type": "terminal_action",
+        "target": "terminal_component",
+        "component": "terminal",
+        "payload": {"action": "bash", "command": f"echo {token}", "output": token},
+    })
+    return "terminal:actions", envelope
+
+
+def event_token(event: dict) -> Optional[str]:
+    """Token of the benchmark message an SSE event answers, if any."""
+    data = event.get("data", {})
+    if event.get("event") == "plan_updated":
+        return data.get("plan", {}).get("description")
+    if event.get("event") == "terminal_command_executed":
+        return data.get("output")
+    return None
+
+
+class SSEClient:
+    """Consumes one SSE stream and records per-message delivery latency."""
+
+    def __init__(self, sse_service: SSEService, sent_at: Dict[str, float], expected: int):
+        self.sse_service = sse_service
+        self.sent_at = sent_at
+        self.expected = expected
+        self.latencies: List[float] = []
+        self.events = 0
+        self.done = asyncio.Event()
+
+    async def run(self):
+        async for chunk in self.sse_service.event_stream(BenchRequest()):
+            received = time.perf_counter()
+            self.events += 1
+            token = event_token(json.loads(chunk[len("data: "):]))
+            if token is None or token not in self.sent_at:
+                continue
+            self.latencies.append(received - self.sent_at[token])
+            if len(self.latencies) >= self.expected:
+                self.done.set()
+
+
+async def publish(redis: Redis, publisher_id: int, count: int, kinds: tuple, plan_id: str,
+                  rate: float, sent_at: Dict[str, float]):
+    """Publish ``count`` messages, optionally paced at ``rate`` messages per second."""
+    interval = 1 / rate if rate else 0
+    started = time.perf_counter()
+    for i in range(count):
+        token = f"{publisher_id}-{i}"
+        channel, message = build_message(kinds[i % len(kinds)], token, plan_id)
+        sent_at[token] = time.perf_counter()
+        await redis.publish(channel, json.dumps(message))
+        if interval:
+            delay = started + (i + 1) * interval - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+
+async def run_benchmark(args) -> dict:
+    server = fakeredis.FakeServer()
+
+    def make_redis() -> Redis:
+        if args.redis_url:
+            return Redis.from_url(args.redis_url)
+        return fakeredis.aioredis.FakeRedis(server=server)
+
+    sse_service = SSEService()
+    todo_service = InMemoryTodoService()
+    plan = await todo_service.create_todo("benchmark plan")
+
+    registry = MessageHandlerRegistry()
+    register_plan_handlers(registry, todo_service, sse_service)
+    register_terminal_handlers(registry, terminal_service, sse_service)
+
+    redis_service = RedisService(registry, sse_service)
+    redis_service.redis = make_redis()
+    await redis_service._setup_pubsub()
+    listener = asyncio.create_task(redis_service.listen_for_messages())
+
+    total = args.publishers * args.messages
+    sent_at: Dict[str, float] = {}
+    clients = [SSEClient(sse_service, sent_at, total) for _ in range(args.clients)]
+    client_tasks = [asyncio.create_task(client.run()) for client in clients]
+    while len(sse_service.connections) < args.clients:
+        await asyncio.sleep(0)
+
+    publishers = [make_redis() for _ in range(args.publishers)]
+    kinds = MIXES[args.mix]
+
+    meter = ResourceMeter()
+    meter.start()
+    await asyncio.gather(*(
+        publish(redis, i, args.messages, kinds, plan.id, args.rate, sent_at)
+        for i, redis in enumerate(publishers)
+    ))
+    try:
+        await asyncio.wait_for(asyncio.gather(*(client.done.wait() for client in clients)), args.timeout)
+    except asyncio.TimeoutError:
+        logging.warning("Timed out waiting for deliveries after %ss", args.timeout)
+    meter.stop()
+
+    for task in client_tasks + [listener]:
+        task.cancel()
+    await asyncio.gather(*client_tasks, listener, return_exceptions=True)
+    for redis in publishers:
+        await redis.close()
+    await redis_service.disconnect()
+
+    latencies = [latency for client in clients for latency in client.latencies]
+    delivered = min(len(client.latencies) for client in clients) if clients else 0
+    wall = meter.wall_seconds
+    return {
+        "messages_published": total,
+        "messages_delivered": delivered,
+        "messages_lost": total - delivered,
+        "sse_events_received": sum(client.events for client in clients),
+        "messages_per_second": round(delivered / wall, 2) if wall else 0.0,
+        "sse_deliveries_per_second": round(len(latencies) / wall, 2) if wall else 0.0,
+        "cpu_us_per_message": round(meter.cpu_seconds / total * 1e6, 2) if total else 0.0,
+        "latency": summarize_latencies(latencies),
+        "resources": meter.to_dict(),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--publishers", type=int, default=4, help="simulated MCP publishers")
+    parser.add_argument("--clients", type=int, default=8, help="concurrent SSE clients")
+    parser.add_argument("--messages", type=int, default=500, help="messages per publisher")
+    parser.add_argument("--rate", type=float, default=0, help="messages/sec per publisher (0 = unthrottled)")
+    parser.add_argument("--mix", choices=sorted(MIXES), default="mixed", help="message types to publish")
+    parser.add_argument("--redis-url", help="use a real Redis instead of fakeredis")
+    parser.add_argument("--timeout", type=float, default=120, help="seconds to wait for all deliveries")
+    parser.add_argument("--output", default="benchmarks/results/pipeline.json", help="result JSON path")
+    parser.add_argument("--compare", help="baseline result JSON to compare against")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(message)s")
+
+    results = asyncio.run(run_benchmark(args))
+    config = {k: v for k, v in vars(args).items() if k not in ("output", "compare")}
+    document = write_results(args.output, "pipeline", config, results)
+
+    print(json.dumps(results, indent=2))
+    print(f"Results written to {args.output}")
+    if args.compare:
+        print(f"\nCompared with {args.compare}:")
+        for line in compare_results(document, args.compare):
+            print(f"  {line}")
+
+
+if __name__ == "__main__":
+    main()
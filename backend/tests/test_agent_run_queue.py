@@ -0,0 +1,77 @@
+import asyncio
+
+from app.models.agent import AgentRun
+from app.services.agent_run_service import AgentRunQueue
+
+
+class FakeAgentRunService:
+    def __init__(self):
+        self.finished = []
+
+    async def finish_run(self, run_id, status, events, output=None, error=None, from_statuses=("queued", "running")):
+        self.finished.append((run_id, status, error))
+        return None
+
+
+class FakeRedisService:
+    """Lease store where another worker takes the lease after ``renewals`` renewals."""
+
+    def __init__(self, renewals: int):
+        self.renewals = renewals
+        self.released = []
+        self.messages = []
+
+    async def renew_lock(self, key, token, ttl):
+        self.renewals -= 1
+        return self.renewals >= 0
+
+    async def release_lock(self, key, token):
+        self.released.append((key, token))
+        return False
+
+    async def publish_message(self, channel, message):
+        self.messages.append(message)
+        return True
+
+
+async def run_until_done(queue, run, stream):
+    queue._stream = stream
+    task = asyncio.create_task(queue._execute(run))
+    queue.tasks[run.id] = task
+    await asyncio.wait_for(task, 5)
+
+
+async def test_run_stops_when_its_lease_is_lost():
+    queue = AgentRunQueue(FakeAgentRunService(), FakeRedisService(renewals=2))
+    queue.lease_ttl = 0.03
+    run = AgentRun(id="r1", session_id="s1", message="hi", status="running", created_at=1)
+
+    async def stream_forever(run, events):
+        await asyncio.Event().wait()
+
+    await run_until_done(queue, run, stream_forever)
+
+    assert queue.agent_run_service.finished == [
+        ("r1", "error", "Backend worker lost the session lease during the run")
+    ]
+    # Released by token, so another worker's lease on the session is left alone.
+    assert queue.redis_service.released == [("agent_runs:session:s1", queue.lease_id)]
+
+
+async def test_renewal_errors_do_not_stop_the_run():
+    redis_service = FakeRedisService(renewals=10)
+
+    async def renew_lock(key, token, ttl):
+        raise ConnectionError("connection lost")
+
+    redis_service.renew_lock = renew_lock
+    queue = AgentRunQueue(FakeAgentRunService(), redis_service)
+    queue.lease_ttl = 0.03
+    run = AgentRun(id="r1", session_id="s1", message="hi", status="running", created_at=1)
+
+    async def stream_briefly(run, events):
+        await asyncio.sleep(0.1)
+
+    await run_until_done(queue, run, stream_briefly)
+
+    assert queue.agent_run_service.finished == [("r1", "completed", None)]
@@ -0,0 +1,54 @@
+from app.models.approval import Approval
+from app.services.approval_service import ApprovalSweeper
+
+
+class FakeApprovalService:
+    """Two full batches decided concurrently, then one stale approval left."""
+
+    def __init__(self, batch_size: int):
+        self.batches = [
+            (batch_size, []),
+            (batch_size, []),
+            (1, [Approval(id="a1", session_id="s1", function_call_id="f1", description="deploy",
+                           status="expired", created_at=0, updated_at=1)]),
+        ]
+        self.expire_calls = 0
+
+    async def expire_pending(self, created_before: int, limit: int):
+        self.expire_calls += 1
+        return self.batches.pop(0) if self.batches else (0, [])
+
+    async def archive_resolved(self, updated_before: int, limit: int) -> int:
+        return 0
+
+
+class FakeSSEService:
+    def __init__(self):
+        self.events = []
+
+    async def send_event(self, event_type: str, data: dict):
+        self.events.append((event_type, data))
+
+
+class FakeRedisService:
+    def __init__(self):
+        self.hashes = {}
+        self.messages = []
+
+    async def set_hash(self, key: str, mapping: dict, ttl: int = None) -> bool:
+        self.hashes[key] = mapping
+        return True
+
+    async def publish_message(self, channel: str, message: dict) -> bool:
+        self.messages.append((channel, message))
+        return True
+
+
+async def test_sweep_continues_past_batches_decided_concurrently():
+    sweeper = ApprovalSweeper(FakeApprovalService(batch_size=2), FakeSSEService(), FakeRedisService())
+    sweeper.batch_size = 2
+
+    await sweeper.sweep()
+
+    assert sweeper.approval_service.expire_calls == 3
+    assert [data["approvals"][0]["id"] for _, data in sweeper.sse_service.events] == ["a1"]
@@ -0,0 +1,18 @@
+from app import offload
+from app.services.code_interpreter_service import CodeInterpreterPoller
+
+
+async def test_same_result_sizes_result_through_offload(monkeypatch):
+    sized = []
+    utf8_size = offload.utf8_size
+
+    async def recording_utf8_size(text):
+        sized.append(text)
+        return await utf8_size(text)
+
+    monkeypatch.setattr(offload, "utf8_size", recording_utf8_size)
+    result = "é" * 10
+
+    assert await CodeInterpreterPoller._same_result(result, {"result": result, "result_size": 20})
+    assert not await CodeInterpreterPoller._same_result(result, {"result": result, "result_size": 10})
+    assert sized == [result, result]
@@ -0,0 +1,104 @@
+import contextlib
+import json
+
+import fakeredis.aioredis
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.database import database
+from app.models.code_interpreter import CodeInterpreterArtifact
+from app.routers import code_interpreter
+from app.services.code_interpreter_service import CodeInterpreterService
+from app.versions import collection_versions
+
+ROWS = [
+    {"id": "s1", "ticket_id": "t1", "code": "print(1)", "description": "", "status": "completed",
+     "result": "1\n", "widget_url": "", "result_size": 2, "result_truncated": 0,
+     "created_at": 2, "updated_at": 2},
+    {"id": "s2", "ticket_id": "t2", "code": "print('x' * 5000)", "description": "", "status": "completed",
+     "result": "x" * 1000, "widget_url": "", "result_size": 5001, "result_truncated": 1,
+     "created_at": 1, "updated_at": 1},
+]
+
+
+class FakeCursor:
+    async def execute(self, query, params=None):
+        pass
+
+    async def fetchall(self):
+        # MySQL returns BOOLEAN columns as TINYINT.
+        return [dict(row) for row in ROWS]
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+
+class FakeConnection:
+    def cursor(self, *args):
+        return FakeCursor()
+
+
+@pytest.fixture
+async def client(monkeypatch):
+    @contextlib.asynccontextmanager
+    async def get_connection():
+        yield FakeConnection()
+
+    async def stream(query, params=None, batch_size=500):
+        yield [dict(row) for row in ROWS]
+
+    monkeypatch.setattr(database, "get_connection", get_connection)
+    monkeypatch.setattr(database, "stream", stream)
+    collection_versions.connect(fakeredis.aioredis.FakeRedis())
+
+    app = FastAPI()
+    app.include_router(code_interpreter.router, prefix="/api")
+    app.state.code_interpreter_service = CodeInterpreterService()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+async def test_list_returns_result_truncated_as_bool(client):
+    response = await client.get("/api/code-interpreter/states")
+    assert response.status_code == 200
+    # Compare the JSON text: 0 == False in Python, but clients see 0 and false differently.
+    assert [json.dumps(state["result_truncated"]) for state in response.json()] == ["false", "true"]
+
+
+async def test_ndjson_list_returns_result_truncated_as_bool(client):
+    response = await client.get("/api/code-interpreter/states", params={"stream": "ndjson"})
+    assert response.status_code == 200
+    states = [json.loads(line) for line in response.text.splitlines() if line]
+    assert [json.dumps(state["result_truncated"]) for state in states] == ["false", "true"]
+
+
+@pytest.mark.parametrize("mime_type", ["text/html", "image/svg+xml"])
+async def test_active_artifacts_are_sandboxed(client, monkeypatch, mime_type):
+    await _serve_artifact(monkeypatch, mime_type, b"<script>fetch('/api/todos')</script>")
+    response = await client.get("/api/code-interpreter/states/s1/artifacts/a1")
+    assert response.headers["content-security-policy"] == "sandbox"
+    assert response.headers["x-content-type-options"] == "nosniff"
+
+
+async def test_raster_artifacts_are_served_unsandboxed(client, monkeypatch):
+    await _serve_artifact(monkeypatch, "image/png", b"\x89PNG")
+    response = await client.get("/api/code-interpreter/states/s1/artifacts/a1")
+    assert response.content == b"\x89PNG"
+    assert "content-security-policy" not in response.headers
+    assert response.headers["x-content-type-options"] == "nosniff"
+
+
+async def _serve_artifact(monkeypatch, mime_type, data):
+    async def get_artifact(self, state_id, artifact_id):
+        return CodeInterpreterArtifact(id=artifact_id, state_id=state_id, name="value",
+                                       mime_type=mime_type, size=len(data), created_at=1)
+
+    async def stream_artifact(self, artifact_id):
+        yield data
+
+    monkeypatch.setattr(CodeInterpreterService, "get_artifact", get_artifact)
+    monkeypatch.setattr(CodeInterpreterService, "stream_artifact", stream_artifact)
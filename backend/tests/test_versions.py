@@ -0,0 +1,48 @@
+import fakeredis
+import fakeredis.aioredis
+
+from app.versions import TODOS, CollectionVersions
+
+
+class FailingPipelineRedis(fakeredis.aioredis.FakeRedis):
+    """FakeRedis whose transactions fail, as on a dropped connection mid-bump."""
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        raise ConnectionError("connection lost")
+
+
+class FailingRedis(FailingPipelineRedis):
+    async def delete(self, *names):
+        raise ConnectionError("connection lost")
+
+
+async def test_failed_bump_invalidates_cached_versions():
+    server = fakeredis.FakeServer()
+    versions = CollectionVersions()
+    versions.connect(fakeredis.aioredis.FakeRedis(server=server))
+    await versions.bump(TODOS)
+    before = await versions.validators(TODOS)
+
+    versions.connect(FailingPipelineRedis(server=server))
+    await versions.bump(TODOS)
+
+    after = await versions.validators(TODOS)
+    assert after.etag != before.etag
+    assert after.last_modified_ms is None
+
+
+async def test_failed_invalidation_suppresses_validators_until_redis_recovers():
+    server = fakeredis.FakeServer()
+    versions = CollectionVersions()
+    versions.connect(fakeredis.aioredis.FakeRedis(server=server))
+    await versions.bump(TODOS)
+    before = await versions.validators(TODOS)
+
+    versions.connect(FailingRedis(server=server))
+    await versions.bump(TODOS)
+    assert await versions.validators(TODOS) is None
+
+    versions.connect(fakeredis.aioredis.FakeRedis(server=server))
+    after = await versions.validators(TODOS)
+    assert after.etag != before.etag
+    assert not versions.invalidation_pending
@@ -5,10 +5,22 @@ import { useSSE, SSEProvider } from '@/contexts/SSEContext';
 import { useTerminal } from '@/hooks/useTerminal';
 import './App.css';
 
+const terminalSessionId = import.meta.env.VITE_SESSION_ID || 'default_session';
+
 function AppContent() {
   const [activeTab, setActiveTab] = useState<'plan' | 'backlog' | 'terminal' | 'approval' | 'code-interpreter' | 'file-browser'>('plan');
-  const { isConnected, lastEvent } = useSSE();
-  const { terminalCommands, addTerminalCommand } = useTerminal();
+  const { isConnected, lastEvent, subscribe } = useSSE();
+  const {
+    terminalCommands,
+    addTerminalCommand,
+    appendTerminalOutput,
+    finishTerminalCommand,
+    loadTerminalHistory
+  } = useTerminal();
+
+  useEffect(() => {
+    loadTerminalHistory(terminalSessionId);
+  }, [loadTerminalHistory]);
 
   useEffect(() => {
     if (lastEvent) {
@@ -32,6 +44,32 @@ function AppContent() {
       }
     }
   }, [lastEvent, addTerminalCommand]);
+
+  useEffect(() => {
+    // Streamed terminal events arrive in bursts, so they are consumed through
+    // a listener rather than lastEvent, which only keeps the latest event.
+    return subscribe(({ event, data }) => {
+      switch (event) {
+        case 'terminal_command_started':
+          addTerminalCommand({
+            id: data.command_id,
+            action: data.action,
+            command: data.command,
+            output: '',
+            file: data.file,
+            timestamp: data.timestamp || Date.now(),
+            status: 'running'
+          }, data.session_id, data.offset);
+          break;
+        case 'terminal_output_chunk':
+          appendTerminalOutput(data);
+          break;
+        case 'terminal_command_finished':
+          finishTerminalCommand(data);
+          break;
+      }
+    });
+  }, [subscribe, addTerminalCommand, appendTerminalOutput, finishTerminalCommand]);
   return (
     <div className="h-screen bg-gray-50">
       <PanelGroup direction="horizontal" className="h-full">
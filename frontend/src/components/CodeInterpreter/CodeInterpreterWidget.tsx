@@ -1,4 +1,7 @@
-import { CodeInterpreterState } from '@/types/code_interpreter';
+import { useEffect, useState } from 'react';
+import { CodeInterpreterArtifact, CodeInterpreterState } from '@/types/code_interpreter';
+
+const apiUrl = import.meta.env.VITE_API_URL || 'http://localhost:8000';
 
 interface CodeInterpreterWidgetProps {
   state: CodeInterpreterState;
@@ -6,6 +9,27 @@ interface CodeInterpreterWidgetProps {
 }
 
 export function CodeInterpreterWidget({ state, onBack }: CodeInterpreterWidgetProps) {
+  const [artifacts, setArtifacts] = useState<CodeInterpreterArtifact[]>([]);
+
+  useEffect(() => {
+    let cancelled = false;
+    fetch(`${apiUrl}/api/code-interpreter/states/${state.id}/artifacts`)
+      .then(response => (response.ok ? response.json() : []))
+      .then((data: CodeInterpreterArtifact[]) => {
+        if (!cancelled) setArtifacts(data);
+      })
+      .catch(err => console.error('Failed to fetch code interpreter artifacts:', err));
+    return () => {
+      cancelled = true;
+    };
+  }, [state.id, state.updated_at]);
+
+  const artifactUrl = (artifact: CodeInterpreterArtifact) =>
+    `${apiUrl}/api/code-interpreter/states/${state.id}/artifacts/${artifact.id}`;
+  const resultArtifact = artifacts.find(artifact => artifact.name === 'result');
+  const images = artifacts.filter(artifact => artifact.mime_type.startsWith('image/'));
+  const others = artifacts.filter(artifact => artifact !== resultArtifact && !images.includes(artifact));
+
   return (
     <div className="space-y-4">
       <div className="flex items-center justify-between">
@@ -35,6 +59,41 @@ export function CodeInterpreterWidget({ state, onBack }: CodeInterpreterWidgetPr
           <pre className="text-sm text-green-700 whitespace-pre-wrap font-mono">
             {state.result}
           </pre>
+          {state.result_truncated && resultArtifact && (
+            <a
+              href={artifactUrl(resultArtifact)}
+              target="_blank"
+              rel="noreferrer"
+              className="text-xs text-green-800 underline"
+            >
+              查看完整结果 ({state.result_size} 字节)
+            </a>
+          )}
+        </div>
+      )}
+
+      {images.map(artifact => (
+        <img
+          key={artifact.id}
+          src={artifactUrl(artifact)}
+          alt={artifact.name}
+          className="max-w-full border rounded"
+        />
+      ))}
+
+      {others.length > 0 && (
+        <div className="flex flex-wrap gap-2 text-xs">
+          {others.map(artifact => (
+            <a
+              key={artifact.id}
+              href={artifactUrl(artifact)}
+              target="_blank"
+              rel="noreferrer"
+              className="px-2 py-1 bg-gray-100 rounded text-gray-700 hover:bg-gray-200"
+            >
+              {artifact.name} ({artifact.size} 字节)
+            </a>
+          ))}
         </div>
       )}
       
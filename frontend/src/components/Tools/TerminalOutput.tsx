@@ -46,6 +46,14 @@ export function TerminalOutput({ commands, disabled }: TerminalOutputProps) {
               <span className="text-white">{cmd.command}</span>
             </div>
             <div className="flex items-center space-x-2">
+              {cmd.status === 'running' && (
+                <span className="text-yellow-400 text-xs">运行中</span>
+              )}
+              {cmd.status === 'finished' && (
+                <span className={`text-xs ${cmd.exitCode === 0 ? 'text-green-400' : 'text-red-400'}`}>
+                  {cmd.timedOut ? '超时' : `退出码 ${cmd.exitCode}`}
+                </span>
+              )}
               <span className="text-gray-400 text-xs">
                 {formatTimestamp(cmd.timestamp)}
               </span>
@@ -71,6 +79,10 @@ export function TerminalOutput({ commands, disabled }: TerminalOutputProps) {
             </pre>
           </div>
           
+          {cmd.truncated && (
+            <div className="mt-2 text-xs text-yellow-400">输出超过上限，已截断</div>
+          )}
+          
           {cmd.file && (
             <div className="mt-2 text-xs text-gray-400">
               文件: <span className="text-blue-400">{cmd.file}</span>
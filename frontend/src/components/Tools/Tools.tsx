@@ -15,6 +15,7 @@ import { useApprovals } from '@/hooks/useApprovals';
 import { useCodeInterpreter } from '@/hooks/useCodeInterpreter';
 import { useSSE } from '@/contexts/SSEContext';
 import { FileBrowser } from './FileBrowser';
+import { streamAgentMessage } from '@/lib/agent';
 
 interface ToolsProps {
   activeTab: 'plan' | 'backlog' | 'terminal' | 'approval' | 'code-interpreter' | 'file-browser';
@@ -65,7 +66,7 @@ export function Tools({ activeTab, setActiveTab, terminalCommands, isConnected }
           }
           break;
         case 'approval_updated':
-          if (lastEvent.data?.approval) {
+          if (lastEvent.data?.approval || lastEvent.data?.approvals) {
             refetchApprovals();
           }
           break;
@@ -118,25 +119,11 @@ export function Tools({ activeTab, setActiveTab, terminalCommands, isConnected }
     try {
       const message = `分析 ${plan.title} 任务花了多久完成`;
       
-      const response = await fetch(`${import.meta.env.VITE_API_URL}/api/agent/message`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({
-          message,
-          sessionId: null
-        }),
+      const result = await streamAgentMessage(message, event => {
+        console.log('Agent event:', event);
       });
-
-      if (!response.ok) {
-        throw new Error('Failed to send message to agent');
-      }
-
-      const result = await response.json();
-      console.log('Agent response:', result);
       
-      alert(`Agent 响应: ${JSON.stringify(result.response)}`);
+      alert(`Agent 响应: ${result}`);
     } catch (error) {
       console.error('Error calling agent:', error);
       alert('调用 Agent 失败，请稍后重试');
@@ -372,6 +359,7 @@ export function Tools({ activeTab, setActiveTab, terminalCommands, isConnected }
                   这个 Terminal 组件可以通过 MCP 工具执行 Linux 命令。尝试使用以下 MCP 命令：
                 </p>
                 <ul className="mt-2 list-disc list-inside space-y-1">
+                  <li><code>run_command(command)</code> - 执行任意 shell 命令，输出实时显示</li>
                   <li><code>ls()</code> - 列出当前目录文件</li>
                   <li><code>cat_run_sh()</code> - 查看 run.sh 文件内容</li>
                   <li><code>bash_run_sh()</code> - 执行 run.sh 脚本</li>
@@ -1,14 +1,19 @@
-import React, { createContext, useContext, useEffect, useRef, useState } from 'react';
+import React, { createContext, useCallback, useContext, useEffect, useRef, useState } from 'react';
 
-interface SSEEvent {
+export interface SSEEvent {
   event: string;
   data: any;
 }
 
+type SSEListener = (event: SSEEvent) => void;
+
 interface SSEContextType {
   isConnected: boolean;
   lastEvent: SSEEvent | null;
   error: string | null;
+  // Called synchronously for every event; use it for high-rate events
+  // (e.g. terminal output chunks) where lastEvent may skip updates.
+  subscribe: (listener: SSEListener) => () => void;
 }
 
 const SSEContext = createContext<SSEContextType | undefined>(undefined);
@@ -19,6 +24,14 @@ export function SSEProvider({ children }: { children: React.ReactNode }) {
   const [error, setError] = useState<string | null>(null);
   const eventSourceRef = useRef<EventSource | null>(null);
   const reconnectTimeoutRef = useRef<number | null>(null);
+  const listenersRef = useRef<Set<SSEListener>>(new Set());
+
+  const subscribe = useCallback((listener: SSEListener) => {
+    listenersRef.current.add(listener);
+    return () => {
+      listenersRef.current.delete(listener);
+    };
+  }, []);
 
   const sseUrl = `${import.meta.env.VITE_SSE_URL || 'http://localhost:8000/events'}`;
 
@@ -37,6 +50,7 @@ export function SSEProvider({ children }: { children: React.ReactNode }) {
         try {
           const data = JSON.parse(event.data);
           setLastEvent(data);
+          listenersRef.current.forEach(listener => listener(data));
           console.log('SSE event received:', data);
         } catch (err) {
           console.error('Failed to parse SSE event data:', err);
@@ -95,7 +109,8 @@ export function SSEProvider({ children }: { children: React.ReactNode }) {
     <SSEContext.Provider value={{ 
       isConnected, 
       lastEvent, 
-      error
+      error,
+      subscribe
     }}>
       {children}
     </SSEContext.Provider>
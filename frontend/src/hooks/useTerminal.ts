@@ -1,34 +1,187 @@
-import { useState } from 'react';
-import { TerminalCommand } from '@/types/terminal';
+import { useCallback, useRef, useState } from 'react';
+import {
+  TerminalCommand,
+  TerminalCommandFinished,
+  TerminalCommandRecord,
+  TerminalOutputChunk,
+  TerminalOutputPage,
+} from '@/types/terminal';
 
 interface UseTerminalReturn {
   terminalCommands: TerminalCommand[];
-  addTerminalCommand: (command: TerminalCommand) => void;
+  addTerminalCommand: (command: TerminalCommand, sessionId?: string, offset?: number | null) => void;
+  appendTerminalOutput: (chunk: TerminalOutputChunk) => void;
+  finishTerminalCommand: (finished: TerminalCommandFinished) => void;
+  loadTerminalHistory: (sessionId: string) => Promise<void>;
   clearTerminalCommands: () => void;
 }
 
+const apiUrl = import.meta.env.VITE_API_URL || 'http://localhost:8000';
+
+// Offsets count code points (as the server does), not UTF-16 units.
+function dropCodePoints(text: string, count: number): string {
+  return count > 0 ? Array.from(text).slice(count).join('') : text;
+}
+
 export function useTerminal(): UseTerminalReturn {
   const [terminalCommands, setTerminalCommands] = useState<TerminalCommand[]>([]);
+  // Per session: how far into its output stream we have rendered, and
+  // whether a history fetch is running (or needs to run again).
+  const loadedOffsets = useRef(new Map<string, number>());
+  const fetching = useRef(new Map<string, 'running' | 'again'>());
 
-  const addTerminalCommand = (command: TerminalCommand) => {
+  const addTerminalCommand = useCallback((command: TerminalCommand, sessionId?: string, offset?: number | null) => {
+    if (sessionId && offset != null && !loadedOffsets.current.has(sessionId)) {
+      loadedOffsets.current.set(sessionId, offset);
+    }
     setTerminalCommands(prev => {
-      const exists = prev.some(cmd => 
-        cmd.timestamp === command.timestamp && cmd.action === command.action
+      const exists = prev.some(cmd =>
+        cmd.id === command.id || (cmd.timestamp === command.timestamp && cmd.action === command.action)
       );
       if (exists) {
         return prev;
       }
       return [command, ...prev];
     });
-  };
+  }, []);
+
+  const appendText = useCallback((commandId: string, text: string) => {
+    if (!text) {
+      return;
+    }
+    setTerminalCommands(prev => prev.map(cmd =>
+      cmd.id === commandId ? { ...cmd, output: cmd.output + text } : cmd
+    ));
+  }, []);
+
+  // Renders a chunk that carries its text. Returns false if it starts past
+  // what has been rendered, i.e. some output in between is still missing.
+  const applyChunk = useCallback((sessionId: string, chunk: TerminalOutputChunk): boolean => {
+    const data = chunk.data ?? '';
+    const length = chunk.length ?? data.length;
+    const loaded = loadedOffsets.current.get(sessionId);
+    if (chunk.offset == null) {
+      appendText(chunk.command_id, data);
+      return true;
+    }
+    if (loaded !== undefined && chunk.offset + length <= loaded) {
+      return true;
+    }
+    if (loaded !== undefined && chunk.offset > loaded) {
+      return false;
+    }
+    appendText(chunk.command_id, loaded === undefined ? data : dropCodePoints(data, loaded - chunk.offset));
+    loadedOffsets.current.set(sessionId, chunk.offset + length);
+    return true;
+  }, [appendText]);
+
+  const fetchOutput = useCallback(async (sessionId: string) => {
+    if (fetching.current.has(sessionId)) {
+      fetching.current.set(sessionId, 'again');
+      return;
+    }
+    fetching.current.set(sessionId, 'running');
+    try {
+      let hasMore = true;
+      while (hasMore || fetching.current.get(sessionId) === 'again') {
+        fetching.current.set(sessionId, 'running');
+        const offset = loadedOffsets.current.get(sessionId) ?? 0;
+        const response = await fetch(
+          `${apiUrl}/api/terminal/${encodeURIComponent(sessionId)}/output?offset=${offset}`
+        );
+        if (!response.ok) {
+          throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        const page: TerminalOutputPage = await response.json();
+        for (const chunk of page.chunks) {
+          if (!applyChunk(sessionId, chunk)) {
+            // The store has a gap here (a chunk that was never stored); skip it.
+            loadedOffsets.current.set(sessionId, chunk.offset!);
+            applyChunk(sessionId, chunk);
+          }
+        }
+        hasMore = page.has_more && page.next_offset > offset;
+      }
+    } catch (err) {
+      console.error('Error fetching terminal output:', err);
+    } finally {
+      fetching.current.delete(sessionId);
+    }
+  }, [applyChunk]);
 
-  const clearTerminalCommands = () => {
+  const appendTerminalOutput = useCallback((chunk: TerminalOutputChunk) => {
+    const sessionId = chunk.session_id;
+    if (!sessionId || chunk.offset == null) {
+      appendText(chunk.command_id, chunk.data ?? '');
+      return;
+    }
+    if (chunk.data === undefined || fetching.current.has(sessionId) || !applyChunk(sessionId, chunk)) {
+      fetchOutput(sessionId);
+    }
+  }, [appendText, applyChunk, fetchOutput]);
+
+  const finishTerminalCommand = useCallback((finished: TerminalCommandFinished) => {
+    setTerminalCommands(prev => prev.map(cmd =>
+      cmd.id === finished.command_id
+        ? {
+            ...cmd,
+            status: 'finished',
+            exitCode: finished.exit_code,
+            timedOut: finished.timed_out,
+            truncated: finished.truncated,
+          }
+        : cmd
+    ));
+  }, []);
+
+  const loadTerminalHistory = useCallback(async (sessionId: string) => {
+    try {
+      const response = await fetch(`${apiUrl}/api/terminal/${encodeURIComponent(sessionId)}/commands`);
+      if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+      }
+      const records: TerminalCommandRecord[] = await response.json();
+      if (records.length === 0) {
+        return;
+      }
+      setTerminalCommands(prev => {
+        const known = new Set(prev.map(cmd => cmd.id));
+        const restored: TerminalCommand[] = records
+          .filter(record => !known.has(record.id))
+          .reverse()
+          .map(record => ({
+            id: record.id,
+            action: record.tool,
+            command: record.command,
+            output: '',
+            file: record.file,
+            timestamp: record.created_at,
+            status: record.finished_at ? 'finished' : 'running',
+            exitCode: record.exit_code,
+            timedOut: record.timed_out,
+            truncated: record.truncated,
+          }));
+        return [...prev, ...restored];
+      });
+      if (!loadedOffsets.current.has(sessionId)) {
+        loadedOffsets.current.set(sessionId, records[0].start_offset ?? 0);
+      }
+      await fetchOutput(sessionId);
+    } catch (err) {
+      console.error('Error loading terminal history:', err);
+    }
+  }, [fetchOutput]);
+
+  const clearTerminalCommands = useCallback(() => {
     setTerminalCommands([]);
-  };
+  }, []);
 
   return {
     terminalCommands,
     addTerminalCommand,
+    appendTerminalOutput,
+    finishTerminalCommand,
+    loadTerminalHistory,
     clearTerminalCommands,
   };
 }
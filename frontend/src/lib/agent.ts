@@ -0,0 +1,60 @@
+export interface AgentEvent {
+  author?: string;
+  partial?: boolean;
+  content?: { parts?: { text?: string }[] };
+  [key: string]: unknown;
+}
+
+const apiUrl = import.meta.env.VITE_API_URL || 'http://localhost:8000';
+
+/**
+ * Send a message to the agent and read its run as it happens.
+ *
+ * `onEvent` is called for every ADK event relayed by the backend, including
+ * partial text events while tokens are generated. Resolves to the text of the
+ * final (non-partial) events. Abort `signal` to stop the run.
+ */
+export async function streamAgentMessage(
+  message: string,
+  onEvent: (event: AgentEvent) => void,
+  options: { sessionId?: string | null; signal?: AbortSignal } = {}
+): Promise<string> {
+  const response = await fetch(`${apiUrl}/api/agent/message/stream`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ message, sessionId: options.sessionId ?? null }),
+    signal: options.signal,
+  });
+  if (!response.ok || !response.body) {
+    throw new Error(`Failed to send message to agent: ${response.status}`);
+  }
+
+  const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = '';
+  let text = '';
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += value;
+    const blocks = buffer.split(/\r?\n\r?\n/);
+    buffer = blocks.pop() ?? '';
+    for (const block of blocks) {
+      const lines = block.split(/\r?\n/);
+      const data = lines
+        .filter(line => line.startsWith('data:'))
+        .map(line => line.slice(5).trimStart())
+        .join('\n');
+      if (!data) continue;
+      const parsed = JSON.parse(data);
+      if (lines.some(line => line.startsWith('event: error')) || parsed.error) {
+        throw new Error(parsed.error || 'Agent run failed');
+      }
+      const event = parsed as AgentEvent;
+      onEvent(event);
+      if (!event.partial) {
+        text += (event.content?.parts ?? []).map(part => part.text ?? '').join('');
+      }
+    }
+  }
+  return text;
+}
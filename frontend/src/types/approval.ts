@@ -3,7 +3,7 @@ export interface Approval {
   session_id: string;
   function_call_id: string;
   description: string;
-  status: 'pending' | 'approved' | 'rejected';
+  status: 'pending' | 'approved' | 'rejected' | 'expired';
   created_at: number;
   updated_at: number;
   result?: string;
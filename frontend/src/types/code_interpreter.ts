@@ -6,10 +6,21 @@ export interface CodeInterpreterState {
   status: 'pending' | 'running' | 'completed' | 'error';
   result?: string;
   widget_url?: string;
+  result_size?: number | null;
+  result_truncated?: boolean;
   created_at: number;
   updated_at: number;
 }
 
+export interface CodeInterpreterArtifact {
+  id: string;
+  state_id: string;
+  name: string;
+  mime_type: string;
+  size: number;
+  created_at: number;
+}
+
 export interface CodeInterpreterCreateRequest {
   code: string;
   description?: string;
@@ -5,4 +5,51 @@ export interface TerminalCommand {
   output: string;
   file?: string;
   timestamp: number;
+  status?: 'running' | 'finished';
+  exitCode?: number | null;
+  timedOut?: boolean;
+  truncated?: boolean;
+}
+
+export interface TerminalOutputChunk {
+  command_id: string;
+  session_id?: string;
+  stream: 'stdout' | 'stderr';
+  seq?: number;
+  // Position in the session's output stream, counted in code points.
+  offset?: number | null;
+  length?: number;
+  // Left out of SSE events for large chunks; fetch them from the history API.
+  data?: string;
+}
+
+export interface TerminalOutputPage {
+  session_id: string;
+  offset: number;
+  next_offset: number;
+  length: number;
+  has_more: boolean;
+  chunks: TerminalOutputChunk[];
+}
+
+export interface TerminalCommandRecord {
+  id: string;
+  session_id: string;
+  command: string;
+  tool: string;
+  file?: string;
+  start_offset: number | null;
+  end_offset: number | null;
+  exit_code: number | null;
+  timed_out: boolean;
+  truncated: boolean;
+  created_at: number;
+  finished_at: number | null;
+}
+
+export interface TerminalCommandFinished {
+  command_id: string;
+  exit_code: number | null;
+  timed_out: boolean;
+  truncated: boolean;
 }
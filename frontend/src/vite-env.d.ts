@@ -2,6 +2,7 @@
 interface ImportMetaEnv {
   readonly VITE_API_URL: string
   readonly VITE_SSE_URL: string
+  readonly VITE_SESSION_ID?: string
 }
 
 interface ImportMeta {
@@ -0,0 +1,6 @@
+"""Benchmarks for the MCP server.
+
+Run a benchmark as a module from the ``mcp-server`` directory, e.g.::
+
+    python -m benchmarks.loadgen run --sessions 50 --duration 30
+"""
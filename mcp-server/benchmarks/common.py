@@ -0,0 +1,131 @@
+"""Shared helpers for benchmarks: statistics, resource usage and result files."""
+
+import json
+import math
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of ``values`` (0 for an empty sequence)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize_latencies(seconds: Sequence[float]) -> Dict[str, float]:
+    """p50/p90/p99/max/mean of latencies given in seconds, reported in milliseconds."""
+    if not seconds:
+        return {"count": 0, "p50_ms": 0.0, "p90_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0, "mean_ms": 0.0}
+    return {
+        "count": len(seconds),
+        "p50_ms": round(percentile(seconds, 50) * 1000, 3),
+        "p90_ms": round(percentile(seconds, 90) * 1000, 3),
+        "p99_ms": round(percentile(seconds, 99) * 1000, 3),
+        "max_ms": round(max(seconds) * 1000, 3),
+        "mean_ms": round(sum(seconds) / len(seconds) * 1000, 3),
+    }
+
+
+def current_rss_bytes() -> int:
+    """Resident set size of this process (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class ResourceMeter:
+    """Wall time, CPU time and RSS between ``start()`` and ``stop()``."""
+
+    def __init__(self):
+        self.wall_start = self.wall_end = 0.0
+        self.cpu_start = self.cpu_end = 0.0
+        self.rss_start = self.rss_end = 0
+
+    def start(self):
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        self.rss_start = current_rss_bytes()
+
+    def stop(self):
+        self.wall_end = time.perf_counter()
+        self.cpu_end = time.process_time()
+        self.rss_end = current_rss_bytes()
+
+    @property
+    def wall_seconds(self) -> float:
+        return self.wall_end - self.wall_start
+
+    @property
+    def cpu_seconds(self) -> float:
+        return self.cpu_end - self.cpu_start
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "wall_seconds": round(self.wall_seconds, 4),
+            "cpu_seconds": round(self.cpu_seconds, 4),
+            "rss_start_mb": round(self.rss_start / 2**20, 2),
+            "rss_end_mb": round(self.rss_end / 2**20, 2),
+        }
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(path: str, benchmark: str, config: Dict[str, Any], results: Dict[str, Any]) -> Dict[str, Any]:
+    """Write a result document to ``path`` and return it."""
+    document = {
+        "benchmark": benchmark,
+        "timestamp": int(time.time()),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": config,
+        "results": results,
+    }
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+    return document
+
+
+def _flatten(data: Any, prefix: str = "") -> Dict[str, float]:
+    flat: Dict[str, float] = {}
+    if isinstance(data, dict):
+        for key, value in data.items():
+            flat.update(_flatten(value, f"{prefix}{key}."))
+    elif isinstance(data, (int, float)) and not isinstance(data, bool):
+        flat[prefix[:-1]] = float(data)
+    return flat
+
+
+def compare_results(current: Dict[str, Any], baseline_path: str) -> List[str]:
+    """Describe how every numeric result changed relative to a baseline result file."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    before = _flatten(baseline.get("results", {}))
+    after = _flatten(current.get("results", {}))
+    lines = []
+    for key in sorted(after.keys() & before.keys()):
+        old, new = before[key], after[key]
+        change = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+        lines.append(f"{key}: {old:g} -> {new:g} ({change})")
+    return lines
@@ -0,0 +1,312 @@
+"""Load generator for the MCP server's SSE transport.
+
+Opens many concurrent MCP sessions and has each one call a weighted mix of
+tools (``add_plan``, ``toggle_plan``, ``list_plan``, ``create_file_tool``,
+``ask_for_approval`` by default) back to back until the run ends. It reports
+overall throughput plus per-tool call counts, error rates and latency
+percentiles, and the server's CPU time and RSS when it owns the server.
+
+By default the server is started in a subprocess (``serve``) with the real
+tool registrations, fakeredis in place of Redis and a stub backend answering
+``/api/todos`` and ``/api/backlogs``. ``run --url`` targets a server that is
+already running instead.
+
+Usage (from the ``mcp-server`` directory)::
+
+    python -m benchmarks.loadgen run --sessions 50 --duration 30
+    python -m benchmarks.loadgen run --mix add_plan=1,list_plan=1 --compare benchmarks/results/baseline.json
+    python -m benchmarks.loadgen run --url http://localhost:8001/sse --sessions 20
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+import httpx
+from fastmcp import Client
+
+from .common import compare_results, summarize_latencies, write_results
+
+DEFAULT_MIX = "add_plan=3,toggle_plan=3,list_plan=1,create_file_tool=2,ask_for_approval=1"
+
+logger = logging.getLogger(__name__)
+
+
+def parse_mix(text: str) -> Dict[str, int]:
+    """Parse ``tool=weight,...`` into a dict."""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = int(weight or 1)
+    return mix
+
+
+def tool_arguments(tool: str, session: int, call: int) -> Dict[str, Any]:
+    """Arguments for one call of ``tool``; unknown tools are called without arguments."""
+    tag = f"{session}-{call}"
+    if tool in ("add_plan", "add_backlog"):
+        return {"title": f"load {tag}", "description": "load test"}
+    if tool in ("toggle_plan", "delete_plan"):
+        return {"plan_id": str(uuid.uuid4())}
+    if tool == "create_file_tool":
+        return {"name": f"load_{tag}.txt", "path": f"/load/load_{tag}.txt", "content": "x" * 256}
+    if tool == "ask_for_approval":
+        return {"description": f"load test approval {tag}"}
+    return {}
+
+
+def is_failure(result) -> bool:
+    """A call failed if MCP flagged an error or the tool returned ``success: false``."""
+    if result.isError:
+        return True
+    for content in result.content:
+        text = getattr(content, "text", None)
+        if not text:
+            continue
+        try:
+            data = json.loads(text)
+        except ValueError:
+            continue
+        if isinstance(data, dict) and data.get("success") is False:
+            return True
+    return False
+
+
+class ToolStats:
+    """Latency samples and error count for one tool."""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.errors = 0
+
+    def to_dict(self, duration: float) -> Dict[str, Any]:
+        calls = len(self.latencies)
+        return {
+            "calls": calls,
+            "errors": self.errors,
+            "error_rate": round(self.errors / calls, 4) if calls else 0.0,
+            "calls_per_second": round(calls / duration, 2) if duration else 0.0,
+            "latency": summarize_latencies(self.latencies),
+        }
+
+
+async def run_session(index: int, args, mix: Dict[str, int], deadline: float,
+                      stats: Dict[str, ToolStats], sessions: Dict[str, Any]):
+    """Open one MCP session and call tools until ``deadline``."""
+    tools, weights = list(mix), list(mix.values())
+    rng = random.Random(index)
+    start = time.perf_counter()
+    try:
+        async with Client(args.url, timeout=args.call_timeout) as client:
+            sessions["connect_latencies"].append(time.perf_counter() - start)
+            call = 0
+            while time.perf_counter() < deadline:
+                tool = rng.choices(tools, weights)[0]
+                call_start = time.perf_counter()
+                try:
+                    result = await client.call_tool_mcp(tool, tool_arguments(tool, index, call))
+                    failed = is_failure(result)
+                except Exception as e:
+                    logger.debug("Call to %s failed: %s", tool, e)
+                    failed = True
+                stats[tool].latencies.append(time.perf_counter() - call_start)
+                stats[tool].errors += failed
+                call += 1
+    except Exception as e:
+        logger.warning("Session %d failed: %s", index, e)
+        sessions["failed"] += 1
+
+
+def _server_usage(pid: int) -> Optional[Dict[str, float]]:
+    """CPU seconds and RSS of the server process (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/statm") as f:
+            rss_pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    ticks = os.sysconf("SC_CLK_TCK")
+    return {
+        "cpu_seconds": (int(fields[11]) + int(fields[12])) / ticks,
+        "rss_mb": round(rss_pages * os.sysconf("SC_PAGE_SIZE") / 2**20, 2),
+    }
+
+
+async def _wait_until_ready(base_url: str, timeout: float):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while True:
+            try:
+                response = await client.get(f"{base_url}/metrics")
+                if response.status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"MCP server at {base_url} did not become ready")
+            await asyncio.sleep(0.2)
+
+
+def start_server(args) -> subprocess.Popen:
+    """Start ``serve`` in a subprocess, pointing the tools at its stub backend."""
+    env = dict(os.environ)
+    env["BACKEND_URL"] = f"http://127.0.0.1:{args.backend_port}"
+    env.setdefault("LOG_LEVEL", "WARNING")
+    return subprocess.Popen([
+        sys.executable, "-m", "benchmarks.loadgen", "serve",
+        "--port", str(args.port),
+        "--backend-port", str(args.backend_port),
+        "--backend-items", str(args.backend_items),
+    ], env=env)
+
+
+async def run_load(args) -> dict:
+    mix = parse_mix(args.mix)
+    server = None
+    if not args.url:
+        server = start_server(args)
+        args.url = f"http://127.0.0.1:{args.port}/sse"
+    base_url = args.url.rsplit("/", 1)[0]
+
+    try:
+        await _wait_until_ready(base_url, args.startup_timeout)
+        usage_before = _server_usage(server.pid) if server else None
+
+        stats = {tool: ToolStats() for tool in mix}
+        sessions: Dict[str, Any] = {"connect_latencies": [], "failed": 0}
+        started = time.perf_counter()
+        deadline = started + args.ramp_up + args.duration
+        tasks = []
+        for index in range(args.sessions):
+            tasks.append(asyncio.create_task(run_session(index, args, mix, deadline, stats, sessions)))
+            if args.ramp_up:
+                await asyncio.sleep(args.ramp_up / args.sessions)
+        await asyncio.gather(*tasks)
+        duration = time.perf_counter() - started
+
+        usage_after = _server_usage(server.pid) if server else None
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=10)
+
+    calls = sum(len(tool.latencies) for tool in stats.values())
+    errors = sum(tool.errors for tool in stats.values())
+    results: Dict[str, Any] = {
+        "duration_seconds": round(duration, 3),
+        "sessions_opened": len(sessions["connect_latencies"]),
+        "sessions_failed": sessions["failed"],
+        "connect_latency": summarize_latencies(sessions["connect_latencies"]),
+        "calls": calls,
+        "errors": errors,
+        "error_rate": round(errors / calls, 4) if calls else 0.0,
+        "calls_per_second": round(calls / duration, 2) if duration else 0.0,
+        "latency": summarize_latencies([l for tool in stats.values() for l in tool.latencies]),
+        "tools": {name: tool.to_dict(duration) for name, tool in stats.items()},
+    }
+    if usage_before and usage_after:
+        cpu = usage_after["cpu_seconds"] - usage_before["cpu_seconds"]
+        results["server"] = {
+            "cpu_seconds": round(cpu, 3),
+            "cpu_us_per_call": round(cpu / calls * 1e6, 2) if calls else 0.0,
+            "rss_start_mb": usage_before["rss_mb"],
+            "rss_end_mb": usage_after["rss_mb"],
+        }
+    return results
+
+
+def stub_backend_app(items: int):
+    """Starlette app standing in for the backend endpoints the tools call."""
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse
+    from starlette.routing import Route
+
+    now = int(time.time() * 1000)
+    rows = [
+        {"id": str(i), "title": f"item {i}", "description": "", "completed": False,
+         "created_at": now, "updated_at": now}
+        for i in range(items)
+    ]
+
+    async def list_rows(request):
+        return JSONResponse(rows)
+
+    return Starlette(routes=[Route("/api/todos", list_rows), Route("/api/backlogs", list_rows)])
+
+
+async def serve(args):
+    """Run the MCP server on fakeredis next to a stub backend."""
+    import fakeredis
+    import uvicorn
+
+    from src.logging_config import setup_logging
+    from src.main import create_server
+    from src.redis_client import RedisClient
+
+    setup_logging()
+    redis_client = RedisClient("redis://fakeredis")
+    redis_client.redis = fakeredis.aioredis.FakeRedis()
+    mcp = create_server(redis_client)
+
+    servers = [
+        uvicorn.Server(uvicorn.Config(mcp.http_app(transport="sse"), host="127.0.0.1", port=args.port,
+                                      log_level="warning")),
+        uvicorn.Server(uvicorn.Config(stub_backend_app(args.backend_items), host="127.0.0.1",
+                                      port=args.backend_port, log_level="warning")),
+    ]
+    await asyncio.gather(*(server.serve() for server in servers))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="generate load and report results")
+    run.add_argument("--url", help="SSE URL of a running MCP server (default: start one with stubs)")
+    run.add_argument("--sessions", type=int, default=20, help="concurrent MCP sessions")
+    run.add_argument("--duration", type=float, default=20, help="seconds of load after ramp-up")
+    run.add_argument("--ramp-up", type=float, default=2, help="seconds over which sessions are opened")
+    run.add_argument("--mix", default=DEFAULT_MIX, help="tool=weight pairs, comma-separated")
+    run.add_argument("--call-timeout", type=float, default=30, help="per-call timeout in seconds")
+    run.add_argument("--startup-timeout", type=float, default=30, help="seconds to wait for the server")
+    run.add_argument("--output", default="benchmarks/results/loadgen.json", help="result JSON path")
+    run.add_argument("--compare", help="baseline result JSON to compare against")
+
+    serve_parser = commands.add_parser("serve", help="run the MCP server with stubbed Redis and backend")
+    for command in (run, serve_parser):
+        command.add_argument("--port", type=int, default=18001, help="MCP server port")
+        command.add_argument("--backend-port", type=int, default=18000, help="stub backend port")
+        command.add_argument("--backend-items", type=int, default=20, help="rows returned by the stub backend")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == "serve":
+        asyncio.run(serve(args))
+        return
+
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(message)s")
+    config = {k: v for k, v in vars(args).items() if k not in ("output", "compare", "command")}
+    results = asyncio.run(run_load(args))
+    document = write_results(args.output, "loadgen", config, results)
+
+    print(json.dumps(results, indent=2))
+    print(f"Results written to {args.output}")
+    if args.compare:
+        print(f"\nCompared with {args.compare}:")
+        for line in compare_results(document, args.compare):
+            print(f"  {line}")
+
+
+if __name__ == "__main__":
+    main()
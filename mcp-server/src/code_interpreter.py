@@ -0,0 +1,393 @@
+"""Local execution backend and state cache for the code interpreter tools.
+
+With ``CODE_INTERPRETER_BACKEND=local`` notebooks run on this host instead of
+the remote uni-interpreter service. ``KernelPool`` keeps
+``CODE_INTERPRETER_POOL_SIZE`` pre-warmed Python worker processes
+(``kernel_worker.py``), so a submission skips interpreter startup and the
+``CODE_INTERPRETER_PRELOAD`` imports. Each worker runs in its own process
+group with an address-space limit of ``CODE_INTERPRETER_MEMORY_MB``.
+
+A submission is published as ``create_python_notebook`` (status ``pending``)
+and followed by ``update_state`` messages as it moves to ``running`` and then
+``completed`` or ``error``; the backend writes each one to
+``code_interpreter_states`` and emits ``code_interpreter_state_updated``.
+
+Resource bounds:
+
+- ``CODE_INTERPRETER_POOL_SIZE`` executions run at once; further ones wait.
+- ``CODE_INTERPRETER_TIMEOUT_SECONDS`` per execution, after which the worker
+  is killed and replaced.
+- Workers are replaced after ``CODE_INTERPRETER_MAX_TASKS_PER_WORKER``
+  executions, so state leaked through imported modules does not pile up.
+- ``CODE_INTERPRETER_MAX_OUTPUT`` characters each of stdout, stderr, the
+  value and the traceback are kept.
+- ``CODE_INTERPRETER_MAX_ARTIFACT_BYTES`` of encoded rich outputs (images,
+  HTML) are kept per execution.
+
+The final ``update_state`` carries the full text result together with
+``artifacts`` (the result, stdout, stderr and rich outputs), which the backend
+stores apart from the state row and serves under
+``/api/code-interpreter/states/{id}/artifacts``.
+
+Like the terminal tools, this confines resources, not what code can do; it is
+not a sandbox.
+
+``NotebookStateCache`` sits in front of state lookups (the remote
+interpreter, or the backend for local runs). Lookups of the same state while
+one is in flight share that request, results are reused for
+``CODE_INTERPRETER_STATE_CACHE_TTL_SECONDS``, and states that have finished
+are kept until evicted and never fetched again.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import signal
+import sys
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from .metrics import (
+    CODE_INTERPRETER_EXECUTIONS,
+    CODE_INTERPRETER_SECONDS,
+    CODE_INTERPRETER_STATE_LOOKUPS,
+    CODE_INTERPRETER_WORKERS_STARTED,
+)
+from .redis_client import RedisClient
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "code_interpreter:actions"
+
+CODE_INTERPRETER_POOL_SIZE = int(os.getenv("CODE_INTERPRETER_POOL_SIZE", "2"))
+CODE_INTERPRETER_TIMEOUT_SECONDS = float(os.getenv("CODE_INTERPRETER_TIMEOUT_SECONDS", "60"))
+CODE_INTERPRETER_MEMORY_MB = int(os.getenv("CODE_INTERPRETER_MEMORY_MB", "1024"))
+CODE_INTERPRETER_MAX_TASKS_PER_WORKER = int(os.getenv("CODE_INTERPRETER_MAX_TASKS_PER_WORKER", "50"))
+CODE_INTERPRETER_MAX_OUTPUT = int(os.getenv("CODE_INTERPRETER_MAX_OUTPUT", "65536"))
+CODE_INTERPRETER_MAX_ARTIFACT_BYTES = int(os.getenv("CODE_INTERPRETER_MAX_ARTIFACT_BYTES", "2097152"))
+CODE_INTERPRETER_PRELOAD = os.getenv("CODE_INTERPRETER_PRELOAD", "")
+CODE_INTERPRETER_WORKDIR = os.getenv("CODE_INTERPRETER_WORKDIR", "/tmp/mcp-code-interpreter")
+CODE_INTERPRETER_STATE_CACHE_TTL_SECONDS = float(os.getenv("CODE_INTERPRETER_STATE_CACHE_TTL_SECONDS", "2"))
+CODE_INTERPRETER_STATE_CACHE_SIZE = int(os.getenv("CODE_INTERPRETER_STATE_CACHE_SIZE", "1024"))
+STARTUP_TIMEOUT_SECONDS = 30.0
+MAX_TRACKED_STATES = 256
+TERMINAL_STATUSES = ("completed", "complete", "success", "succeeded", "done", "finished",
+                     "error", "failed", "failure", "cancelled", "canceled")
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "kernel_worker.py")
+
+
+def code_interpreter_message(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Wrap ``payload`` in the code interpreter component message envelope."""
+    return {
+        "id": str(uuid.uuid4()),
+        "type": "code_interpreter_action",
+        "timestamp": int(time.time() * 1000),
+        "source": "mcp",
+        "target": "code_interpreter_component",
+        "component": "code_interpreter",
+        "payload": payload,
+    }
+
+
+def format_result(reply: Dict[str, Any]) -> str:
+    """Text for ``code_interpreter_states.result``: output, then the value or the traceback."""
+    parts = [reply.get("stdout") or "", reply.get("stderr") or ""]
+    if reply.get("value") is not None:
+        parts.append(f"Out: {reply['value']}\n")
+    if reply.get("error"):
+        parts.append(reply["error"])
+    return "".join(part if not part or part.endswith("\n") else part + "\n" for part in parts)
+
+
+def result_artifacts(result: str, reply: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Artifacts stored for a finished run: the full result, its streams and rich outputs."""
+    text = "text/plain; charset=utf-8"
+    artifacts = [{"name": "result", "mime_type": text, "data": result, "encoding": "utf-8"}]
+    for name in ("stdout", "stderr"):
+        if reply.get(name):
+            artifacts.append({"name": name, "mime_type": text, "data": reply[name], "encoding": "utf-8"})
+    return artifacts + list(reply.get("outputs") or [])
+
+
+def is_finished(state: Any) -> bool:
+    """Whether a state document (remote or backend) describes a run that has ended."""
+    if not isinstance(state, dict):
+        return False
+    return str(state.get("status") or state.get("state") or "").lower() in TERMINAL_STATUSES
+
+
+class NotebookStateCache:
+    """Short-TTL, single-flight cache of notebook states keyed by state id."""
+
+    def __init__(self, ttl: float = CODE_INTERPRETER_STATE_CACHE_TTL_SECONDS,
+                 max_entries: int = CODE_INTERPRETER_STATE_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # state id -> (expiry on the monotonic clock, or None once finished; state)
+        self.entries: "OrderedDict[str, Tuple[Optional[float], Any]]" = OrderedDict()
+        self.inflight: Dict[str, asyncio.Task] = {}
+
+    async def get(self, state_id: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Cached state for ``state_id``, or the result of ``fetch()``, shared with concurrent callers."""
+        entry = self.entries.get(state_id)
+        if entry is not None and (entry[0] is None or entry[0] > time.monotonic()):
+            self.entries.move_to_end(state_id)
+            CODE_INTERPRETER_STATE_LOOKUPS.inc(result="finished" if entry[0] is None else "hit")
+            return entry[1]
+
+        task = self.inflight.get(state_id)
+        if task is None:
+            CODE_INTERPRETER_STATE_LOOKUPS.inc(result="miss")
+            task = self.inflight[state_id] = asyncio.create_task(self._load(state_id, fetch))
+            task.add_done_callback(lambda done: self._finish(state_id, done))
+        else:
+            CODE_INTERPRETER_STATE_LOOKUPS.inc(result="coalesced")
+        # A caller that gives up must not cancel the request the others are waiting on.
+        return await asyncio.shield(task)
+
+    async def _load(self, state_id: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        state = await fetch()
+        expires = None if is_finished(state) else time.monotonic() + self.ttl
+        self.entries[state_id] = (expires, state)
+        self.entries.move_to_end(state_id)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return state
+
+    def _finish(self, state_id: str, task: asyncio.Task):
+        if self.inflight.get(state_id) is task:
+            del self.inflight[state_id]
+        if not task.cancelled():
+            # Mark a failure as retrieved even if every caller has gone away.
+            task.exception()
+
+
+class KernelWorker:
+    """One pre-warmed Python worker process."""
+
+    def __init__(self, workdir: str, memory_mb: int, max_output: int, preload: str,
+                 max_artifact_bytes: int = CODE_INTERPRETER_MAX_ARTIFACT_BYTES):
+        self.workdir = workdir
+        self.memory_mb = memory_mb
+        self.max_output = max_output
+        self.max_artifact_bytes = max_artifact_bytes
+        self.preload = preload
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.executions = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    async def start(self):
+        self.process = await asyncio.create_subprocess_exec(
+            sys.executable, "-u", WORKER_SCRIPT,
+            "--memory-mb", str(self.memory_mb),
+            "--max-output", str(self.max_output),
+            "--max-artifact-bytes", str(self.max_artifact_bytes),
+            "--preload", self.preload,
+            cwd=self.workdir,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            start_new_session=True,
+            # A reply holds up to four clipped fields and the outputs, JSON-escaped.
+            limit=(self.max_output * 4 + self.max_artifact_bytes) * 6 + 65536,
+        )
+        CODE_INTERPRETER_WORKERS_STARTED.inc()
+        try:
+            line = await asyncio.wait_for(self.process.stdout.readline(), STARTUP_TIMEOUT_SECONDS)
+            if not line or not json.loads(line).get("ready"):
+                raise RuntimeError("kernel worker exited during startup")
+        except BaseException:
+            await self.close()
+            raise
+        logger.debug("Started kernel worker (pid %d)", self.process.pid)
+
+    async def execute(self, code: str, timeout: float) -> Dict[str, Any]:
+        """Run ``code``; raises ``asyncio.TimeoutError`` or ``RuntimeError`` if the worker is lost."""
+        self.executions += 1
+        self.process.stdin.write((json.dumps({"code": code}) + "\n").encode())
+        await self.process.stdin.drain()
+        line = await asyncio.wait_for(self.process.stdout.readline(), timeout)
+        if not line:
+            returncode = await self.process.wait()
+            if returncode == -signal.SIGKILL or returncode == -signal.SIGSEGV:
+                raise RuntimeError(f"Kernel worker died (signal {-returncode}), possibly out of memory")
+            raise RuntimeError(f"Kernel worker exited with code {returncode}")
+        return json.loads(line)
+
+    async def close(self):
+        if self.alive:
+            try:
+                os.killpg(self.process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            await self.process.wait()
+
+
+class KernelPool:
+    """Pre-warmed workers; at most ``size`` executions at once."""
+
+    def __init__(self, size: int = CODE_INTERPRETER_POOL_SIZE, workdir: str = CODE_INTERPRETER_WORKDIR,
+                 memory_mb: int = CODE_INTERPRETER_MEMORY_MB, max_output: int = CODE_INTERPRETER_MAX_OUTPUT,
+                 max_tasks: int = CODE_INTERPRETER_MAX_TASKS_PER_WORKER, preload: str = CODE_INTERPRETER_PRELOAD,
+                 max_artifact_bytes: int = CODE_INTERPRETER_MAX_ARTIFACT_BYTES):
+        self.size = size
+        self.workdir = workdir
+        self.memory_mb = memory_mb
+        self.max_output = max_output
+        self.max_artifact_bytes = max_artifact_bytes
+        self.max_tasks = max_tasks
+        self.preload = preload
+        self.idle: Deque[KernelWorker] = deque()
+        self._slots = asyncio.Semaphore(size)
+        self._warming: set = set()
+        self._started = False
+
+    def start(self):
+        """Warm up ``size`` workers in the background. Idempotent."""
+        if self._started:
+            return
+        self._started = True
+        os.makedirs(self.workdir, exist_ok=True)
+        for _ in range(self.size):
+            self._warm()
+
+    def _warm(self):
+        task = asyncio.create_task(self._add_idle())
+        self._warming.add(task)
+        task.add_done_callback(self._warming.discard)
+
+    async def _add_idle(self):
+        worker = self._new_worker()
+        try:
+            await worker.start()
+        except Exception as e:
+            logger.error("Error starting kernel worker: %s", e)
+            return
+        await self._put_idle(worker)
+
+    def _new_worker(self) -> KernelWorker:
+        return KernelWorker(self.workdir, self.memory_mb, self.max_output, self.preload, self.max_artifact_bytes)
+
+    async def _put_idle(self, worker: KernelWorker):
+        # An execution that found no idle worker started its own, so the
+        # warm-up can overshoot; keep no more than ``size``.
+        if len(self.idle) >= self.size:
+            await worker.close()
+        else:
+            self.idle.append(worker)
+
+    async def execute(self, code: str, timeout: float = CODE_INTERPRETER_TIMEOUT_SECONDS) -> Dict[str, Any]:
+        """Run ``code`` on a warm worker (or a fresh one if none is idle) and return its reply."""
+        self.start()
+        async with self._slots:
+            worker = None
+            while self.idle and worker is None:
+                candidate = self.idle.popleft()
+                if candidate.alive:
+                    worker = candidate
+            if worker is None:
+                worker = self._new_worker()
+                await worker.start()
+
+            try:
+                reply = await worker.execute(code, timeout)
+            except asyncio.TimeoutError:
+                await self._replace(worker)
+                return {"status": "error", "error": f"Execution timed out after {timeout:g}s"}
+            except RuntimeError as e:
+                await self._replace(worker)
+                return {"status": "error", "error": str(e)}
+            except BaseException:
+                await self._replace(worker)
+                raise
+
+            if worker.executions >= self.max_tasks:
+                await self._replace(worker)
+            else:
+                await self._put_idle(worker)
+            return reply
+
+    async def _replace(self, worker: KernelWorker):
+        await worker.close()
+        self._warm()
+
+    async def close(self):
+        for task in list(self._warming):
+            task.cancel()
+        while self.idle:
+            await self.idle.popleft().close()
+        self._started = False
+
+
+class LocalCodeInterpreter:
+    """Runs notebooks on a ``KernelPool`` and publishes their progress."""
+
+    def __init__(self, redis_client: RedisClient, pool: Optional[KernelPool] = None):
+        self.redis_client = redis_client
+        self.pool = pool or KernelPool()
+        self.states: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._tasks: set = set()
+
+    def submit(self, state_id: str, code: str) -> asyncio.Task:
+        """Start executing ``code`` as ``state_id``; the task resolves to the final state."""
+        self._track(state_id, {"status": "pending", "result": None})
+        task = asyncio.create_task(self._run(state_id, code))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def get_state(self, state_id: str) -> Optional[Dict[str, Any]]:
+        """Latest known state of a notebook run by this process."""
+        state = self.states.get(state_id)
+        return dict(state, state_id=state_id) if state else None
+
+    def _track(self, state_id: str, state: Dict[str, Any]):
+        self.states[state_id] = state
+        self.states.move_to_end(state_id)
+        while len(self.states) > MAX_TRACKED_STATES:
+            self.states.popitem(last=False)
+
+    async def _run(self, state_id: str, code: str) -> Dict[str, Any]:
+        await self._update(state_id, {"status": "running", "result": None})
+        start = time.perf_counter()
+        try:
+            reply = await self.pool.execute(code)
+        except Exception as e:
+            logger.exception("Error executing notebook %s: %s", state_id, e)
+            reply = {"status": "error", "error": str(e)}
+        duration = time.perf_counter() - start
+        CODE_INTERPRETER_SECONDS.observe(duration)
+        CODE_INTERPRETER_EXECUTIONS.inc(status=reply["status"])
+
+        result = format_result(reply)
+        state = {
+            "status": reply["status"],
+            "result": result,
+            "stdout": reply.get("stdout") or "",
+            "stderr": reply.get("stderr") or "",
+            "value": reply.get("value"),
+            "error": reply.get("error"),
+            "outputs": [{"name": o["name"], "mime_type": o["mime_type"]} for o in reply.get("outputs") or []],
+            "duration_ms": int(duration * 1000),
+        }
+        await self._update(state_id, state, result_artifacts(result, reply))
+        return dict(state, state_id=state_id)
+
+    async def _update(self, state_id: str, state: Dict[str, Any], artifacts: Optional[List[Dict[str, Any]]] = None):
+        self._track(state_id, state)
+        data = {"state_id": state_id, "status": state["status"], "result": state["result"]}
+        if artifacts is not None:
+            data["artifacts"] = artifacts
+        try:
+            await self.redis_client.publish_message(CHANNEL, code_interpreter_message({
+                "action": "update_state",
+                "data": data,
+            }))
+        except Exception as e:
+            logger.error("Error publishing code interpreter state: %s", e)
@@ -0,0 +1,149 @@
+"""Python execution worker for the local code interpreter backend.
+
+Started as a script by ``code_interpreter.KernelPool``, never imported. The
+worker imports the preload modules once, reports ``{"ready": true}`` and then
+serves requests: one JSON object per line on stdin (``{"code": "..."}``), one
+JSON reply per line on stdout.
+
+The protocol runs over private copies of the original stdin/stdout, so code
+that reads stdin sees EOF and code that writes to file descriptor 1 (e.g.
+through ``os.system``) lands on stderr instead of corrupting replies.
+
+Each request runs in a fresh namespace. As in a notebook cell, a trailing
+expression is evaluated and its ``repr`` returned as ``value``. Rich
+representations of that value (``_repr_png_``, ``_repr_svg_``,
+``_repr_html_``) and any open matplotlib figures are returned as ``outputs``,
+up to ``--max-artifact-bytes`` of encoded data per request.
+"""
+
+import argparse
+import ast
+import base64
+import contextlib
+import importlib
+import io
+import json
+import os
+import resource
+import sys
+import traceback
+
+FILENAME = "<notebook>"
+
+
+def limit_memory(megabytes: int):
+    if megabytes > 0:
+        limit = megabytes * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def clip(text: str, limit: int) -> str:
+    if len(text) <= limit:
+        return text
+    return text[:limit] + f"\n... [{len(text) - limit} characters truncated]"
+
+
+def rich_outputs(result, max_bytes: int) -> list:
+    """Encoded rich outputs of ``result`` and of open matplotlib figures, within ``max_bytes``."""
+    candidates = []
+    for method, mime_type, name in (("_repr_png_", "image/png", "value.png"),
+                                    ("_repr_svg_", "image/svg+xml", "value.svg"),
+                                    ("_repr_html_", "text/html; charset=utf-8", "value.html")):
+        render = getattr(result, method, None) if result is not None else None
+        if callable(render):
+            candidates.append((name, mime_type, render))
+    pyplot = sys.modules.get("matplotlib.pyplot")
+    if pyplot is not None:
+        for number in pyplot.get_fignums():
+            def render(figure=pyplot.figure(number)):
+                buffer = io.BytesIO()
+                figure.savefig(buffer, format="png", bbox_inches="tight")
+                return buffer.getvalue()
+            candidates.append((f"figure-{number}.png", "image/png", render))
+
+    outputs, remaining = [], max_bytes
+    for name, mime_type, render in candidates:
+        try:
+            data = render()
+        except Exception as e:
+            print(f"kernel worker: cannot render {name}: {e}", file=sys.stderr)
+            continue
+        if data is None:
+            continue
+        if isinstance(data, bytes):
+            output = {"name": name, "mime_type": mime_type, "data": base64.b64encode(data).decode(), "encoding": "base64"}
+        else:
+            output = {"name": name, "mime_type": mime_type, "data": str(data), "encoding": "utf-8"}
+        if len(output["data"]) > remaining:
+            print(f"kernel worker: {name} dropped, over {max_bytes} bytes of outputs", file=sys.stderr)
+            continue
+        remaining -= len(output["data"])
+        outputs.append(output)
+    if pyplot is not None:
+        pyplot.close("all")
+    return outputs
+
+
+def execute(code: str, max_output: int, max_artifact_bytes: int) -> dict:
+    namespace = {"__name__": "__main__", "__builtins__": __builtins__}
+    stdout, stderr = io.StringIO(), io.StringIO()
+    value = None
+    error = None
+    outputs = []
+    try:
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            tree = ast.parse(code, FILENAME, "exec")
+            last = tree.body.pop() if tree.body and isinstance(tree.body[-1], ast.Expr) else None
+            exec(compile(tree, FILENAME, "exec"), namespace)
+            if last is not None:
+                result = eval(compile(ast.Expression(last.value), FILENAME, "eval"), namespace)
+                if result is not None:
+                    value = repr(result)
+            else:
+                result = None
+            outputs = rich_outputs(result, max_artifact_bytes)
+    except BaseException as e:
+        # Drop this function's frame so the traceback starts in the user's code.
+        error = "".join(traceback.format_exception(type(e), e, e.__traceback__.tb_next))
+    return {
+        "status": "error" if error else "completed",
+        "stdout": clip(stdout.getvalue(), max_output),
+        "stderr": clip(stderr.getvalue(), max_output),
+        "value": clip(value, max_output) if value is not None else None,
+        "error": clip(error, max_output) if error else None,
+        "outputs": outputs,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--memory-mb", type=int, default=0)
+    parser.add_argument("--max-output", type=int, default=65536)
+    parser.add_argument("--max-artifact-bytes", type=int, default=2097152)
+    parser.add_argument("--preload", default="")
+    args = parser.parse_args()
+
+    requests = os.fdopen(os.dup(0), "r", encoding="utf-8")
+    replies = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull, 0)
+    os.dup2(2, 1)
+
+    for name in filter(None, (module.strip() for module in args.preload.split(","))):
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            print(f"kernel worker: cannot preload {name}: {e}", file=sys.stderr)
+    limit_memory(args.memory_mb)
+
+    replies.write(json.dumps({"ready": True}) + "\n")
+    replies.flush()
+    for line in requests:
+        request = json.loads(line)
+        reply = execute(request.get("code", ""), args.max_output, args.max_artifact_bytes)
+        replies.write(json.dumps(reply) + "\n")
+        replies.flush()
+
+
+if __name__ == "__main__":
+    main()
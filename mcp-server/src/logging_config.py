@@ -0,0 +1,82 @@
+"""Logging configuration.
+
+Records are handed to a background thread through a ``QueueHandler`` so the
+event loop never blocks on stdout. Level comes from ``LOG_LEVEL``; per-message
+logs can be sampled and large payloads truncated.
+"""
+
+import atexit
+import itertools
+import logging
+import logging.handlers
+import os
+import queue
+from typing import Any, Optional
+
+LOG_FORMAT = "%(asctime)s %(levelname)s [%(name)s] %(message)s"
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class SamplingFilter(logging.Filter):
+    """Keep one in ``rate`` records logged with ``extra={"sampled": True}``."""
+
+    def __init__(self, rate: int):
+        super().__init__()
+        self.rate = max(rate, 1)
+        self._counter = itertools.count()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "sampled", False) or self.rate == 1:
+            return True
+        return next(self._counter) % self.rate == 0
+
+
+class Truncated:
+    """Lazily render ``value`` cut to ``limit`` characters.
+
+    Rendering only happens if the record is actually emitted, so wrapping a
+    large payload costs nothing when its log level is disabled.
+    """
+
+    __slots__ = ("value", "limit")
+
+    def __init__(self, value: Any, limit: Optional[int] = None):
+        self.value = value
+        self.limit = limit if limit is not None else int(os.getenv("LOG_MAX_PAYLOAD", "512"))
+
+    def __str__(self) -> str:
+        text = self.value if isinstance(self.value, str) else repr(self.value)
+        if len(text) <= self.limit:
+            return text
+        return f"{text[:self.limit]}...(+{len(text) - self.limit} chars)"
+
+
+def truncate(value: Any, limit: Optional[int] = None) -> Truncated:
+    """Wrap a payload for logging with a bounded length."""
+    return Truncated(value, limit)
+
+
+def setup_logging():
+    """Configure root logging from the environment. Safe to call more than once."""
+    global _listener
+    if _listener is not None:
+        return
+
+    level = os.getenv("LOG_LEVEL", "INFO").upper()
+    sample_rate = int(os.getenv("LOG_SAMPLE_RATE", "100"))
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue: queue.Queue = queue.Queue(-1)
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(sample_rate))
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
@@ -4,10 +4,18 @@ MCP Server for UI Component Demo
 This server provides MCP tools for controlling UI components through Redis messaging.
 """
 
+import logging
 import os
+import time
 from fastmcp import FastMCP
 from mcp.server.session import ServerSession
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse
 
+from . import tracing
+from .logging_config import setup_logging
+from .loop_monitor import loop_monitor
+from .metrics import CONTENT_TYPE, MCP_TOOL_CALLS, MCP_TOOL_SECONDS, render
 from .redis_client import RedisClient
 from .tools.plan_tools import register_plan_tools
 from .tools.backlog_tools import register_backlog_tools
@@ -16,6 +24,8 @@ from .tools.approval_tools import register_approval_tools
 from .tools.code_interpreter_tools import register_code_interpreter_tools
 from .tools.file_tools import register_file_tools
 
+logger = logging.getLogger(__name__)
+
 old_received_request = ServerSession._received_request
 
 async def _received_request_wrapper(self, *args, **kwargs):
@@ -23,29 +33,74 @@ async def _received_request_wrapper(self, *args, **kwargs):
         return await old_received_request(self, *args, **kwargs)
     except RuntimeError as e:
         if "Received request before initialization was complete" in str(e):
-            print(f"WARNING: Ignoring initialization error: {e}")
+            logger.warning("Ignoring initialization error: %s", e)
             return
         raise
 
 ServerSession._received_request = _received_request_wrapper
 
 
-def main():
-    """Main entry point for the MCP server."""
-    redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
-    port = int(os.getenv("MCP_PORT", "8001"))
+class InstrumentedFastMCP(FastMCP):
+    """FastMCP server that records per-tool call counts and latency."""
+
+    async def run_async(self, *args, **kwargs):
+        loop_monitor.start()
+        try:
+            return await super().run_async(*args, **kwargs)
+        finally:
+            await loop_monitor.stop()
+
+    async def _call_tool(self, key, arguments):
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            with tracing.start_span(f"mcp.tool {key}", attributes={"mcp.tool": key}):
+                return await super()._call_tool(key, arguments)
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            MCP_TOOL_SECONDS.observe(time.perf_counter() - start, tool=key)
+            MCP_TOOL_CALLS.inc(tool=key, status=status)
+
+
+def create_server(redis_client: RedisClient) -> InstrumentedFastMCP:
+    """Build the MCP server with all component tools and the /metrics and /admin/loop routes."""
+    mcp = InstrumentedFastMCP("ui-component-demo")
+    
+    @mcp.custom_route("/metrics", methods=["GET"])
+    async def metrics(request: Request) -> PlainTextResponse:
+        return PlainTextResponse(render(), media_type=CONTENT_TYPE)
     
-    mcp = FastMCP("ui-component-demo")
+    @mcp.custom_route("/admin/loop", methods=["GET"])
+    async def loop_report(request: Request) -> JSONResponse:
+        return JSONResponse(loop_monitor.report())
+    
+    @mcp.custom_route("/admin/loop/reset", methods=["POST"])
+    async def reset_loop_report(request: Request) -> JSONResponse:
+        loop_monitor.reset()
+        return JSONResponse({"success": True})
     
-    redis_client = RedisClient(redis_url)
     register_plan_tools(mcp, redis_client)
     register_backlog_tools(mcp, redis_client)
     register_terminal_tools(mcp, redis_client)
     register_approval_tools(mcp, redis_client)
     register_code_interpreter_tools(mcp, redis_client)
     register_file_tools(mcp, redis_client)
+    return mcp
+
+
+def main():
+    """Main entry point for the MCP server."""
+    setup_logging()
+    tracing.setup_tracing("ui-component-mcp-server")
+    
+    redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
+    port = int(os.getenv("MCP_PORT", "8001"))
+    
+    mcp = create_server(RedisClient(redis_url))
     
-    print(f"Starting MCP server on port {port} with SSE transport")
+    logger.info("Starting MCP server on port %d with SSE transport", port)
     
     mcp.run(transport="sse", host="0.0.0.0", port=port)
 
@@ -1,10 +1,16 @@
 """Redis client for publishing messages."""
 
-import json
-from typing import Any, Dict, Optional
+import logging
+from typing import Any, Dict, Mapping, Optional
 
 from redis.asyncio import Redis
 
+from . import offload, tracing
+from .logging_config import truncate
+from .metrics import REDIS_MESSAGES_PUBLISHED
+
+logger = logging.getLogger(__name__)
+
 
 # TODO 放到 dp.agent.ui.mq.redis.producer
 class RedisClient:
@@ -29,6 +35,38 @@ class RedisClient:
         if not self.redis:
             await self.connect()
         
-        message_json = json.dumps(message)
-        await self.redis.publish(channel, message_json)
-        print(f"Published message to {channel}: {message_json}")
+        with tracing.start_span("redis.publish", attributes={"messaging.channel": channel}):
+            tracing.inject(message)
+            message_json = await offload.dumps(message, offload.estimate_size(message))
+            await self.redis.publish(channel, message_json)
+        REDIS_MESSAGES_PUBLISHED.inc(channel=channel)
+        logger.debug("Published message to %s: %s", channel, truncate(message_json), extra={"sampled": True})
+
+    async def set_hash(self, key: str, mapping: Mapping[str, Any], ttl: Optional[int] = None):
+        """Write fields to a Redis hash, optionally (re)setting its TTL in seconds."""
+        if not self.redis:
+            await self.connect()
+        
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping=mapping)
+            if ttl:
+                pipe.expire(key, ttl)
+            await pipe.execute()
+    
+    async def increment(self, key: str, amount: int = 1) -> int:
+        """Atomically add ``amount`` to an integer key and return the new value."""
+        if not self.redis:
+            await self.connect()
+        
+        return int(await self.redis.incrby(key, amount))
+    
+    async def get_hash(self, key: str) -> Dict[str, str]:
+        """Read a Redis hash as a str -> str dict (empty if the key does not exist)."""
+        if not self.redis:
+            await self.connect()
+        
+        raw = await self.redis.hgetall(key)
+        return {
+            (k.decode() if isinstance(k, bytes) else k): (v.decode() if isinstance(v, bytes) else v)
+            for k, v in raw.items()
+        }
@@ -0,0 +1,433 @@
+"""Local command execution for the terminal tools.
+
+Commands run in persistent per-session shells: each ``session_id`` owns one
+long-lived ``bash`` process, so repeated commands skip shell startup and keep
+their working directory, variables and functions. The shells live in
+``TERMINAL_WORKDIR`` with a scrubbed environment, each in its own process
+group so a timeout can kill everything a session started. The shells read
+commands from a pipe, so they exit on their own once this process goes away.
+
+A command is sent to its shell as ``eval <quoted command>`` followed by a
+per-command end marker on stdout (carrying the exit status) and on stderr.
+Output is read up to the markers and published to ``terminal:actions`` as it
+is produced, as ``output_chunk`` messages between a ``start`` and an ``exit``
+message, so the terminal component renders long-running commands live and no
+single message carries the whole output.
+
+Each session's output is one append-only character stream. Every chunk is
+given its position in that stream (``offset``) from a Redis counter,
+``terminal:output:<session_id>:length``, before it is published. This process
+is the only writer for a session, and the counter outlives restarts, so
+offsets never repeat. The backend stores chunks by offset, which makes the
+store idempotent across its workers and lets clients page through history.
+
+Resource bounds:
+
+- ``TERMINAL_MAX_CONCURRENCY`` commands run at once; further calls wait.
+  Commands in the same session run one after another.
+- ``TERMINAL_MAX_SESSIONS`` shells exist at once; the least recently used idle
+  session is closed to make room, and sessions idle for
+  ``TERMINAL_SESSION_IDLE_SECONDS`` are closed by a reaper.
+- ``TERMINAL_TIMEOUT_SECONDS`` per command, after which the session's process
+  group is killed and the session starts fresh on its next command.
+- ``TERMINAL_MAX_OUTPUT_BYTES`` are streamed per command. The rest is read
+  and discarded, so a noisy command neither blocks on a full pipe nor fills
+  memory.
+- ``TERMINAL_RESULT_BYTES`` of output are returned to the caller of the tool.
+
+The working directory confines where relative paths land; it is not a
+security boundary.
+"""
+
+import asyncio
+import codecs
+import logging
+import os
+import shlex
+import signal
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from .metrics import TERMINAL_SESSIONS, TERMINAL_SESSIONS_STARTED
+from .redis_client import RedisClient
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "terminal:actions"
+
+TERMINAL_WORKDIR = os.getenv("TERMINAL_WORKDIR", "/tmp/mcp-terminal")
+TERMINAL_MAX_CONCURRENCY = int(os.getenv("TERMINAL_MAX_CONCURRENCY", "4"))
+TERMINAL_TIMEOUT_SECONDS = float(os.getenv("TERMINAL_TIMEOUT_SECONDS", "30"))
+TERMINAL_MAX_OUTPUT_BYTES = int(os.getenv("TERMINAL_MAX_OUTPUT_BYTES", str(1024 * 1024)))
+TERMINAL_RESULT_BYTES = int(os.getenv("TERMINAL_RESULT_BYTES", "16384"))
+TERMINAL_MAX_SESSIONS = int(os.getenv("TERMINAL_MAX_SESSIONS", "8"))
+TERMINAL_SESSION_IDLE_SECONDS = float(os.getenv("TERMINAL_SESSION_IDLE_SECONDS", "600"))
+DEFAULT_SESSION_ID = os.getenv("SESSION_ID", "default_session")
+READ_SIZE = 4096
+
+
+def output_length_key(session_id: str) -> str:
+    return f"terminal:output:{session_id}:length"
+
+# Seeded into a fresh working directory so cat_run_sh / bash_run_sh have a
+# script to work with.
+DEFAULT_RUN_SH = """#!/bin/bash
+
+echo "Starting application..."
+echo "Current time: $(date)"
+echo "Running environment checks..."
+
+# Check if required services are running
+if pgrep -x "redis-server" > /dev/null; then
+    echo "✓ Redis is running"
+else
+    echo "✗ Redis is not running"
+fi
+
+echo "Application started successfully!"
+"""
+
+
+def terminal_message(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Wrap ``payload`` in the terminal component message envelope."""
+    return {
+        "id": str(uuid.uuid4()),
+        "type": "terminal_action",
+        "timestamp": int(time.time() * 1000),
+        "source": "mcp",
+        "target": "terminal_component",
+        "component": "terminal",
+        "payload": payload,
+    }
+
+
+class CommandResult:
+    """Outcome of one command, as returned to the tool caller."""
+
+    def __init__(self, command_id: str, command: str, session_id: str):
+        self.command_id = command_id
+        self.command = command
+        self.session_id = session_id
+        self.exit_code: Optional[int] = None
+        self.timed_out = False
+        self.truncated = False
+        self.output_bytes = 0
+        self.duration_ms = 0
+        self._head = bytearray()
+
+    def keep(self, data: bytes):
+        room = TERMINAL_RESULT_BYTES - len(self._head)
+        if room > 0:
+            self._head += data[:room]
+
+    @property
+    def output(self) -> str:
+        return self._head.decode("utf-8", errors="replace")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "success": self.exit_code == 0 and not self.timed_out,
+            "command_id": self.command_id,
+            "command": self.command,
+            "session_id": self.session_id,
+            "exit_code": self.exit_code,
+            "timed_out": self.timed_out,
+            "truncated": self.truncated or self.output_bytes > TERMINAL_RESULT_BYTES,
+            "output_bytes": self.output_bytes,
+            "duration_ms": self.duration_ms,
+            "output": self.output,
+        }
+
+
+async def _read_until(stream: asyncio.StreamReader, marker: bytes, name: str, chunks: asyncio.Queue) -> Optional[bytes]:
+    """Forward ``stream`` to ``chunks`` up to ``marker``; return what follows it, or None at EOF."""
+    buffer = b""
+    keep = len(marker) - 1
+    while True:
+        data = await stream.read(READ_SIZE)
+        if not data:
+            if buffer:
+                await chunks.put((name, buffer))
+            return None
+        buffer += data
+        index = buffer.find(marker)
+        if index >= 0:
+            if index:
+                await chunks.put((name, buffer[:index]))
+            return buffer[index + len(marker):]
+        # Hold back a possible partial marker until the next read.
+        if len(buffer) > keep:
+            await chunks.put((name, buffer[:-keep]))
+            buffer = buffer[-keep:]
+
+
+class TerminalSession:
+    """One persistent shell process."""
+
+    def __init__(self, session_id: str, workdir: str, env: Dict[str, str]):
+        self.session_id = session_id
+        self.workdir = workdir
+        self.env = env
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.lock = asyncio.Lock()
+        self.users = 0
+        self.last_used = time.monotonic()
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    async def start(self):
+        self.process = await asyncio.create_subprocess_exec(
+            "bash", "--noprofile", "--norc",
+            cwd=self.workdir,
+            env=self.env,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=True,
+        )
+        TERMINAL_SESSIONS_STARTED.inc()
+        logger.info("Started terminal session %s (pid %d)", self.session_id, self.process.pid)
+
+    async def execute(self, command: str, timeout: float, chunks: asyncio.Queue, result: CommandResult):
+        """Run ``command`` in this shell, forwarding output to ``chunks``; the caller holds ``lock``."""
+        if not self.alive:
+            await self.start()
+        marker = f"__mcp_end_{uuid.uuid4().hex}__"
+        script = (
+            f"eval {shlex.quote(command)} </dev/null; __mcp_status=$?; "
+            f"printf '%s:%d\\n' '{marker}' \"$__mcp_status\"; printf '%s' '{marker}' >&2\n"
+        )
+        self.process.stdin.write(script.encode())
+        await self.process.stdin.drain()
+
+        async def read_stdout() -> Optional[int]:
+            rest = await _read_until(self.process.stdout, marker.encode(), "stdout", chunks)
+            if rest is None:
+                return None
+            while b"\n" not in rest:
+                data = await self.process.stdout.read(READ_SIZE)
+                if not data:
+                    return None
+                rest += data
+            return int(rest[1:rest.index(b"\n")])
+
+        try:
+            status, _ = await asyncio.wait_for(asyncio.gather(
+                read_stdout(),
+                _read_until(self.process.stderr, marker.encode(), "stderr", chunks),
+            ), timeout)
+        except asyncio.TimeoutError:
+            result.timed_out = True
+            await self.close()
+            return
+        if status is None:
+            # The command ended the shell (e.g. ``exit 3``); report its status.
+            result.exit_code = await self.process.wait()
+            logger.info("Terminal session %s exited with %s", self.session_id, result.exit_code)
+        else:
+            result.exit_code = status
+
+    async def close(self):
+        if self.alive:
+            try:
+                os.killpg(self.process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            await self.process.wait()
+            logger.info("Closed terminal session %s", self.session_id)
+
+
+class TerminalSessionPool:
+    """Persistent sessions keyed by ``session_id``, with LRU and idle eviction."""
+
+    def __init__(self, workdir: str, env: Dict[str, str], max_sessions: int = TERMINAL_MAX_SESSIONS,
+                 idle_seconds: float = TERMINAL_SESSION_IDLE_SECONDS):
+        self.workdir = workdir
+        self.env = env
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self.sessions: Dict[str, TerminalSession] = {}
+        self._reaper: Optional[asyncio.Task] = None
+
+    async def acquire(self, session_id: str) -> TerminalSession:
+        """Session for ``session_id``, reserved until ``release``; created (and warmed up) if needed."""
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.create_task(self._reap_idle())
+
+        # The bookkeeping below must not yield, or two calls could create the
+        # same session; the evicted shell is closed afterwards.
+        session = self.sessions.get(session_id)
+        victim = None
+        if session is None:
+            if len(self.sessions) >= self.max_sessions:
+                idle = [s for s in self.sessions.values() if s.users == 0]
+                if not idle:
+                    raise RuntimeError(f"All {self.max_sessions} terminal sessions are busy")
+                victim = min(idle, key=lambda s: s.last_used)
+                self._remove(victim)
+            session = self.sessions[session_id] = TerminalSession(session_id, self.workdir, self.env)
+            TERMINAL_SESSIONS.set(len(self.sessions))
+        session.users += 1
+        if victim is not None:
+            await victim.close()
+        return session
+
+    def release(self, session: TerminalSession):
+        session.users -= 1
+        session.last_used = time.monotonic()
+
+    def _remove(self, session: TerminalSession):
+        if self.sessions.get(session.session_id) is session:
+            del self.sessions[session.session_id]
+        TERMINAL_SESSIONS.set(len(self.sessions))
+
+    async def _evict(self, session: TerminalSession):
+        self._remove(session)
+        await session.close()
+
+    async def _reap_idle(self):
+        while True:
+            await asyncio.sleep(max(self.idle_seconds / 4, 1.0))
+            now = time.monotonic()
+            for session in list(self.sessions.values()):
+                if session.users == 0 and now - session.last_used > self.idle_seconds:
+                    await self._evict(session)
+
+    async def close_all(self):
+        if self._reaper:
+            self._reaper.cancel()
+        for session in list(self.sessions.values()):
+            await self._evict(session)
+
+
+class TerminalRunner:
+    """Runs shell commands in pooled sessions and streams their output through Redis."""
+
+    def __init__(self, redis_client: RedisClient, workdir: str = TERMINAL_WORKDIR,
+                 max_concurrency: int = TERMINAL_MAX_CONCURRENCY):
+        self.redis_client = redis_client
+        self.workdir = workdir
+        self.pool = TerminalSessionPool(workdir, self._environment())
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._prepared = False
+
+    def _prepare_workdir(self):
+        if self._prepared:
+            return
+        os.makedirs(self.workdir, exist_ok=True)
+        run_sh = os.path.join(self.workdir, "run.sh")
+        if not os.path.exists(run_sh):
+            with open(run_sh, "w") as f:
+                f.write(DEFAULT_RUN_SH)
+        self._prepared = True
+
+    def _environment(self) -> Dict[str, str]:
+        return {
+            "PATH": os.getenv("PATH", "/usr/local/bin:/usr/bin:/bin"),
+            "HOME": self.workdir,
+            "LANG": os.getenv("LANG", "C.UTF-8"),
+            "TERM": "dumb",
+        }
+
+    async def run(self, command: str, action: str = "run", timeout: Optional[float] = None,
+                  file: Optional[str] = None, session_id: Optional[str] = None) -> CommandResult:
+        """Run ``command`` in ``session_id``'s shell and stream its output.
+
+        ``action`` labels the command for the UI (ls, cat, bash, run).
+        """
+        session_id = session_id or DEFAULT_SESSION_ID
+        result = CommandResult(str(uuid.uuid4()), command, session_id)
+        timeout = timeout or TERMINAL_TIMEOUT_SECONDS
+        async with self._semaphore:
+            self._prepare_workdir()
+            session = await self.pool.acquire(session_id)
+            try:
+                async with session.lock:
+                    await self.redis_client.publish_message(CHANNEL, terminal_message({
+                        "action": "start",
+                        "command_id": result.command_id,
+                        "session_id": session_id,
+                        "command": command,
+                        "tool": action,
+                        "file": file or "",
+                        "offset": await self._output_length(session_id),
+                    }))
+                    started = time.perf_counter()
+                    try:
+                        await self._execute(session, command, timeout, result)
+                    finally:
+                        result.duration_ms = int((time.perf_counter() - started) * 1000)
+                        await self.redis_client.publish_message(CHANNEL, terminal_message({
+                            "action": "exit",
+                            "command_id": result.command_id,
+                            "session_id": session_id,
+                            "exit_code": result.exit_code,
+                            "timed_out": result.timed_out,
+                            "truncated": result.truncated,
+                            "output_bytes": result.output_bytes,
+                            "duration_ms": result.duration_ms,
+                            "end_offset": await self._output_length(session_id),
+                        }))
+            finally:
+                self.pool.release(session)
+        return result
+
+    async def _output_length(self, session_id: str, grow: int = 0) -> Optional[int]:
+        """Length of the session's output stream after adding ``grow`` characters."""
+        try:
+            return await self.redis_client.increment(output_length_key(session_id), grow)
+        except Exception as e:
+            logger.error("Error updating terminal output length: %s", e)
+            return None
+
+    async def _execute(self, session: TerminalSession, command: str, timeout: float, result: CommandResult):
+        chunks: asyncio.Queue = asyncio.Queue(maxsize=64)
+        publisher = asyncio.create_task(self._publish(chunks, result))
+        try:
+            await session.execute(command, timeout, chunks, result)
+        except BaseException:
+            # A half-finished command leaves the shell in an unknown state.
+            await session.close()
+            raise
+        finally:
+            await chunks.put(None)
+            await publisher
+
+    async def _publish(self, chunks: asyncio.Queue, result: CommandResult):
+        """Publish chunks in order from a single task, up to the output cap."""
+        decoders = {name: codecs.getincrementaldecoder("utf-8")(errors="replace") for name in ("stdout", "stderr")}
+        seq = 0
+        while True:
+            item = await chunks.get()
+            if item is None:
+                return
+            name, data = item
+            room = TERMINAL_MAX_OUTPUT_BYTES - result.output_bytes
+            if room <= 0:
+                result.truncated = True
+                continue
+            if len(data) > room:
+                data = data[:room]
+                result.truncated = True
+            result.output_bytes += len(data)
+            result.keep(data)
+            text = decoders[name].decode(data)
+            if not text:
+                continue
+            end = await self._output_length(result.session_id, len(text))
+            try:
+                await self.redis_client.publish_message(CHANNEL, terminal_message({
+                    "action": "output_chunk",
+                    "command_id": result.command_id,
+                    "session_id": result.session_id,
+                    "stream": name,
+                    "seq": seq,
+                    "offset": None if end is None else end - len(text),
+                    "data": text,
+                }))
+            except Exception as e:
+                logger.error("Error publishing terminal output: %s", e)
+            seq += 1
@@ -1,38 +1,130 @@
 import asyncio
+import logging
 import os
 import json
+import time
 import uuid
-import redis.asyncio as redis
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Set
 from ..redis_client import RedisClient
 
-_pending_approvals: Dict[str, Dict[str, Any]] = {}
+logger = logging.getLogger(__name__)
 
-async def wait_for_approval(description: str, redis_client: RedisClient) -> Dict[str, Any]:
+APPROVAL_REQUESTS_CHANNEL = "approval:requests"
+APPROVAL_RESULTS_CHANNEL = "approval:results"
+APPROVAL_KEY_PREFIX = "approval:"
+APPROVAL_TTL_SECONDS = int(os.getenv("APPROVAL_TTL_SECONDS", "86400"))
+DEFAULT_WAIT_TIMEOUT = float(os.getenv("APPROVAL_WAIT_TIMEOUT", "300"))
+
+
+def approval_key(ticket_id: str) -> str:
+    """Redis hash key holding the state of an approval request."""
+    return f"{APPROVAL_KEY_PREFIX}{ticket_id}"
+
+
+class ApprovalResultListener:
+    """Shares one ``approval:results`` subscription between all waiting tool calls.
+
+    The backend publishes a message on that channel whenever an approval is
+    approved or rejected; pending ``wait`` calls for the ticket are resolved
+    immediately instead of polling the stored state.
+    """
+
+    def __init__(self, redis_client: RedisClient):
+        self.redis_client = redis_client
+        self._waiters: Dict[str, Set[asyncio.Future]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def start(self):
+        """Subscribe to the results channel if not already listening."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._task and not self._task.done():
+                return
+            await self.redis_client.connect()
+            pubsub = self.redis_client.redis.pubsub()
+            await pubsub.subscribe(APPROVAL_RESULTS_CHANNEL)
+            self._task = asyncio.create_task(self._listen(pubsub))
+            logger.info("Subscribed to %s channel", APPROVAL_RESULTS_CHANNEL)
+
+    async def _listen(self, pubsub):
+        try:
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                try:
+                    data = json.loads(message["data"])
+                    payload = data.get("payload", {})
+                    ticket_id = payload.get("ticket_id")
+                    if ticket_id and payload.get("status"):
+                        self._resolve(ticket_id, payload)
+                except Exception as e:
+                    logger.exception("Error processing approval result: %s", e)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Approval results listener stopped: %s", e)
+        finally:
+            await pubsub.close()
+
+    def _resolve(self, ticket_id: str, payload: Dict[str, Any]):
+        for future in self._waiters.pop(ticket_id, set()):
+            if not future.done():
+                future.set_result(payload)
+
+    async def wait(self, ticket_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """Wait for the decision on ``ticket_id``; returns None on timeout."""
+        await self.start()
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(ticket_id, set()).add(future)
+        try:
+            # Check the stored state only after subscribing, so a decision made
+            # in between cannot be missed.
+            stored = await self.redis_client.get_hash(approval_key(ticket_id))
+            if stored and stored.get("status") != "pending":
+                return stored
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            waiters = self._waiters.get(ticket_id)
+            if waiters is not None:
+                waiters.discard(future)
+                if not waiters:
+                    self._waiters.pop(ticket_id, None)
+
+
+async def request_approval(description: str, redis_client: RedisClient) -> Dict[str, Any]:
     """
     Request human approval for an action.
-    
+
     This tool follows the Google ADK LongRunningFunctionTool pattern:
     1. Returns immediately with status: "pending" and a ticketId
-    2. External process (approval service) updates the result
-    3. Agent can check status using the ticketId
-    
+    2. The backend records the human decision and publishes it to approval:results
+    3. Agent can check status or block on the decision using the ticketId
+
     Args:
         description: Description of the action requiring approval
-        
+
     Returns:
         Dict with status and ticketId for long-running job pattern
     """
     ticket_id = f"approval-{uuid.uuid4().hex[:8]}"
-    
-    _pending_approvals[ticket_id] = {
-        "status": "pending",
-        "description": description,
-        "result": None,
-        "ticket_id": ticket_id
-    }
-    
+
     try:
+        await redis_client.set_hash(
+            approval_key(ticket_id),
+            {
+                "ticket_id": ticket_id,
+                "description": description,
+                "status": "pending",
+                "result": "",
+                "created_at": int(time.time() * 1000)
+            },
+            ttl=APPROVAL_TTL_SECONDS
+        )
+
         approval_data = {
             "id": ticket_id,
             "session_id": "default_session",
@@ -40,7 +132,7 @@ async def wait_for_approval(description: str, redis_client: RedisClient) -> Dict
             "description": description,
             "status": "pending"
         }
-        
+
         # 使用 RedisClient 的 publish_message 方法发布消息
         # 格式化消息以符合后端期望的格式
         message = {
@@ -48,117 +140,99 @@ async def wait_for_approval(description: str, redis_client: RedisClient) -> Dict
             "component": "approval",
             "payload": approval_data
         }
-        
-        await redis_client.publish_message("approval:requests", message)
-        
-        print(f"Published approval request: {ticket_id}")
-        
+
+        await redis_client.publish_message(APPROVAL_REQUESTS_CHANNEL, message)
+
+        logger.info("Published approval request: %s", ticket_id)
+
     except Exception as e:
-        print(f"Failed to publish approval request: {str(e)}")
-    
+        logger.error("Failed to publish approval request: %s", e)
+
     return {
         "status": "pending",
         "ticketId": ticket_id,
         "message": f"Approval request submitted. Waiting for human decision on: {description}"
     }
 
-async def check_approval_status(ticket_id: str) -> Dict[str, Any]:
+async def check_approval_status(ticket_id: str, redis_client: RedisClient) -> Dict[str, Any]:
     """
     Check the status of a pending approval request.
-    
+
     Args:
-        ticket_id: The ticket ID returned by wait_for_approval
-        
+        ticket_id: The ticket ID returned by ask_for_approval
+
     Returns:
         Dict with current status and result if completed
     """
-    if ticket_id not in _pending_approvals:
+    approval = await redis_client.get_hash(approval_key(ticket_id))
+    if not approval:
         return {
             "status": "not_found",
             "message": f"Approval request {ticket_id} not found"
         }
-    
-    approval = _pending_approvals[ticket_id]
+
     return {
-        "status": approval["status"],
+        "status": approval.get("status", "pending"),
         "ticketId": ticket_id,
-        "result": approval.get("result"),
+        "result": approval.get("result") or None,
         "description": approval.get("description")
     }
 
-async def update_approval_result(ticket_id: str, status: str, result: str) -> bool:
+async def wait_for_approval(
+    ticket_id: str,
+    redis_client: RedisClient,
+    listener: ApprovalResultListener,
+    timeout: float = DEFAULT_WAIT_TIMEOUT
+) -> Dict[str, Any]:
     """
-    Update the result of a pending approval (called by approval service).
-    
+    Block until a human approves or rejects the request, or the timeout expires.
+
     Args:
-        ticket_id: The ticket ID of the approval request
-        status: New status ("approved" or "rejected")
-        result: Result message
-        
+        ticket_id: The ticket ID returned by ask_for_approval
+        timeout: Maximum number of seconds to wait
+
     Returns:
-        True if update was successful, False otherwise
+        Dict with the final status, or status "timeout" if still pending
     """
-    if ticket_id not in _pending_approvals:
-        print(f"Approval {ticket_id} not found in pending approvals")
-        return False
-    
-    _pending_approvals[ticket_id].update({
-        "status": status,
-        "result": result
-    })
-    
-    print(f"Updated approval {ticket_id}: {status} - {result}")
-    return True
-
-
-async def listen_for_approval_results(redis_client: RedisClient):
-    """Listen for approval results from the backend."""
-    try:
-        import asyncio
-        import json
-        
-        # Create a new Redis connection for subscribing
-        pubsub = redis_client.redis.pubsub()
-        await pubsub.subscribe("approval:results")
-        
-        print("Subscribed to approval:results channel")
-        
-        # Listen for messages in a background task
-        async def listener():
-            async for message in pubsub.listen():
-                if message["type"] == "message":
-                    try:
-                        data = json.loads(message["data"])
-                        payload = data.get("payload", {})
-                        
-                        ticket_id = payload.get("ticket_id")
-                        status = payload.get("status")
-                        result = payload.get("result")
-                        
-                        if ticket_id and status:
-                            await update_approval_result(ticket_id, status, result)
-                            print(f"Updated approval {ticket_id} from Redis: {status} - {result}")
-                    except Exception as e:
-                        print(f"Error processing approval result: {str(e)}")
-        
-        # Start the listener task
-        asyncio.create_task(listener())
-        
-    except Exception as e:
-        print(f"Error setting up approval results listener: {str(e)}")
+    stored = await redis_client.get_hash(approval_key(ticket_id))
+    if not stored:
+        return {
+            "status": "not_found",
+            "message": f"Approval request {ticket_id} not found"
+        }
+
+    decision = await listener.wait(ticket_id, timeout)
+    if decision is None:
+        return {
+            "status": "timeout",
+            "ticketId": ticket_id,
+            "message": f"No decision on {ticket_id} within {timeout} seconds"
+        }
+
+    return {
+        "status": decision.get("status"),
+        "ticketId": ticket_id,
+        "result": decision.get("result") or None,
+        "description": stored.get("description")
+    }
 
 def register_approval_tools(mcp, redis_client: RedisClient):
     """Register approval tools with the MCP server."""
-    
+    listener = ApprovalResultListener(redis_client)
+
     @mcp.tool()
     async def ask_for_approval(description: str) -> dict:
         """Request human approval before proceeding with an action"""
-        return await wait_for_approval(description, redis_client)
-    
-    print("Registered approval tools: ask_for_approval") 
-    # TODO wait
-    # Start listening for approval results
-    # asyncio.create_task(listen_for_approval_results(redis_client))
-   
-    print("Registered approval tools: ask_for_approval and started approval results listener")
+        return await request_approval(description, redis_client)
+
+    @mcp.tool()
+    async def get_approval_status(ticket_id: str) -> dict:
+        """Check the current status of an approval request without waiting"""
+        return await check_approval_status(ticket_id, redis_client)
+
+    @mcp.tool(name="wait_for_approval")
+    async def wait_for_approval_tool(ticket_id: str, timeout: float = DEFAULT_WAIT_TIMEOUT) -> dict:
+        """Wait until a human approves or rejects the request, returning as soon as they decide"""
+        return await wait_for_approval(ticket_id, redis_client, listener, timeout)
 
+    logger.info("Registered approval tools: ask_for_approval, get_approval_status, wait_for_approval")
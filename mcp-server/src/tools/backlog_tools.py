@@ -1,5 +1,6 @@
 """Backlog component MCP tools."""
 
+import os
 import time
 import uuid
 from typing import Optional
@@ -8,6 +9,8 @@ from fastmcp import FastMCP
 
 from ..redis_client import RedisClient
 
+BACKEND_URL = os.getenv("BACKEND_URL", "http://backend:8000")
+
 def register_backlog_tools(mcp: FastMCP, redis_client: RedisClient):
     """Register backlog-related MCP tools."""
     
@@ -157,7 +160,7 @@ def register_backlog_tools(mcp: FastMCP, redis_client: RedisClient):
         
         try:
             async with httpx.AsyncClient() as client:
-                response = await client.get("http://backend:8000/api/backlogs")
+                response = await client.get(f"{BACKEND_URL}/api/backlogs")
                 response.raise_for_status()
                 backlogs_data = response.json()
                 
@@ -1,5 +1,11 @@
-"""Code interpreter component MCP tools."""
+"""Code interpreter component MCP tools.
 
+``CODE_INTERPRETER_BACKEND`` selects where notebooks run: ``remote`` (the
+uni-interpreter service, default) or ``local`` (a pool of pre-warmed Python
+workers on this host, see ``code_interpreter``).
+"""
+
+import asyncio
 import os
 import time
 import uuid
@@ -9,14 +15,81 @@ import logging
 import httpx
 from fastmcp import FastMCP
 
+from ..code_interpreter import LocalCodeInterpreter, NotebookStateCache, code_interpreter_message
+from ..logging_config import truncate
 from ..redis_client import RedisClient
+
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-logger.addHandler(logging.StreamHandler())
+
+BACKEND_URL = os.getenv("BACKEND_URL", "http://backend:8000")
+CODE_INTERPRETER_BACKEND = os.getenv("CODE_INTERPRETER_BACKEND", "remote")
+CODE_INTERPRETER_WAIT_SECONDS = float(os.getenv("CODE_INTERPRETER_WAIT_SECONDS", "5"))
 
 
 def register_code_interpreter_tools(mcp: FastMCP, redis_client: RedisClient):
     """Register code interpreter-related MCP tools."""
+    local = LocalCodeInterpreter(redis_client) if CODE_INTERPRETER_BACKEND == "local" else None
+    state_cache = NotebookStateCache()
+    
+    async def create_local_notebook(state_id: str, ticket_id: str, code: str, description: str) -> dict:
+        await redis_client.publish_message("code_interpreter:actions", code_interpreter_message({
+            "action": "create_python_notebook",
+            "data": {
+                "state_id": state_id,
+                "ticket_id": ticket_id,
+                "status": "pending",
+                "code": code,
+                "description": description,
+                "widget_url": ""
+            }
+        }))
+        task = local.submit(state_id, code)
+        # Short runs are answered directly; longer ones are polled with get_notebook_state.
+        done, _ = await asyncio.wait({task}, timeout=CODE_INTERPRETER_WAIT_SECONDS)
+        if not done:
+            return {
+                "success": True,
+                "state_id": state_id,
+                "ticket_id": ticket_id,
+                "status": "running",
+                "message": "Code is running locally. Use get_notebook_state to check its result."
+            }
+        state = task.result()
+        return {
+            "success": True,
+            "ticket_id": ticket_id,
+            **state,
+            "message": f"Code executed locally with status {state['status']}."
+        }
+    
+    async def fetch_backend_state(state_id: str) -> dict:
+        async with httpx.AsyncClient() as client:
+            response = await client.get(f"{BACKEND_URL}/api/code-interpreter/states/{state_id}")
+            response.raise_for_status()
+            return response.json()
+    
+    async def fetch_remote_state(state_id: str) -> dict:
+        token = os.getenv("CODE_INTERPRETER_TOKEN", "1234")
+        async with httpx.AsyncClient() as client:
+            response = await client.get(
+                f"https://uni-interpreter.mlops.dp.tech/state/{state_id}",
+                headers={
+                    "Authorization": f"Bearer {token}"
+                }
+            )
+            response.raise_for_status()
+            return response.json()
+    
+    async def get_local_notebook_state(state_id: str) -> dict:
+        state = local.get_state(state_id)
+        if state is None:
+            # Run before a restart (or evicted from memory): read what the backend stored.
+            state = await state_cache.get(state_id, lambda: fetch_backend_state(state_id))
+        return {
+            "success": True,
+            "state_id": state_id,
+            "data": state
+        }
     
     @mcp.tool()
     async def create_python_notebook(code: str = "", description: str = "") -> dict:
@@ -35,6 +108,9 @@ def register_code_interpreter_tools(mcp: FastMCP, redis_client: RedisClient):
         ticket_id = f"code-interpreter-{uuid.uuid4().hex[:8]}"
         
         try:
+            if local:
+                return await create_local_notebook(state_id, ticket_id, code, description)
+            
             async with httpx.AsyncClient() as client:
                 response = await client.post(
                     f"https://uni-interpreter.mlops.dp.tech/state/{state_id}?token={token}",
@@ -47,7 +123,8 @@ def register_code_interpreter_tools(mcp: FastMCP, redis_client: RedisClient):
                 )
                 response.raise_for_status()
                 
-                logger.info(f"Created code interpreter state: {state_id}, code: {code}, response: {response.json()}")
+                logger.info("Created code interpreter state: %s", state_id)
+                logger.debug("Code interpreter state %s code: %s response: %s", state_id, truncate(code), truncate(response.text))
                 
                 message = {
                     "id": str(uuid.uuid4()),
@@ -100,27 +177,18 @@ def register_code_interpreter_tools(mcp: FastMCP, redis_client: RedisClient):
         Returns:
             当前状态信息
         """
-        token = os.getenv("CODE_INTERPRETER_TOKEN", "1234")
-        
         try:
-            url = f"https://uni-interpreter.mlops.dp.tech/state/{state_id}"
-                
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    url,
-                    headers={
-                        "Authorization": f"Bearer {token}"
-                    }
-                )
-                response.raise_for_status()
-                state_data = response.json()
-                
-                return {
-                    "success": True,
-                    "state_id": state_id,
-                    "data": state_data
-                }
-                
+            if local:
+                return await get_local_notebook_state(state_id)
+            
+            state_data = await state_cache.get(state_id, lambda: fetch_remote_state(state_id))
+            
+            return {
+                "success": True,
+                "state_id": state_id,
+                "data": state_data
+            }
+            
         except Exception as e:
             return {
                 "success": False,
@@ -1,12 +1,17 @@
+import logging
 import uuid
 import time
 import os
 from typing import Dict, Any
+from .. import offload
 from ..redis_client import RedisClient
 
+logger = logging.getLogger(__name__)
+
 async def create_file(name: str, path: str, content: str, redis_client: RedisClient) -> Dict[str, Any]:
     """Create a new file."""
     try:
+        size = await offload.utf8_size(content)
         file_data = {
             "id": str(uuid.uuid4()),
             "session_id": os.getenv("SESSION_ID", "default_session"),
@@ -14,7 +19,7 @@ async def create_file(name: str, path: str, content: str, redis_client: RedisCli
             "type": "file",
             "path": path,
             "content": content,
-            "size": len(content.encode('utf-8')),
+            "size": size,
             "created_at": int(time.time() * 1000),
             "updated_at": int(time.time() * 1000)
         }
@@ -80,4 +85,4 @@ def register_file_tools(mcp, redis_client: RedisClient):
         """List all files in the system"""
         return await list_files(redis_client)
     
-    print("Registered file tools: create_file_tool, list_files_tool")
+    logger.info("Registered file tools: create_file_tool, list_files_tool")
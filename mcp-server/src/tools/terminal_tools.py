@@ -1,86 +1,84 @@
 """Terminal component MCP tools."""
 
-import time
-import uuid
+import os
+import shlex
 from typing import Optional
 
 from fastmcp import FastMCP
 
 from ..redis_client import RedisClient
+from ..terminal import TerminalRunner
 
 def register_terminal_tools(mcp: FastMCP, redis_client: RedisClient):
     """Register terminal-related MCP tools."""
+    runner = TerminalRunner(redis_client)
+    # Sessions keep their working directory, so the fixed commands name the
+    # terminal workdir explicitly rather than depending on an earlier cd.
+    workdir = shlex.quote(runner.workdir)
+    run_sh = shlex.quote(os.path.join(runner.workdir, "run.sh"))
+    
+    async def execute(command: str, action: str, session_id: Optional[str] = None,
+                      timeout: Optional[float] = None, file: Optional[str] = None) -> dict:
+        try:
+            result = await runner.run(command, action=action, timeout=timeout, file=file, session_id=session_id)
+        except Exception as e:
+            return {"success": False, "message": f"Failed to run {command}: {str(e)}"}
+        
+        data = result.to_dict()
+        if result.timed_out:
+            data["message"] = f"{command} timed out"
+        else:
+            data["message"] = f"{command} exited with code {result.exit_code}"
+        return data
     
     @mcp.tool()
-    async def ls() -> dict:
-        """列出当前目录的文件和文件夹
+    async def run_command(command: str, session_id: Optional[str] = None, timeout: Optional[float] = None) -> dict:
+        """在终端会话中执行 shell 命令，输出会实时推送到终端组件
+        
+        同一 session_id 的命令在同一个常驻 shell 中执行，cd、环境变量等状态会保留。
+        
+        Args:
+            command: 要执行的 shell 命令
+            session_id: 终端会话 ID，默认使用服务端的 SESSION_ID
+            timeout: 超时时间（秒），默认使用服务端配置
         
         Returns:
-            操作结果和文件列表
+            退出码和命令输出（超过上限时截断）
         """
-        message = {
-            "id": str(uuid.uuid4()),
-            "type": "terminal_action",
-            "timestamp": int(time.time() * 1000),
-            "source": "mcp",
-            "target": "terminal_component",
-            "component": "terminal",
-            "payload": {
-                "action": "ls",
-                "command": "ls -la",
-                "output": "total 24\ndrwxr-xr-x  3 user user 4096 Jun 23 13:52 .\ndrwxr-xr-x  5 user user 4096 Jun 23 13:50 ..\n-rw-r--r--  1 user user  156 Jun 23 13:52 run.sh\n-rw-r--r--  1 user user  245 Jun 23 13:51 README.md\ndrwxr-xr-x  2 user user 4096 Jun 23 13:52 logs"
-            }
-        }
+        return await execute(command, "run", session_id, timeout)
+    
+    @mcp.tool()
+    async def ls(session_id: Optional[str] = None) -> dict:
+        """列出终端工作目录的文件和文件夹
+        
+        Args:
+            session_id: 终端会话 ID，默认使用服务端的 SESSION_ID
         
-        await redis_client.publish_message("terminal:actions", message)
-        return {"success": True, "message": "ls command executed successfully", "output": message["payload"]["output"]}
+        Returns:
+            操作结果和文件列表
+        """
+        return await execute(f"ls -la {workdir}", "ls", session_id)
     
     @mcp.tool()
-    async def cat_run_sh() -> dict:
+    async def cat_run_sh(session_id: Optional[str] = None) -> dict:
         """查看 run.sh 文件内容
         
+        Args:
+            session_id: 终端会话 ID，默认使用服务端的 SESSION_ID
+        
         Returns:
             操作结果和文件内容
         """
-        message = {
-            "id": str(uuid.uuid4()),
-            "type": "terminal_action",
-            "timestamp": int(time.time() * 1000),
-            "source": "mcp",
-            "target": "terminal_component",
-            "component": "terminal",
-            "payload": {
-                "action": "cat",
-                "command": "cat run.sh",
-                "file": "run.sh",
-                "output": "#!/bin/bash\n\necho \"Starting application...\"\necho \"Current time: $(date)\"\necho \"Running environment checks...\"\n\n# Check if required services are running\nif pgrep -x \"redis-server\" > /dev/null; then\n    echo \"✓ Redis is running\"\nelse\n    echo \"✗ Redis is not running\"\nfi\n\necho \"Application started successfully!\""
-            }
-        }
-        
-        await redis_client.publish_message("terminal:actions", message)
-        return {"success": True, "message": "cat run.sh executed successfully", "output": message["payload"]["output"]}
+        return await execute(f"cat {run_sh}", "cat", session_id, file="run.sh")
     
     @mcp.tool()
-    async def bash_run_sh() -> dict:
+    async def bash_run_sh(session_id: Optional[str] = None) -> dict:
         """执行 run.sh 脚本
         
+        Args:
+            session_id: 终端会话 ID，默认使用服务端的 SESSION_ID
+        
         Returns:
             操作结果和执行输出
         """
-        message = {
-            "id": str(uuid.uuid4()),
-            "type": "terminal_action",
-            "timestamp": int(time.time() * 1000),
-            "source": "mcp",
-            "target": "terminal_component",
-            "component": "terminal",
-            "payload": {
-                "action": "bash",
-                "command": "bash run.sh",
-                "file": "run.sh",
-                "output": "Starting application...\nCurrent time: Mon Jun 23 13:52:24 UTC 2025\nRunning environment checks...\n✓ Redis is running\nApplication started successfully!\n\nProcess completed with exit code 0"
-            }
-        }
-        
-        await redis_client.publish_message("terminal:actions", message)
-        return {"success": True, "message": "bash run.sh executed successfully", "output": message["payload"]["output"]}
+        return await execute(f"(cd {workdir} && bash run.sh)", "bash", session_id, file="run.sh")
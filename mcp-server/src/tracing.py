@@ -0,0 +1,180 @@
+"""Lightweight OpenTelemetry-compatible tracing.
+
+Trace context travels between services as a W3C ``traceparent`` string in the
+``trace`` field of each Redis message envelope. Finished spans are written as
+OTLP-style JSON lines to ``TRACE_EXPORT_PATH`` by a background thread, so they
+can be inspected offline or replayed into any OTLP collector. Tracing is off
+when ``TRACE_EXPORT_PATH`` is unset; spans are then never recorded.
+"""
+
+import atexit
+import json
+import os
+import queue
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+TRACE_FIELD = "trace"
+
+
+class SpanContext:
+    """Identifiers needed to parent a span, possibly from another process."""
+
+    __slots__ = ("trace_id", "span_id")
+
+    def __init__(self, trace_id: str, span_id: str):
+        self.trace_id = trace_id
+        self.span_id = span_id
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+
+class Span:
+    """A timed operation; ended spans are handed to the exporter."""
+
+    __slots__ = ("name", "context", "parent_id", "start_ns", "end_ns", "attributes")
+
+    def __init__(self, name: str, parent: Optional[SpanContext], attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.context = SpanContext(trace_id, secrets.token_hex(8))
+        self.parent_id = parent.span_id if parent else None
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def end(self, end_ns: Optional[int] = None):
+        self.end_ns = end_ns or time.time_ns()
+        if _exporter is not None:
+            _exporter.export(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "traceId": self.context.trace_id,
+            "spanId": self.context.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "attributes": self.attributes,
+        }
+
+
+class FileSpanExporter:
+    """Append finished spans as JSON lines from a background thread."""
+
+    def __init__(self, path: str, service_name: str):
+        self.path = path
+        self.resource = {"service.name": service_name}
+        self._queue: "queue.Queue[Optional[Span]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, span: Span):
+        self._queue.put(span)
+
+    def shutdown(self):
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+    def _run(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            while True:
+                span = self._queue.get()
+                if span is None:
+                    break
+                record = span.to_dict()
+                record["resource"] = self.resource
+                f.write(json.dumps(record, default=str) + "\n")
+                if self._queue.empty():
+                    f.flush()
+
+
+_exporter: Optional[FileSpanExporter] = None
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def setup_tracing(default_service_name: str):
+    """Start the file exporter if ``TRACE_EXPORT_PATH`` is set."""
+    global _exporter
+    path = os.getenv("TRACE_EXPORT_PATH")
+    if _exporter is not None or not path:
+        return
+    _exporter = FileSpanExporter(path, os.getenv("OTEL_SERVICE_NAME", default_service_name))
+    atexit.register(_exporter.shutdown)
+
+
+def is_enabled() -> bool:
+    return _exporter is not None
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+@contextmanager
+def start_span(
+    name: str,
+    parent: Optional[SpanContext] = None,
+    attributes: Optional[Dict[str, Any]] = None,
+) -> Iterator[Optional[Span]]:
+    """Run the block inside a new span, child of ``parent`` or of the current span.
+
+    Yields None when tracing is disabled.
+    """
+    if _exporter is None:
+        yield None
+        return
+    if parent is None:
+        active = _current_span.get()
+        parent = active.context if active else None
+    span = Span(name, parent, attributes)
+    token = _current_span.set(span)
+    try:
+        yield span
+    except Exception as e:
+        span.set_attribute("error", repr(e))
+        raise
+    finally:
+        _current_span.reset(token)
+        span.end()
+
+
+def record_span(name: str, parent: Optional[SpanContext], start_ns: int, attributes: Optional[Dict[str, Any]] = None):
+    """Record an already-finished span, e.g. one that crossed tasks."""
+    if _exporter is None:
+        return
+    span = Span(name, parent, attributes)
+    span.start_ns = start_ns
+    span.end()
+
+
+def inject(message: Dict[str, Any]):
+    """Add the current trace context to a message envelope."""
+    span = _current_span.get()
+    if span is not None:
+        message[TRACE_FIELD] = {"traceparent": span.context.traceparent}
+
+
+def extract(message: Dict[str, Any]) -> Optional[SpanContext]:
+    """Read the trace context from a message envelope, if present and valid."""
+    carrier = message.get(TRACE_FIELD)
+    if not isinstance(carrier, dict):
+        return None
+    parts = str(carrier.get("traceparent", "")).split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    return SpanContext(parts[1], parts[2])
+
@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# Read at import time by src.terminal; keep test runs out of /tmp/mcp-terminal.
+os.environ.setdefault("TERMINAL_WORKDIR", tempfile.mkdtemp(prefix="mcp-terminal-test-"))
@@ -0,0 +1,45 @@
+import json
+
+import fakeredis.aioredis
+import pytest
+from fastmcp import Client, FastMCP
+
+from src.redis_client import RedisClient
+from src.tools.terminal_tools import register_terminal_tools
+
+
+@pytest.fixture
+async def client():
+    redis_client = RedisClient("redis://localhost:6379")
+    redis_client.redis = fakeredis.aioredis.FakeRedis()
+    mcp = FastMCP("terminal-test")
+    register_terminal_tools(mcp, redis_client)
+    async with Client(mcp) as client:
+        yield client
+
+
+async def call(client: Client, tool: str, **arguments) -> dict:
+    result = await client.call_tool(tool, arguments)
+    content = getattr(result, "content", result)
+    return json.loads(content[0].text)
+
+
+async def test_run_sh_tools_ignore_session_cd(client):
+    moved = await call(client, "run_command", command="cd / && pwd", session_id="cd-test")
+    assert moved["exit_code"] == 0
+
+    cat = await call(client, "cat_run_sh", session_id="cd-test")
+    assert cat["exit_code"] == 0
+    assert "No such file" not in cat["output"]
+    assert cat["output"].startswith("#!")
+
+    run = await call(client, "bash_run_sh", session_id="cd-test")
+    assert run["exit_code"] == 0
+    assert run["output"]
+
+    listing = await call(client, "ls", session_id="cd-test")
+    assert "run.sh" in listing["output"]
+
+    # The fixed tools must not move the session either.
+    still = await call(client, "run_command", command="pwd", session_id="cd-test")
+    assert still["output"].strip() == "/"